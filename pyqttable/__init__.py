@@ -6,31 +6,66 @@ A simple configurable table widget based on PyQt5 and pandas
 copyright by Tongyan Xu
 """
 
-__all__ = ['PyQtTable']
+__all__ = ['PyQtTable', 'PyQtTableView']
 
+import numpy as np
 import pandas as pd
 
-from . import column, delegate, header, utils, widget
-from PyQt5 import QtWidgets, QtCore
-from typing import List, Dict, Any, Optional, NoReturn
+from . import column, delegate, header, model, utils, widget
+from .base import TableBase
+from PyQt5 import QtWidgets, QtCore, QtGui
+from typing import List, Dict, Tuple, Any, Optional, NoReturn
 
 
-class PyQtTable(QtWidgets.QTableWidget):
+class PyQtTable(TableBase, QtWidgets.QTableWidget):
     """
     PyQtTable widget - subclass of QTableWidget
+    * one QTableWidgetItem is created for each shown cell (of current page if page_size is set)
+    * for large data, use PyQtTableView instead, or show it by pages (page_size)
 
     methods:
     get_data(full) -> pd.DataFrame
-    set_data(data)
+    set_data(data, diff_on)
+    set_data_chunks(chunks, total)
+    set_data_async(source, diff_on, executor) (coroutine)
+    set_data_chunks_async(chunks, total, executor) (coroutine)
+    append_rows(data)
+    upsert(data)
+    set_source(path)
+    set_sort(sort_list)
     get_filter_data() -> Dict[str, str]
+    cancel()
+    cancel_loading()
+    set_page(page)
+    set_page_size(page_size)
+    page -> int
+    page_count -> int
+    engine -> TableEngine
 
     signals:
     errorOccurred(Exception, traceback)
+    busyChanged(bool)
+    progressChanged(int)
+    loadingChanged(bool)
+    loadProgress(int, int)
+    pageChanged(int, int)
     """
 
     # when an error occurs, this signal will be emitted
     # connect you error handling functions if necessary
     errorOccurred = QtCore.pyqtSignal(object, object)
+    # when background filtering / sorting starts or stops, this signal will be emitted
+    busyChanged = QtCore.pyqtSignal(bool)
+    # progress (0 - 100) of background filtering / sorting
+    progressChanged = QtCore.pyqtSignal(int)
+    # when loading chunks (set_data_chunks / set_data_chunks_async) starts or stops,
+    #   this signal will be emitted
+    loadingChanged = QtCore.pyqtSignal(bool)
+    # number of loaded rows and total rows (0 if unknown) when loading chunks
+    loadProgress = QtCore.pyqtSignal(int, int)
+    # when current page or number of pages changes (page_size is set), this signal will be emitted
+    #   with current page (0-based) and number of pages
+    pageChanged = QtCore.pyqtSignal(int, int)
 
     def __init__(self,
                  parent: Optional[QtWidgets.QWidget] = None,
@@ -39,6 +74,14 @@ class PyQtTable(QtWidgets.QTableWidget):
                  sortable: bool = False,
                  draggable: bool = False,
                  checkable: bool = False,
+                 background: bool = False,
+                 live_filter: Optional[int] = None,
+                 filter_executor: Any = None,
+                 max_rows: Optional[int] = None,
+                 max_fps: int = 30,
+                 key_column: Optional[str] = None,
+                 flash: Optional[int] = None,
+                 page_size: Optional[int] = None,
                  ):
         """
         create a PyQtTable widget using column configurations
@@ -60,6 +103,7 @@ class PyQtTable(QtWidgets.QTableWidget):
                     v_align='c',  # vertical alignment
                     selection=None,  # valid values
                     sort_lt=None,  # DIY __lt__ methods for sorting (only effective when sortable is True)
+                    sort_key=None,  # function mapping column to sorting keys (same as pandas sort key)
                     filter_type='contain',  # filter type (only effective when show_filter is True)
                     color=None,  # font color (string like '#000000' or tuple like (0, 0, 0, Optional[0]))
                     bg_color=None,  # background color (same format as color)
@@ -68,150 +112,319 @@ class PyQtTable(QtWidgets.QTableWidget):
         sortable: sorting is allowed or not
         draggable: column is draggable or not
         checkable: row is checkable or not (QCheckBox in vertical header)  # not implemented
+        background: run filtering / sorting on worker thread or not
+            * GUI is not blocked by slow filters / sorting functions
+            * only result of the latest filtering / sorting is shown
+        live_filter: debounce delay (ms) of filtering while typing in filter
+            * None to filter only when editing is finished (Enter pressed / focus lost)
+        filter_executor: evaluate expensive filters on chunks of column in parallel
+            * 'process' / 'thread', or a FilterExecutor (pyqttable.executor)
+            * only for filters with ParallelSafe = True (regex / expression / custom filters)
+        max_rows: max number of rows kept when appending rows, oldest rows are dropped
+            * None to keep all rows
+        max_fps: max number of batches per second when appending rows (see append_rows)
+        key_column: key of column identifying rows (primary key), required for upsert
+        flash: duration (ms) of highlighting cells changed by upsert
+            * None to disable highlighting
+        page_size: number of rows shown in one page (only items of current page are created)
+            * filtering / sorting still apply to all rows, vertical header shows original row numbers
+            * None to show all rows in one page
         """
-        super().__init__(parent)
-        # Column configuration setup
-        self._column_group = column.ColumnGroup(column_config)
-        self._show_filter = show_filter
-        self._sortable = sortable
-        self._draggable = draggable
-        self._checkable = checkable
-
-        # Empty data
-        self._data: pd.DataFrame = pd.DataFrame()
-        self._shown_data: pd.DataFrame = pd.DataFrame()
-
-        # Make header/delegate components
-        self._header_manager = header.HeaderManager(self, self._column_group,
-                                                    show_filter, sortable, draggable)
-        self._delegate_setter = delegate.DelegateSetter(self)
-
-        # Data change lock to distinguish manually change on UI and set_data
-        self._lock = utils.NameLock()
-
-        # Setup UI components
-        self._setup_components()
+        super().__init__(parent, column_config, show_filter,
+                         sortable, draggable, checkable, background, live_filter,
+                         filter_executor, max_rows, max_fps, key_column, flash)
+        if page_size is not None and page_size <= 0:
+            raise ValueError(f'page_size should be positive: {page_size}')
+        self._page_size = page_size
+        # Current page and last emitted (page, number of pages)
+        self._page = 0
+        self._page_state = (0, 1)
 
     # ================================ Public Methods ================================
 
     @utils.widget_error_signal
-    def get_data(self, full: bool = True) -> pd.DataFrame:
+    def set_page(self, page: int):
         """
-        Get table data
+        Show page of shown rows (only if page_size is set)
 
         Parameters
         ----------
-        full: if True, all data (including hidden rows) will be returned
-            if False, only currently shown rows will be returned
-
-        Returns
-        -------
-        Full or filtered data
+        page: page number (0-based), clipped to valid pages (negative counts from last page)
         """
-        return self._data.copy() if full else self._shown_data.copy()
+        if page < 0:
+            page += self.page_count
+        self._page = page
+        self._display_data()
 
     @utils.widget_error_signal
-    def set_data(self, data: pd.DataFrame):
+    def set_page_size(self, page_size: Optional[int]):
         """
-        Set table data
+        Set number of rows shown in one page, current page is moved to keep its first row shown
 
         Parameters
         ----------
-        data: DataFrame
-            * attention: index of DataFrame will be reset
-            * please do not save any information in index
+        page_size: number of rows in one page, None to show all rows in one page
         """
-        df = data.reset_index(drop=True)
-        self._data = self._shown_data = df
-        self._header_manager.update_filter(self._data)
+        if page_size is not None and page_size <= 0:
+            raise ValueError(f'page_size should be positive: {page_size}')
+        first, _ = self._page_range()
+        self._page_size = page_size
+        self._page = first // page_size if page_size else 0
         self._display_data()
 
-    def get_filter_data(self) -> Dict[str, str]:
-        """
-        Get table filter data
+    @property
+    def page(self) -> int:
+        """Current page (0-based)"""
+        return self._page
 
-        Returns
-        -------
-        Dictionary of key - filter string
-        """
-        return self._header_manager.filter_value \
-            if self._header_manager.show_filter else {}
+    @property
+    def page_count(self) -> int:
+        """Number of pages (at least 1)"""
+        if not self._page_size:
+            return 1
+        return max(-(-len(self._engine.rows) // self._page_size), 1)
 
     # ================================ Private Methods ================================
 
-    def _setup_components(self) -> NoReturn:
-        # Filter actions
-        self._header_manager.filterTriggered.connect(self._filter_action)
-
-        # Sorting actions
-        self._header_manager.sortTriggered.connect(self._sort_action)
+    def _setup_view(self) -> NoReturn:
+        pass
 
-        # Data editing actions
+    def _connect_editing(self) -> NoReturn:
         self.cellChanged.connect(self._update_data)
 
-        # Customized delegate
-        for j, col in enumerate(self._column_group):
-            item_delegate = self._delegate_setter.get_delegate(col)
-            if item_delegate is not None:
-                self.setItemDelegateForColumn(j, item_delegate)
-
     def _display_data(self) -> NoReturn:
         with self._lock.get_lock('display_data'):
             self.clearContents()
-            self.setRowCount(len(self._shown_data))
-            row_num = 0
-            for i, row in self._shown_data.iterrows():
-                row_item = QtWidgets.QTableWidgetItem(str(i + 1))
-                self.setVerticalHeaderItem(row_num, row_item)
-                for j, col in enumerate(self._column_group):
-                    cell_item = TableCell.from_row(row, col)
-                    self.setItem(row_num, j, cell_item)
-                row_num += 1
-
-    @utils.widget_error_signal
-    def _sort_action(self, sort_func: callable):
-        if not self._lock.check_lock('display_data'):
-            self._shown_data = sort_func(self._shown_data)
-            self._display_data()
-
-    @utils.widget_error_signal
-    def _filter_action(self, filter_func: callable):
-        if not self._lock.check_lock('display_data'):
-            filtered_data = filter_func(self._data)
-            self._shown_data = self._header_manager.sort(filtered_data)
+            start, stop = self._page_range()
+            self.setRowCount(stop - start)
+            self._display_rows(0)
+        self._emit_page()
+
+    def _display_appended(self, dropped: int, removed: int, added: int) -> NoReturn:
+        if self._page_size and removed:
+            # Rows of all pages are moved forward, current page is displayed again
             self._display_data()
+            return
+        with self._lock.get_lock('display_data'):
+            self.model().removeRows(0, removed)
+            start, stop = self._page_range()
+            old_count = self.rowCount()
+            self.setRowCount(stop - start)
+            # Positions of rows are shifted if oldest rows are dropped, so all rows are updated
+            self._display_rows(0 if dropped else old_count)
+        self._emit_page()
+
+    def _display_patched(self, old_rows: np.ndarray, mapping: np.ndarray) -> NoReturn:
+        rows = self._engine.rows
+        offset, stop = self._page_range()
+        if np.array_equal(mapping[old_rows], rows):
+            # Rows are not moved, only row numbers (positions) may be changed
+            with self._lock.get_lock('display_data'):
+                changed = np.flatnonzero(old_rows[offset:stop] != rows[offset:stop]) + offset
+                for row_num in changed.tolist():
+                    self.setVerticalHeaderItem(row_num - offset,
+                                               QtWidgets.QTableWidgetItem(str(rows[row_num] + 1)))
+            return
+        # Items are created again, selection and scroll position are restored
+        selected = [(mapping[old_rows[index.row() + offset]], index.column())
+                    for index in self.selectedIndexes()]
+        scroll = self.horizontalScrollBar().value(), self.verticalScrollBar().value()
+        self._display_data()
+        offset, _ = self._page_range()
+        inverse = {pos: row_num - offset for row_num, pos in enumerate(rows.tolist())}
+        self.clearSelection()
+        selection = QtCore.QItemSelection()
+        for pos, column_num in selected:
+            if 0 <= inverse.get(pos, -1) < self.rowCount():
+                index = self.model().index(inverse[pos], column_num)
+                selection.select(index, index)
+        self.selectionModel().select(selection, QtCore.QItemSelectionModel.Select)
+        self.horizontalScrollBar().setValue(scroll[0])
+        self.verticalScrollBar().setValue(scroll[1])
+
+    def _display_cells(self, cells: Dict[str, np.ndarray]) -> NoReturn:
+        with self._lock.get_lock('display_data'):
+            rows = self._engine.rows
+            offset, stop = self._page_range()
+            for j, col in enumerate(self._column_group):
+                if col.key not in cells:
+                    continue
+                strings = self._engine.cache.strings(col.key)
+                row_nums = cells[col.key]
+                for row_num in row_nums[(row_nums >= offset) & (row_nums < stop)].tolist():
+                    i = rows[row_num]
+                    item = self.item(row_num - offset, j)
+                    item.setText(_display_string(strings.iat[i]))
+                    item.set_flash(self.FlashColor if (i, col.key) in self._flash_cells else None)
+
+    def _display_rows(self, start: int) -> NoReturn:
+        # Create items of shown rows of current page from start (row number in page)
+        rows = self._engine.rows
+        offset, stop = self._page_range()
+        strings = [self._engine.cache.strings(col.key) for col in self._column_group]
+        for row_num in range(start, stop - offset):
+            i = rows[offset + row_num]
+            row_item = QtWidgets.QTableWidgetItem(str(i + 1))
+            self.setVerticalHeaderItem(row_num, row_item)
+            for j, col in enumerate(self._column_group):
+                cell_item = TableCell(strings[j].iat[i], col)
+                if (i, col.key) in self._flash_cells:
+                    cell_item.set_flash(self.FlashColor)
+                self.setItem(row_num, j, cell_item)
+
+    def _page_range(self) -> Tuple[int, int]:
+        # Range of shown rows in current page (current page is clipped to valid pages)
+        count = len(self._engine.rows)
+        if not self._page_size:
+            return 0, count
+        self._page = min(max(self._page, 0), self.page_count - 1)
+        start = self._page * self._page_size
+        return start, min(start + self._page_size, count)
+
+    def _emit_page(self) -> NoReturn:
+        # Emit pageChanged if current page or number of pages is changed
+        state = (self._page, self.page_count)
+        if state != self._page_state:
+            self._page_state = state
+            self.pageChanged.emit(*state)
 
     @utils.widget_error_signal
     def _update_data(self, row: int, col: int):
         if not self._lock.check_lock('display_data'):
             item = self.item(row, col)
             assert isinstance(item, TableCell)
-            column_cfg = item.column_cfg
-            ori_index = self._shown_data.index[row]
-            self._data.loc[ori_index, column_cfg.key] = \
-                self._shown_data.loc[ori_index, column_cfg.key] = item.value
+            offset, _ = self._page_range()
+            self._write_value(offset + row, item.column_cfg, item.value)
+
+
+class PyQtTableView(TableBase, QtWidgets.QTableView):
+    """
+    PyQtTableView widget - subclass of QTableView
+    * same usage as PyQtTable
+    * data is served lazily by TableModel, only for cells to be painted,
+        no item is created for each cell
+
+    methods:
+    get_data(full) -> pd.DataFrame
+    set_data(data, diff_on)
+    set_data_chunks(chunks, total)
+    set_data_async(source, diff_on, executor) (coroutine)
+    set_data_chunks_async(chunks, total, executor) (coroutine)
+    append_rows(data)
+    upsert(data)
+    set_source(path)
+    set_sort(sort_list)
+    get_filter_data() -> Dict[str, str]
+    cancel()
+    cancel_loading()
+    engine -> TableEngine
+
+    signals:
+    errorOccurred(Exception, traceback)
+    busyChanged(bool)
+    progressChanged(int)
+    loadingChanged(bool)
+    loadProgress(int, int)
+    """
+
+    # when an error occurs, this signal will be emitted
+    # connect you error handling functions if necessary
+    errorOccurred = QtCore.pyqtSignal(object, object)
+    # when background filtering / sorting starts or stops, this signal will be emitted
+    busyChanged = QtCore.pyqtSignal(bool)
+    # progress (0 - 100) of background filtering / sorting
+    progressChanged = QtCore.pyqtSignal(int)
+    # when loading chunks (set_data_chunks / set_data_chunks_async) starts or stops,
+    #   this signal will be emitted
+    loadingChanged = QtCore.pyqtSignal(bool)
+    # number of loaded rows and total rows (0 if unknown) when loading chunks
+    loadProgress = QtCore.pyqtSignal(int, int)
+
+    def __init__(self,
+                 parent: Optional[QtWidgets.QWidget] = None,
+                 column_config: List[Dict[str, Any]] = None,
+                 show_filter: bool = False,
+                 sortable: bool = False,
+                 draggable: bool = False,
+                 checkable: bool = False,
+                 background: bool = False,
+                 live_filter: Optional[int] = None,
+                 filter_executor: Any = None,
+                 max_rows: Optional[int] = None,
+                 max_fps: int = 30,
+                 key_column: Optional[str] = None,
+                 flash: Optional[int] = None,
+                 ):
+        """
+        create a PyQtTableView widget using column configurations
+
+        Parameters
+        ----------
+        same as PyQtTable
+        """
+        super().__init__(parent, column_config, show_filter,
+                         sortable, draggable, checkable, background, live_filter,
+                         filter_executor, max_rows, max_fps, key_column, flash)
+
+    # ================================ Private Methods ================================
+
+    def _setup_view(self) -> NoReturn:
+        self._model = model.TableModel(self._column_group, self._engine.cache, self)
+        self._model.set_highlight(self._flash_cells, self.FlashColor)
+        self.setModel(self._model)
+
+    def _connect_editing(self) -> NoReturn:
+        self._model.cellEdited.connect(self._update_data)
+
+    def _display_data(self) -> NoReturn:
+        with self._lock.get_lock('display_data'):
+            self._model.set_rows(self._engine.rows)
+
+    def _display_appended(self, dropped: int, removed: int, added: int) -> NoReturn:
+        with self._lock.get_lock('display_data'):
+            self._model.append_rows(self._engine.rows, removed, added, shifted=bool(dropped))
+
+    def _display_patched(self, old_rows: np.ndarray, mapping: np.ndarray) -> NoReturn:
+        with self._lock.get_lock('display_data'):
+            self._model.patch_rows(self._engine.rows, mapping)
+
+    def _display_cells(self, cells: Dict[str, np.ndarray]) -> NoReturn:
+        columns = [col.key for col in self._column_group]
+        self._model.update_cells({columns.index(key): rows for key, rows in cells.items()})
+
+    @utils.widget_error_signal
+    def _update_data(self, row: int, col: int, string: str):
+        if not self._lock.check_lock('display_data'):
+            column_cfg = self._column_group[col]
+            self._write_value(row, column_cfg, column_cfg.type.to_value(string))
 
 
 class TableCell(QtWidgets.QTableWidgetItem):
 
-    def __init__(self, value: Any, column_cfg: column.Column):
+    def __init__(self, display_value: Optional[str], column_cfg: column.Column):
         self.column_cfg = column_cfg
-        display_value = self.column_cfg.type.to_string(value)
-        super().__init__(display_value)
+        super().__init__(_display_string(display_value))
         if not self.column_cfg.editable:
             self.setFlags(self.flags() & ~ QtCore.Qt.ItemIsEditable)
         self.column_cfg.align.apply_to_item(self)
         self.column_cfg.style.apply_to_item(self)
 
-    @classmethod
-    def from_row(cls, row_data: pd.Series, column_cfg: column.Column):
-        val = row_data.get(column_cfg.key, column_cfg.default)
-        return cls(val, column_cfg)
+    def set_flash(self, color: Optional[QtGui.QColor]) -> NoReturn:
+        # Highlight cell with color, or restore background of column style if None
+        if color is not None:
+            self.setBackground(color)
+        else:
+            self.setData(QtCore.Qt.BackgroundRole, None)
+            self.column_cfg.style.apply_to_item(self)
 
     @property
     def value(self) -> Any:
         return self.column_cfg.type.to_value(self.text())
 
 
+def _display_string(display_value: Optional[str]) -> str:
+    return '' if pd.isna(display_value) else display_value
+
+
 if __name__ == '__main__':
     pass
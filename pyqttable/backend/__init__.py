@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""data backends of pandas / pyarrow / polars / SQL database / shared memory"""
+
+__all__ = ['Backend', 'PandasBackend', 'SqlBackend', 'SqlDialect', 'SqliteDialect',
+           'SharedMemoryBackend', 'SharedMemoryWriter', 'make', 'open_source']
+
+import os
+import pandas as pd
+
+from .base import Backend
+from .pandas_ import PandasBackend
+from .sql import SqlBackend, SqlDialect, SqliteDialect
+from typing import Any
+
+
+def make(data: Any) -> Backend:
+    """
+    Make Backend of table data
+    * pyarrow / polars / shared memory backends are imported only when their data is given
+
+    Parameters
+    ----------
+    data: pandas DataFrame / pyarrow Table (RecordBatch, list of RecordBatches) /
+        polars DataFrame / SharedMemory (written by SharedMemoryWriter) / Backend
+
+    Returns
+    -------
+    Backend of data
+    """
+    if isinstance(data, Backend):
+        return data
+    elif isinstance(data, pd.DataFrame):
+        return PandasBackend(data)
+
+    sample = data[0] if isinstance(data, (list, tuple)) and data else data
+    module = type(sample).__module__.split('.')[0]
+    if module == 'pyarrow':
+        from .arrow import ArrowBackend
+        if ArrowBackend.accepts(data):
+            return ArrowBackend(data)
+    elif module == 'polars':
+        from .polars_ import PolarsBackend
+        if PolarsBackend.accepts(data):
+            return PolarsBackend(data)
+    elif module == 'multiprocessing':
+        from .shm import SharedMemoryBackend
+        if SharedMemoryBackend.accepts(data):
+            return SharedMemoryBackend(data)
+    raise TypeError(f'unsupported data type \'{type(data).__name__}\'')
+
+
+def __getattr__(name: str) -> Any:
+    # Shared memory backend is imported when it is used (multiprocessing.shared_memory needs Python 3.8)
+    if name in ('SharedMemoryBackend', 'SharedMemoryWriter'):
+        from . import shm
+        return getattr(shm, name)
+    raise AttributeError(f'module \'{__name__}\' has no attribute \'{name}\'')
+
+
+def open_source(path: str) -> Backend:
+    """
+    Open file as lazy Backend, data is read only when it is needed
+    * Arrow IPC / Feather file (.arrow / .feather / .ipc) is memory-mapped,
+        columns are not copied if file is not compressed
+    * Parquet file (.parquet / .pq) is read by row groups for rendering,
+        and by columns for sorting / filtering
+
+    Parameters
+    ----------
+    path: path of file
+
+    Returns
+    -------
+    Backend of file
+    """
+    path = os.fspath(path)
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in ('.parquet', '.pq'):
+        from .arrow import ParquetBackend
+        return ParquetBackend(path)
+    elif suffix in ('.arrow', '.feather', '.ipc'):
+        from pyarrow import feather
+        from .arrow import ArrowBackend
+        return ArrowBackend(feather.read_table(path, memory_map=True), lazy=True)
+    raise ValueError(f'unsupported file type \'{suffix}\'')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""pyarrow data backend"""
+
+__all__ = ['ArrowBackend', 'ParquetBackend']
+
+import collections
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .base import Backend
+from typing import Any, List, Optional, NoReturn
+
+
+class ArrowBackend(Backend):
+    """
+    Backend of pyarrow Table (RecordBatch or list of RecordBatches is combined without copying)
+    * columns are exposed as pandas Series backed by Arrow arrays (pd.ArrowDtype) without copying
+    * sorting and filters of string columns use pyarrow.compute kernels
+    * Table is immutable, so editing a cell replaces the whole column
+    """
+
+    def __init__(self, data: Any, lazy: bool = False):
+        """
+        Parameters
+        ----------
+        data: pyarrow Table / RecordBatch / list of RecordBatches
+        lazy: data is memory-mapped or not
+        """
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        elif isinstance(data, (list, tuple)):
+            data = pa.Table.from_batches(data)
+        super().__init__(data)
+        self.lazy = lazy
+        self._series = {}
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        if isinstance(data, (list, tuple)):
+            return len(data) > 0 and all(isinstance(each, pa.RecordBatch) for each in data)
+        return isinstance(data, (pa.Table, pa.RecordBatch))
+
+    @property
+    def columns(self) -> List[str]:
+        return self._data.column_names
+
+    def __len__(self) -> int:
+        return self._data.num_rows
+
+    def column(self, key: str) -> pd.Series:
+        if key not in self._series:
+            self._series[key] = _to_series(self._arrow_column(key), key)
+        return self._series[key]
+
+    def dtype(self, key: str) -> Any:
+        return pd.ArrowDtype(self._schema.field(key).type)
+
+    def slice(self, key: str, start: int, stop: int) -> pd.Series:
+        return _to_series(self._arrow_column(key).slice(start, stop - start), key)
+
+    def take(self, rows: np.ndarray) -> pa.Table:
+        return self._data.take(pa.array(rows))
+
+    def copy(self) -> pa.Table:
+        # Table is immutable
+        return self._data
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        column = self._arrow_column(key)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[row] = True
+        new_column = pc.if_else(pa.array(mask), pa.scalar(value, type=column.type), column)
+        self._set_arrow_column(key, new_column)
+        self._series.pop(key, None)
+
+    def set_values(self, rows: np.ndarray, key: str, values: List[Any]) -> NoReturn:
+        # Column is rebuilt once, replacements are given in order of rows
+        column = self._arrow_column(key)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows] = True
+        order = np.argsort(rows, kind='stable')
+        replacements = pa.array([values[i] for i in order], type=column.type, from_pandas=True)
+        new_column = pc.replace_with_mask(column.combine_chunks(), pa.array(mask), replacements)
+        self._set_arrow_column(key, pa.chunked_array([new_column]))
+        self._series.pop(key, None)
+
+    @property
+    def _schema(self) -> pa.Schema:
+        return self._data.schema
+
+    def append(self, chunks: List[Any]) -> NoReturn:
+        self._data = self.appended(chunks).data
+        self._series.clear()
+
+    def appended(self, chunks: List[Any]) -> 'ArrowBackend':
+        # New chunks are cast to schema of data, and concatenated without copying
+        tables = [self._data] + [self.convert(each) for each in chunks]
+        return ArrowBackend(pa.concat_tables(tables), lazy=self.lazy)
+
+    def convert(self, data: Any) -> pa.Table:
+        return _to_table(data, self._data.schema)
+
+    def drop(self, count: int) -> NoReturn:
+        self._data = self._data.slice(count)
+        self._series.clear()
+
+    def _arrow_column(self, key: str) -> pa.ChunkedArray:
+        return self._data.column(key)
+
+    def _set_arrow_column(self, key: str, column: pa.ChunkedArray) -> NoReturn:
+        index = self._data.column_names.index(key)
+        self._data = self._data.set_column(index, key, column)
+
+    # ================================ Native Kernels ================================
+
+    def argsort(self, key: str) -> Optional[np.ndarray]:
+        order = pc.array_sort_indices(self._arrow_column(key), order='ascending',
+                                      null_placement='at_end')
+        return np.asarray(order, dtype=np.intp)
+
+    def contains(self, key: str, text: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        return None if column is None else _to_mask(pc.match_substring(column, text))
+
+    def equals(self, key: str, text: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        return None if column is None else _to_mask(pc.equal(column, text))
+
+    def matches(self, key: str, pattern: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        if column is None:
+            return None
+        try:
+            return _to_mask(pc.match_substring_regex(column, pattern))
+        except pa.ArrowInvalid as e:
+            # Syntax not supported by RE2 (e.g. lookaround), use python regex instead
+            _ = e
+            return None
+
+    def isin(self, key: str, values: List[str]) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        if column is None:
+            return None
+        return _to_mask(pc.is_in(column, value_set=pa.array(values, type=column.type)))
+
+    def _string_column(self, key: str) -> Optional[pa.ChunkedArray]:
+        column_type = self._schema.field(key).type
+        if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+            return self._arrow_column(key)
+        return None
+
+
+class ParquetBackend(ArrowBackend):
+    """
+    Backend of Parquet file, read lazily
+    * only metadata is read when file is opened
+    * column is read as a whole only when it is needed (for sorting / filtering / editing)
+    * for rendering, only row groups of shown rows are read (recently used ones are kept)
+    """
+
+    # Max number of (column, row group) kept in memory for rendering
+    RowGroupCacheSize = 64
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path: path of Parquet file
+        """
+        Backend.__init__(self, path)
+        self.lazy = True
+        self._series = {}
+        self._file = pq.ParquetFile(path, memory_map=True)
+        metadata = self._file.metadata
+        sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        self._loaded = {}
+        self._row_groups = collections.OrderedDict()
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        return isinstance(data, str) and data.lower().endswith(('.parquet', '.pq'))
+
+    @property
+    def columns(self) -> List[str]:
+        return self._schema.names
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def slice(self, key: str, start: int, stop: int) -> pd.Series:
+        if key in self._loaded:
+            return super().slice(key, start, stop)
+        elif stop <= start:
+            return _to_series(pa.chunked_array([], type=self._schema.field(key).type), key)
+        # Read row groups overlapping with [start, stop) only
+        first = int(np.searchsorted(self._offsets, start, side='right')) - 1
+        last = int(np.searchsorted(self._offsets, stop, side='left'))
+        chunks = [chunk for i in range(first, last) for chunk in self._read_row_group(key, i).chunks]
+        column = pa.chunked_array(chunks, type=self._schema.field(key).type)
+        return _to_series(column.slice(start - int(self._offsets[first]), stop - start), key)
+
+    def take(self, rows: np.ndarray) -> pa.Table:
+        # Read row groups containing given rows only (columns already in memory are taken directly)
+        rows = np.asarray(rows, dtype=np.int64)
+        groups = np.searchsorted(self._offsets, rows, side='right') - 1
+        needed = np.unique(groups)
+        starts = np.concatenate([[0], np.cumsum(np.diff(self._offsets)[needed])[:-1]])
+        local = pa.array(rows - self._offsets[groups] + starts[np.searchsorted(needed, groups)])
+        unloaded = [key for key in self.columns if key not in self._loaded]
+        table = self._file.read_row_groups(needed.tolist(), columns=unloaded) \
+            if unloaded and len(rows) else None
+        arrays = [
+            self._loaded[key].take(pa.array(rows)) if key in self._loaded
+            else table.column(key).take(local) if table is not None
+            else pa.chunked_array([], type=self._schema.field(key).type)
+            for key in self.columns
+        ]
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def copy(self) -> pa.Table:
+        return pa.Table.from_arrays([self._arrow_column(key) for key in self.columns],
+                                    schema=self._schema)
+
+    def append(self, chunks: List[Any]) -> NoReturn:
+        raise TypeError(f'appending rows is not supported by {type(self).__name__}')
+
+    def drop(self, count: int) -> NoReturn:
+        raise TypeError(f'dropping rows is not supported by {type(self).__name__}')
+
+    @property
+    def _schema(self) -> pa.Schema:
+        return self._file.schema_arrow
+
+    def _arrow_column(self, key: str) -> pa.ChunkedArray:
+        if key not in self._loaded:
+            self._loaded[key] = self._file.read(columns=[key]).column(key)
+        return self._loaded[key]
+
+    def _set_arrow_column(self, key: str, column: pa.ChunkedArray) -> NoReturn:
+        self._loaded[key] = column
+
+    def _read_row_group(self, key: str, index: int) -> pa.ChunkedArray:
+        cache_key = (key, index)
+        if cache_key not in self._row_groups:
+            table = self._file.read_row_group(index, columns=[key])
+            self._row_groups[cache_key] = table.column(key)
+            while len(self._row_groups) > self.RowGroupCacheSize:
+                self._row_groups.popitem(last=False)
+        self._row_groups.move_to_end(cache_key)
+        return self._row_groups[cache_key]
+
+
+def _to_table(data: Any, schema: pa.Schema) -> pa.Table:
+    # Convert new rows to Table of given schema (missing columns are filled with null)
+    if isinstance(data, pa.RecordBatch):
+        data = pa.Table.from_batches([data])
+    elif isinstance(data, pd.DataFrame):
+        data = pa.Table.from_pandas(data, preserve_index=False)
+    elif not isinstance(data, pa.Table):
+        # Records (list of dicts / dict of lists), NaN is regarded as null
+        if not isinstance(data, dict):
+            data = list(data)
+            data = {field.name: [each.get(field.name) for each in data] for field in schema}
+        length = len(next(iter(data.values()))) if data else 0
+        arrays = [pa.array(data[field.name], type=field.type, from_pandas=True)
+                  if field.name in data else pa.nulls(length, field.type) for field in schema]
+        return pa.Table.from_arrays(arrays, schema=schema)
+    arrays = [data.column(field.name).cast(field.type) if field.name in data.column_names
+              else pa.nulls(data.num_rows, field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _to_series(column: pa.ChunkedArray, key: str) -> pd.Series:
+    # pandas Series backed by Arrow array without copying
+    return pd.Series(pd.arrays.ArrowExtensionArray(column), name=key, copy=False)
+
+
+def _to_mask(result: pa.ChunkedArray) -> np.ndarray:
+    # Convert boolean array to numpy mask, null regarded as False
+    return np.asarray(pc.fill_null(result, False), dtype=bool)
+
+
+if __name__ == '__main__':
+    pass
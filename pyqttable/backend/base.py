@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""base data backend"""
+
+__all__ = ['Backend']
+
+import abc
+import numpy as np
+import pandas as pd
+
+from typing import Any, List, Optional, NoReturn
+
+
+class Backend(metaclass=abc.ABCMeta):
+    """
+    Data backend to access table data of different libraries in the same way
+
+    To create your own Backend, following methods must be implemented:
+    - accepts: data can be handled by this backend or not
+    - columns: column keys of data
+    - __len__: number of rows
+    - column: column as pandas Series (without copying if possible)
+    - take: rows at given positions, in format of original data
+    - copy: copy of whole data, in format of original data
+    - set_value: set value of single cell
+
+    Following methods can be implemented for faster updating of many cells:
+    - set_values: set values of cells in one column (set one by one by default)
+
+    Following methods can be implemented for streaming data (appending rows):
+    - append: append rows to data
+    - drop: drop oldest rows
+
+    Following methods can be implemented for lazy data (e.g. memory-mapped file):
+    - dtype: dtype of column without reading it
+    - slice: part of column without reading whole column
+
+    Following methods can be implemented to use native compute kernels,
+        None means not supported (computed on pandas Series instead):
+    - argsort: stable ascending order of column
+    - contains / equals / matches / isin: filter masks of string column
+
+    For data source which filters / sorts data itself (e.g. database),
+        following methods can be implemented (see SqlBackend):
+    - query: filter and sort data in data source, returning Backend of result
+    - distinct: distinct values of column for filter editors
+
+    For data changed in place by others (e.g. shared memory), following method can be implemented:
+    - poll: range of rows changed since last poll
+    """
+
+    # Data is read lazily (e.g. from memory-mapped file) or not
+    # If True, display strings are converted block by block for rendering instead of whole column
+    lazy = False
+
+    def __init__(self, data: Any):
+        self._data = data
+
+    @property
+    def data(self) -> Any:
+        """Original data"""
+        return self._data
+
+    @classmethod
+    @abc.abstractmethod
+    def accepts(cls, data: Any) -> bool:
+        """Data can be handled by this backend or not"""
+        ...
+
+    @property
+    @abc.abstractmethod
+    def columns(self) -> List[str]:
+        """Column keys of data"""
+        ...
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def column(self, key: str) -> pd.Series:
+        """
+        Get column as pandas Series (without copying if possible)
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        Column data with RangeIndex
+        """
+        ...
+
+    def dtype(self, key: str) -> Any:
+        """dtype of column (as dtype of Series returned by column)"""
+        return self.column(key).dtype
+
+    def slice(self, key: str, start: int, stop: int) -> pd.Series:
+        """
+        Get part of column as pandas Series
+
+        Parameters
+        ----------
+        key: column key
+        start: position of first row
+        stop: position after last row
+
+        Returns
+        -------
+        Column data from start to stop, with RangeIndex
+        """
+        return self.column(key).iloc[start:stop].reset_index(drop=True)
+
+    @abc.abstractmethod
+    def take(self, rows: np.ndarray) -> Any:
+        """
+        Get rows at given positions
+
+        Parameters
+        ----------
+        rows: positions of rows
+
+        Returns
+        -------
+        Rows in format of original data
+        """
+        ...
+
+    @abc.abstractmethod
+    def copy(self) -> Any:
+        """Copy of whole data in format of original data"""
+        ...
+
+    @abc.abstractmethod
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        """
+        Set value of single cell
+
+        Parameters
+        ----------
+        row: position of row
+        key: column key
+        value: new value of cell
+        """
+        ...
+
+    def set_values(self, rows: np.ndarray, key: str, values: List[Any]) -> NoReturn:
+        """
+        Set values of cells in one column
+
+        Parameters
+        ----------
+        rows: positions of rows
+        key: column key
+        values: new values of cells (in order of rows)
+        """
+        for row, value in zip(rows, values):
+            self.set_value(row, key, value)
+
+    def append(self, chunks: List[Any]) -> NoReturn:
+        """
+        Append rows to data
+
+        Parameters
+        ----------
+        chunks: list of new rows, each in format of original data,
+            pandas DataFrame or records (list of dicts / dict of lists)
+        """
+        raise TypeError(f'appending rows is not supported by {type(self).__name__}')
+
+    def appended(self, chunks: List[Any]) -> 'Backend':
+        """
+        Copy of backend with rows appended, data is not changed
+            (so that it can be called on worker thread while data is used elsewhere)
+
+        Parameters
+        ----------
+        chunks: list of new rows (see append)
+
+        Returns
+        -------
+        New Backend
+        """
+        raise TypeError(f'appending rows is not supported by {type(self).__name__}')
+
+    def convert(self, data: Any) -> Any:
+        """
+        Convert new rows to format of data before appending
+        * only reads schema of data, so that it can be called on worker thread
+
+        Parameters
+        ----------
+        data: new rows, in format of original data, pandas DataFrame or records
+
+        Returns
+        -------
+        New rows which can be appended without converting (rows are returned as they are by default)
+        """
+        return data
+
+    def drop(self, count: int) -> NoReturn:
+        """
+        Drop oldest rows
+
+        Parameters
+        ----------
+        count: number of first rows to drop
+        """
+        raise TypeError(f'dropping rows is not supported by {type(self).__name__}')
+
+    # ================================ Native Kernels ================================
+
+    def argsort(self, key: str) -> Optional[np.ndarray]:
+        """Stable ascending order of column (null values at the end)"""
+        return None
+
+    def contains(self, key: str, text: str) -> Optional[np.ndarray]:
+        """Mask of string column containing text"""
+        return None
+
+    def equals(self, key: str, text: str) -> Optional[np.ndarray]:
+        """Mask of string column equal to text"""
+        return None
+
+    def matches(self, key: str, pattern: str) -> Optional[np.ndarray]:
+        """Mask of string column matching regex pattern (searched anywhere in string)"""
+        return None
+
+    def isin(self, key: str, values: List[str]) -> Optional[np.ndarray]:
+        """Mask of string column in given values"""
+        return None
+
+    # ================================ Pushdown ================================
+
+    # def query(self, filters: List[Tuple[Any, str]], sort: List[Tuple[str, bool]]) -> 'Backend':
+    #     """
+    #     Filter and sort data in data source
+    #     * Optional method
+    #
+    #     Parameters
+    #     ----------
+    #     filters: list of (column config, filter value)
+    #     sort: list of (column key, descending or not) in priority order
+    #
+    #     Returns
+    #     -------
+    #     Backend of result, whose rows are shown in order
+    #     """
+    #     ...
+
+    # def distinct(self, key: str) -> pd.Series:
+    #     """
+    #     Get distinct values of column (for filter editors)
+    #     * Optional method
+    #     """
+    #     ...
+
+    # ================================ Polling ================================
+
+    # def poll(self) -> Optional[Tuple[int, int]]:
+    #     """
+    #     Check changes of data written in place by others (e.g. shared memory, see SharedMemoryBackend)
+    #     * Optional method, table polls it on timer
+    #
+    #     Returns
+    #     -------
+    #     Range (first row, row after last) of rows changed since last poll
+    #         (rows after previous row count are new rows, all rows are reset if row count decreases),
+    #         None if nothing is changed
+    #     """
+    #     ...
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""pandas data backend"""
+
+__all__ = ['PandasBackend']
+
+import numpy as np
+import pandas as pd
+
+from .base import Backend
+from typing import Any, List, Optional, NoReturn
+
+
+class PandasBackend(Backend):
+    """
+    Backend of pandas DataFrame
+    * index of DataFrame is reset
+        (data is not copied with copy-on-write, and edited cells are not written back to it)
+    * appended rows are written into preallocated column arrays, and dropped rows only move start of them,
+        so appending costs O(new rows) on average (data is copied to larger arrays when they are full)
+    * columns of extension dtypes (e.g. str / Int64 / category) are concatenated when rows are appended
+        (Arrow-backed columns are concatenated without copying, and their chunks are combined when arrays are copied)
+    """
+
+    # Min number of rows allocated for appending
+    BufferRows = 1024
+
+    def __init__(self, data: pd.DataFrame):
+        super().__init__(data.reset_index(drop=True))
+        # Column arrays which rows are appended to (created by first append), and position of first row in them
+        self._buffer = None
+        self._start = 0
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        return isinstance(data, pd.DataFrame)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._data.columns
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def column(self, key: str) -> pd.Series:
+        return self._data[key]
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        return self._data.take(rows)
+
+    def copy(self) -> pd.DataFrame:
+        return self._data.copy()
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        self._data.loc[row, key] = value
+        self._check_buffer()
+
+    def set_values(self, rows: np.ndarray, key: str, values: List[Any]) -> NoReturn:
+        self._data.loc[rows, key] = values
+        self._check_buffer()
+
+    def append(self, chunks: List[Any]) -> NoReturn:
+        res = self.appended(chunks)
+        self._data, self._buffer, self._start = res._data, res._buffer, res._start
+
+    def appended(self, chunks: List[Any]) -> 'PandasBackend':
+        frames = [self.convert(each) for each in chunks]
+        if len(frames) == 1:
+            new = frames[0]
+        else:
+            new = pd.concat(frames, ignore_index=True) if frames else self._data.iloc[:0]
+        buffer, start, stop = self._buffer, self._start, self._start + len(self._data)
+        if buffer is None or buffer.end != stop or stop + len(new) > buffer.capacity \
+                or not _can_write(self._data, new):
+            # Rows are copied to new arrays, with room for as many rows appended later
+            data = pd.concat([self._data, new], ignore_index=True)
+            res = PandasBackend(data)
+            res._buffer = buffer = _Buffer(data, max(2 * len(data), self.BufferRows))
+            others = [_compact(series) if array is None else None
+                      for array, (_, series) in zip(buffer.arrays, data.items())]
+            res._data = buffer.view(data.columns, others, 0, len(data))
+            return res
+        # Rows after end of data are not used by any backend (see _Buffer.end), so new rows are written there
+        buffer.write(new, stop)
+        others = [pd.concat([series, new_series], ignore_index=True) if array is None else None
+                  for array, (_, series), (_, new_series) in zip(buffer.arrays, self._data.items(), new.items())]
+        res = PandasBackend(buffer.view(self._data.columns, others, start, buffer.end))
+        res._buffer, res._start = buffer, start
+        return res
+
+    def convert(self, data: Any) -> pd.DataFrame:
+        return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+    def drop(self, count: int) -> NoReturn:
+        self._data = self._data.iloc[count:].reset_index(drop=True)
+        self._start += count
+
+    def _check_buffer(self) -> NoReturn:
+        # Edited column may be replaced by pandas (e.g. dtype is changed), then rows are copied when appended
+        if self._buffer is not None and not self._buffer.holds(self._data):
+            self._buffer = None
+
+
+class _Buffer:
+    """
+    Preallocated column arrays of PandasBackend, shared by backends appended from one another
+    * columns of numpy dtypes are views of arrays, other columns are not buffered (None)
+    """
+
+    def __init__(self, data: pd.DataFrame, capacity: int):
+        self.capacity = capacity
+        self.arrays = []
+        for _, series in data.items():
+            array = None
+            if isinstance(series.dtype, np.dtype):
+                array = np.empty(capacity, dtype=series.dtype)
+                array[:len(data)] = series.to_numpy()
+            self.arrays.append(array)
+        # End of rows written, only backend with data ending here writes after it (others copy rows instead)
+        self.end = len(data)
+
+    def write(self, data: pd.DataFrame, start: int) -> NoReturn:
+        """Write rows of buffered columns from start"""
+        stop = start + len(data)
+        for array, (_, series) in zip(self.arrays, data.items()):
+            if array is not None:
+                array[start:stop] = series.to_numpy()
+        self.end = stop
+
+    def view(self, columns: pd.Index, others: List[Optional[pd.Series]], start: int, stop: int) -> pd.DataFrame:
+        """
+        DataFrame viewing rows from start to stop
+
+        Parameters
+        ----------
+        columns: column keys
+        others: columns which are not buffered (None for buffered columns)
+        start: start row in arrays
+        stop: stop row in arrays
+        """
+        values = {}
+        for i, (array, series) in enumerate(zip(self.arrays, others)):
+            if array is not None:
+                values[i] = pd.Series(array[start:stop], dtype=array.dtype, copy=False)
+            else:
+                values[i] = series.reset_index(drop=True)
+        res = pd.DataFrame(values, copy=False)
+        res.columns = columns
+        return res
+
+    def holds(self, data: pd.DataFrame) -> bool:
+        """Buffered columns of data are still views of arrays or not"""
+        return all(array is None or np.may_share_memory(series.to_numpy(), array)
+                   for array, (_, series) in zip(self.arrays, data.items()))
+
+
+def _can_write(data: pd.DataFrame, new: pd.DataFrame) -> bool:
+    # New rows keep dtypes of data when they are concatenated, so that they can be written into arrays
+    if list(new.columns) != list(data.columns):
+        return False
+    for (_, series), (_, new_series) in zip(data.items(), new.items()):
+        dtype, new_dtype = series.dtype, new_series.dtype
+        if dtype == new_dtype:
+            continue
+        if not isinstance(dtype, np.dtype) or not isinstance(new_dtype, np.dtype):
+            return False
+        if not (dtype.kind in 'fc' and new_dtype.kind in 'iuf' and np.result_type(dtype, new_dtype) == dtype):
+            return False
+    return True
+
+
+def _compact(series: pd.Series) -> pd.Series:
+    # Arrow-backed column is combined into one chunk, after many chunks of rows are appended
+    if not hasattr(series.array, '__arrow_array__'):
+        return series
+    array = series.array.__arrow_array__()
+    if getattr(array, 'num_chunks', 1) <= 1:
+        return series
+    return pd.Series(pd.array(array.combine_chunks(), dtype=series.dtype))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""polars data backend"""
+
+__all__ = ['PolarsBackend']
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from .base import Backend
+from typing import Any, List, Optional, NoReturn
+
+
+class PolarsBackend(Backend):
+    """
+    Backend of polars DataFrame
+    * columns are exposed as pandas Series backed by Arrow arrays if pyarrow is installed
+    * sorting and filters of string columns use polars expressions
+    """
+
+    def __init__(self, data: pl.DataFrame):
+        super().__init__(data)
+        self._series = {}
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        return isinstance(data, pl.DataFrame)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._data.columns
+
+    def __len__(self) -> int:
+        return self._data.height
+
+    def column(self, key: str) -> pd.Series:
+        if key not in self._series:
+            column = self._data.get_column(key)
+            try:
+                series = column.to_pandas(use_pyarrow_extension_array=True)
+            except ImportError as e:
+                _ = e
+                series = pd.Series(column.to_numpy(), name=key)
+            self._series[key] = series.reset_index(drop=True)
+        return self._series[key]
+
+    def take(self, rows: np.ndarray) -> pl.DataFrame:
+        return self._data.select(pl.all().gather(rows))
+
+    def copy(self) -> pl.DataFrame:
+        return self._data.clone()
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        self._data[int(row), key] = value
+        self._series.pop(key, None)
+
+    def set_values(self, rows: np.ndarray, key: str, values: List[Any]) -> NoReturn:
+        column = self._data.get_column(key).scatter(rows, pl.Series(values, dtype=self._data.schema[key]))
+        self._data = self._data.with_columns(column)
+        self._series.pop(key, None)
+
+    def append(self, chunks: List[Any]) -> NoReturn:
+        self._data = self.appended(chunks).data
+        self._series.clear()
+
+    def appended(self, chunks: List[Any]) -> 'PolarsBackend':
+        frames = [self.convert(each) for each in chunks]
+        # Missing columns of new rows are filled with null
+        return PolarsBackend(pl.concat([self._data] + frames, how='diagonal_relaxed')
+                             .select(self._data.columns))
+
+    def convert(self, data: Any) -> pl.DataFrame:
+        return data if isinstance(data, pl.DataFrame) else pl.DataFrame(data)
+
+    def drop(self, count: int) -> NoReturn:
+        self._data = self._data.slice(count)
+        self._series.clear()
+
+    # ================================ Native Kernels ================================
+
+    def argsort(self, key: str) -> Optional[np.ndarray]:
+        order = self._data.select(pl.arg_sort_by(key, nulls_last=True, maintain_order=True))
+        return order.to_series().to_numpy().astype(np.intp)
+
+    def contains(self, key: str, text: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        return None if column is None else _to_mask(column.str.contains(text, literal=True))
+
+    def equals(self, key: str, text: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        return None if column is None else _to_mask(column == text)
+
+    def matches(self, key: str, pattern: str) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        if column is None:
+            return None
+        try:
+            return _to_mask(column.str.contains(pattern))
+        except pl.exceptions.ComputeError as e:
+            # Syntax not supported by rust regex (e.g. lookaround), use python regex instead
+            _ = e
+            return None
+
+    def isin(self, key: str, values: List[str]) -> Optional[np.ndarray]:
+        column = self._string_column(key)
+        return None if column is None else _to_mask(column.is_in(values))
+
+    def _string_column(self, key: str) -> Optional[pl.Series]:
+        column = self._data.get_column(key)
+        return column if column.dtype == pl.Utf8 else None
+
+
+def _to_mask(result: pl.Series) -> np.ndarray:
+    # Convert boolean Series to numpy mask, null regarded as False
+    return result.fill_null(False).to_numpy().astype(bool)
+
+
+if __name__ == '__main__':
+    pass
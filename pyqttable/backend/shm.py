@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""shared memory data backend, with writer for producer process"""
+
+__all__ = ['SharedMemoryWriter', 'SharedMemoryBackend']
+
+import json
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+from .base import Backend
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple, Optional, NoReturn
+
+# Layout of shared memory block:
+# - header of int64: magic, size of metadata, sequence number, row count, capacity, log size
+# - log of recent writes, int64 (sequence number, first row, row after last) for each write
+# - metadata in JSON (column keys / dtypes / offsets)
+# - fixed-width columns (numpy arrays of capacity rows), each aligned to 64 bytes
+_Magic = 0x50515453484d31  # 'PQTSHM1'
+_HeaderSize = 8
+_Sequence, _Rows = 2, 3
+_Align = 64
+# Lock of patching resource tracker while attaching to block (see _open)
+_TrackerLock = threading.Lock()
+
+
+def _aligned(size: int) -> int:
+    return (size + _Align - 1) // _Align * _Align
+
+
+class SharedMemoryWriter:
+    """
+    Writer of table data in shared memory block (used in producer process)
+    * columns are fixed-width numpy arrays (numbers, datetime64, fixed-width strings 'U' / 'S')
+    * each write increases sequence number (odd while writing),
+        readers (SharedMemoryBackend) poll it and read changed rows only
+
+    Example:
+        writer = SharedMemoryWriter({'id': 'i8', 'bid': 'f8', 'ask': 'f8'}, capacity=100000)
+        writer.append({'id': [1, 2], 'bid': [1.0, 2.0], 'ask': [1.1, 2.1]})
+        writer.write(0, {'bid': [1.05]})  # update row 0
+        # table.set_data(SharedMemoryBackend(writer.name)) in GUI process
+    """
+
+    # Number of recent writes recorded, readers missing more writes read all rows again
+    LogSize = 256
+
+    def __init__(self, columns: Dict[str, Any], capacity: int, name: Optional[str] = None):
+        """
+        Create shared memory block
+
+        Parameters
+        ----------
+        columns: dictionary of column key - numpy dtype
+        capacity: max number of rows
+        name: name of shared memory block (random name if None)
+        """
+        offset = 0
+        layout = []
+        for key, dtype in columns.items():
+            dtype = np.dtype(dtype)
+            if dtype.hasobject:
+                raise TypeError(f'column \'{key}\' is not fixed-width: {dtype}')
+            layout.append((key, dtype.str, offset))
+            offset += _aligned(dtype.itemsize * capacity)
+        meta = json.dumps({'columns': layout}).encode()
+        data_offset = _aligned((_HeaderSize + 3 * self.LogSize) * 8 + len(meta))
+        self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                               size=max(data_offset + offset, 1))
+        header = np.ndarray(_HeaderSize, dtype=np.int64, buffer=self._shm.buf)
+        header[:] = [_Magic, len(meta), 0, 0, capacity, self.LogSize, 0, 0]
+        meta_offset = (_HeaderSize + 3 * self.LogSize) * 8
+        self._shm.buf[meta_offset:meta_offset + len(meta)] = meta
+        self._header, self._log, self._columns = _attach(self._shm)
+        self._log[:] = -1
+
+    @property
+    def name(self) -> str:
+        """Name of shared memory block"""
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return int(self._header[4])
+
+    def __len__(self) -> int:
+        return int(self._header[_Rows])
+
+    def write(self, start: int, data: Any) -> NoReturn:
+        """
+        Write rows from start (row count is extended if rows are written after last row)
+
+        Parameters
+        ----------
+        start: position of first row
+        data: pandas DataFrame / dict of arrays (column key - values),
+            columns not given are not changed
+        """
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        stop = start + len(frame)
+        if start < 0 or stop > self.capacity:
+            raise IndexError(f'rows {start} - {stop} out of capacity {self.capacity}')
+        for key in frame.columns:
+            if key not in self._columns:
+                raise KeyError(f'invalid column key \'{key}\'')
+        # Sequence number is odd while writing
+        sequence = int(self._header[_Sequence])
+        self._header[_Sequence] = sequence + 1
+        for key in frame.columns:
+            self._columns[key][start:stop] = frame[key].to_numpy(dtype=self._columns[key].dtype)
+        self._commit(sequence + 2, start, stop, max(len(self), stop))
+
+    def append(self, data: Any) -> NoReturn:
+        """Write rows after last row"""
+        self.write(len(self), data)
+
+    def clear(self) -> NoReturn:
+        """Remove all rows (readers reset their data)"""
+        sequence = int(self._header[_Sequence])
+        self._header[_Sequence] = sequence + 1
+        self._commit(sequence + 2, 0, 0, 0)
+
+    def close(self, unlink: bool = True) -> NoReturn:
+        """Close shared memory block (and unlink it, readers can still use attached block)"""
+        self._header = self._log = self._columns = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+    def _commit(self, sequence: int, start: int, stop: int, rows: int) -> NoReturn:
+        # Record write in log and publish new row count / sequence number
+        self._log[(sequence // 2) % len(self._log)] = [sequence, start, stop]
+        self._header[_Rows] = rows
+        self._header[_Sequence] = sequence
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SharedMemoryBackend(Backend):
+    """
+    Backend of table data in shared memory block written by SharedMemoryWriter (in other process)
+    * table polls sequence number of block (see poll), and copies changed rows only,
+        so that rows are never torn by writes in progress
+        (fixed-width string columns are converted to python strings)
+    * data is read-only, get_data returns pandas DataFrame (copy)
+    * block opened by name is closed by close (or when backend is collected)
+    """
+
+    def __init__(self, data: Any):
+        """
+        Parameters
+        ----------
+        data: name of shared memory block, or SharedMemory (not closed by backend)
+        """
+        shm = data if isinstance(data, shared_memory.SharedMemory) else _open(data)
+        super().__init__(shm)
+        self._header, self._log, self._shared = _attach(shm)
+        # Rows copied from block when polled (grown when rows are appended)
+        self._arrays = {key: array[:0].copy() for key, array in self._shared.items()}
+        self._sequence = -1
+        self._length = 0
+        self._finalizer = None if shm is data else weakref.finalize(self, shm.close)
+        self.poll()
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        return isinstance(data, shared_memory.SharedMemory)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._arrays)
+
+    def __len__(self) -> int:
+        # Row count when last polled, so that data is consistent between polls
+        return self._length
+
+    def column(self, key: str) -> pd.Series:
+        return pd.Series(self._arrays[key][:self._length], copy=False)
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({key: array[:self._length][rows] for key, array in self._arrays.items()})
+
+    def copy(self) -> pd.DataFrame:
+        return pd.DataFrame({key: array[:self._length].copy() for key, array in self._arrays.items()})
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        raise TypeError('data in shared memory is read-only')
+
+    def poll(self) -> Optional[Tuple[int, int]]:
+        """
+        Check writes since last poll, copy written rows and update row count
+        * rows are copied only if sequence number is not changed while copying,
+            otherwise they are copied again in next poll
+
+        Returns
+        -------
+        Range (first row, row after last) of rows written since last poll
+            (rows after previous row count are new rows, all rows are written if row count decreases),
+            None if nothing is written (or block is closed)
+        """
+        if self._header is None:
+            return None
+        sequence = int(self._header[_Sequence])
+        if sequence == self._sequence or sequence % 2:
+            # Nothing is written, or writing is not finished
+            return None
+        rows = int(self._header[_Rows])
+        log = self._log.copy()
+        # Written rows are known if all writes since last poll are still in log
+        writes = log[(log[:, 0] > self._sequence) & (log[:, 0] <= sequence)]
+        if self._sequence >= 0 and len(writes) == (sequence - self._sequence) // 2:
+            start, stop = int(writes[:, 1].min()), int(min(writes[:, 2].max(), rows))
+        else:
+            start, stop = 0, rows
+        chunk = self._read(start, stop)
+        if int(self._header[_Sequence]) != sequence:
+            # Block is written while copying, rows may be torn
+            return None
+        for key, array in self._arrays.items():
+            if len(array) < rows:
+                array = self._arrays[key] = np.resize(array, max(rows, 2 * len(array)))
+            array[start:stop] = chunk[key]
+        self._sequence, self._length = sequence, rows
+        return start, stop
+
+    def close(self) -> NoReturn:
+        """Detach from shared memory block (rows polled before are still available)"""
+        self._header = self._log = self._shared = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def _read(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        # Copy rows of all columns from block
+        return {key: array[start:stop].copy() for key, array in self._shared.items()}
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    # Attach to existing block without tracking it (it is unlinked by producer)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError as e:
+        # track is added in Python 3.13, skip registering this block to resource tracker instead
+        # (unregistering would also drop registration of producer sharing the same tracker),
+        # other registrations are passed through, and blocks are attached one at a time
+        _ = e
+        from multiprocessing import resource_tracker
+        with _TrackerLock:
+            register = resource_tracker.register
+
+            def _register(resource: str, rtype: str):
+                if rtype != 'shared_memory' or resource.lstrip('/') != name.lstrip('/'):
+                    register(resource, rtype)
+
+            resource_tracker.register = _register
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+
+def _attach(shm: shared_memory.SharedMemory) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    # Header / log / column arrays over shared memory block
+    header = np.ndarray(_HeaderSize, dtype=np.int64, buffer=shm.buf)
+    if header[0] != _Magic:
+        raise ValueError(f'shared memory \'{shm.name}\' is not written by SharedMemoryWriter')
+    meta_size, capacity, log_size = int(header[1]), int(header[4]), int(header[5])
+    log = np.ndarray((log_size, 3), dtype=np.int64, buffer=shm.buf, offset=_HeaderSize * 8)
+    meta_offset = (_HeaderSize + 3 * log_size) * 8
+    meta = json.loads(bytes(shm.buf[meta_offset:meta_offset + meta_size]).decode())
+    data_offset = _aligned(meta_offset + meta_size)
+    arrays = {key: np.ndarray(capacity, dtype=np.dtype(dtype), buffer=shm.buf,
+                              offset=data_offset + offset)
+              for key, dtype, offset in meta['columns']}
+    return header, log, arrays
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""SQL data backend (DB-API 2.0), with SQLite as reference implementation"""
+
+__all__ = ['SqlDialect', 'SqliteDialect', 'SqlBackend']
+
+import collections
+import copy
+import functools as ft
+import numpy as np
+import pandas as pd
+import re
+import sqlite3
+import threading
+import weakref
+
+from .base import Backend
+from pyqttable.column.filter import FilterType
+from typing import Any, List, Tuple, Optional, NoReturn
+
+
+class SqlDialect:
+    """
+    SQL dialect of database, to translate filters / sorting / paging into SQL
+    * works with DB-API 2.0 drivers whose SQL follows the standard (e.g. PostgreSQL)
+    * placeholder is decided by paramstyle of driver ('?' for qmark, '%s' for format, ...)
+    * override methods for other databases
+    """
+
+    # Column used as unique key of rows if not given (None means key must be given)
+    DefaultKey = None
+
+    def __init__(self, placeholder: str = '%s'):
+        self.placeholder = placeholder
+
+    def prepare(self, connection: Any) -> NoReturn:
+        """Prepare connection before first query (e.g. register functions)"""
+        pass
+
+    def quote(self, name: str) -> str:
+        """Quote identifier"""
+        return '"' + name.replace('"', '""') + '"'
+
+    def as_text(self, column: str) -> str:
+        """Column converted to text"""
+        return f'CAST({column} AS VARCHAR)'
+
+    def order(self, column: str, descending: bool) -> str:
+        """Term of ORDER BY (null values at the end)"""
+        return f'{column} {"DESC" if descending else "ASC"} NULLS LAST'
+
+    def paginate(self, sql: str, limit: int, offset: int = 0) -> str:
+        """Query with limit and offset"""
+        return f'{sql} LIMIT {int(limit)} OFFSET {int(offset)}'
+
+    def equal(self, column: str) -> str:
+        """Null-safe equality to placeholder"""
+        return f'{column} IS NOT DISTINCT FROM {self.placeholder}'
+
+    # ================================ Filters ================================
+
+    def condition(self, column: Any, name: str, value: str) -> Tuple[str, list]:
+        """
+        Translate filter of column into SQL condition
+
+        Parameters
+        ----------
+        column: column config (with filter and type)
+        name: quoted column name
+        value: filter value
+
+        Returns
+        -------
+        SQL condition and its parameters
+        """
+        # Common filters for all kinds of Filters
+        if value == '#blank':
+            return f'({name} IS NULL OR {self.as_text(name)} = {self.placeholder})', ['']
+        elif value == '#non-blank':
+            return f'({name} IS NOT NULL AND {self.as_text(name)} <> {self.placeholder})', ['']
+
+        ph, filter_type = self.placeholder, column.filter.type
+        if filter_type == FilterType.Exact:
+            return f'{self.as_text(name)} = {ph}', [value]
+        elif filter_type == FilterType.Contain:
+            return self.contains(name, value)
+        elif filter_type == FilterType.Regex:
+            return self.matches(name, value)
+        elif filter_type == FilterType.MultipleChoice:
+            choices = value.split(column.filter.Delimiter)
+            return f'{self.as_text(name)} IN ({", ".join([ph] * len(choices))})', choices
+        return self.custom(column, name, value)
+
+    def contains(self, name: str, text: str) -> Tuple[str, list]:
+        """Condition of column containing text"""
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', text) + '%'
+        return f'{self.as_text(name)} LIKE {self.placeholder} ESCAPE \'\\\'', [pattern]
+
+    def matches(self, name: str, pattern: str) -> Tuple[str, list]:
+        """Condition of column matching regex pattern"""
+        raise TypeError('regex filter is not supported by this SQL dialect')
+
+    def custom(self, column: Any, name: str, value: str) -> Tuple[str, list]:
+        """Condition of filters which can not be translated (e.g. expression / customized filter)"""
+        raise TypeError(f'filter type \'{column.filter.type}\' is not supported by this SQL dialect')
+
+    def release(self, params: list) -> NoReturn:
+        """Release parameters of conditions no longer used by any query (e.g. registered filters)"""
+        pass
+
+
+class SqliteDialect(SqlDialect):
+    """
+    SQL dialect of SQLite (sqlite3)
+    * REGEXP is registered as python regex function
+    * filters which can not be translated are evaluated by registered python function
+        (registered while queries using them are alive)
+    * Contain uses instr instead of LIKE, since LIKE of SQLite is case-insensitive
+    """
+
+    DefaultKey = 'rowid'
+
+    def __init__(self):
+        super().__init__('?')
+        # Registered filters, token - [column, filter value, number of queries using it]
+        self._filters = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, connection: sqlite3.Connection) -> NoReturn:
+        connection.create_function('REGEXP', 2, _regexp, deterministic=True)
+        connection.create_function('PYQTTABLE_FILTER', 2, self._custom_filter, deterministic=True)
+
+    def as_text(self, column: str) -> str:
+        return f'CAST({column} AS TEXT)'
+
+    def equal(self, column: str) -> str:
+        return f'{column} IS {self.placeholder}'
+
+    def contains(self, name: str, text: str) -> Tuple[str, list]:
+        return f'instr({self.as_text(name)}, {self.placeholder}) > 0', [text]
+
+    def matches(self, name: str, pattern: str) -> Tuple[str, list]:
+        return f'{name} REGEXP {self.placeholder}', [pattern]
+
+    def custom(self, column: Any, name: str, value: str) -> Tuple[str, list]:
+        # Filter is evaluated on each value by python, identified by token
+        token = f'{id(column)}:{value}'
+        with self._lock:
+            self._filters.setdefault(token, [column, value, 0])[2] += 1
+        return f'PYQTTABLE_FILTER({self.placeholder}, {name})', [token]
+
+    def release(self, params: list) -> NoReturn:
+        with self._lock:
+            for param in params:
+                entry = self._filters.get(param) if isinstance(param, str) else None
+                if entry is not None:
+                    entry[2] -= 1
+                    if entry[2] <= 0:
+                        del self._filters[param]
+
+    def _custom_filter(self, token: str, content: Any) -> bool:
+        column, value, _ = self._filters[token]
+        if column.filter.common_filter(content, value):
+            return True
+        try:
+            return column.filter.filter_each(content, value, column.type.to_string, column.type.to_value)
+        except Exception as e:
+            _ = e
+            return False
+
+
+class SqlBackend(Backend):
+    """
+    Backend of database table, filtering / sorting is pushed down to database
+    * filters become WHERE conditions and sorting becomes ORDER BY (see SqlDialect)
+    * each query gives a new SqlBackend, whose rows are positions in query result
+    * rows are fetched page by page when they are shown, with keyset pagination
+        (next page starts after sorting values of last row of previous page)
+    * distinct values for filter editors are fetched by SELECT DISTINCT with a limit
+    * edited cells are written to database (committed)
+
+    For SQLite, path of database can be given instead of connection,
+        connection is then opened with check_same_thread=False (for background mode)
+    Other DB-API 2.0 drivers can be used with their own SqlDialect
+    """
+
+    # Number of rows in one page
+    PageSize = 1000
+    # Max number of pages kept in memory
+    PageCacheSize = 64
+    # Max number of distinct values for filter editors
+    DistinctLimit = 1000
+
+    lazy = True
+
+    def __init__(self, connection: Any, table: str, key: Optional[str] = None,
+                 dialect: Optional[SqlDialect] = None):
+        """
+        Parameters
+        ----------
+        connection: DB-API 2.0 connection (or path of SQLite database)
+        table: table name
+        key: column of unique key, used for keyset pagination and editing
+            (rowid by default for SQLite)
+        dialect: SqlDialect of database (SqliteDialect for sqlite3 connection)
+        """
+        if isinstance(connection, str):
+            connection = sqlite3.connect(connection, check_same_thread=False)
+        if dialect is None:
+            if not isinstance(connection, sqlite3.Connection):
+                raise ValueError('dialect must be given for non-SQLite connection')
+            dialect = SqliteDialect()
+        key = key or dialect.DefaultKey
+        if key is None:
+            raise ValueError(f'key column must be given for {type(dialect).__name__}')
+        super().__init__(table)
+        self._connection = connection
+        self._dialect = dialect
+        self._table = dialect.quote(table)
+        self._key = key if key == dialect.DefaultKey else dialect.quote(key)
+        self._lock = threading.RLock()
+        with self._lock:
+            dialect.prepare(connection)
+            cursor = self._execute(f'SELECT * FROM {self._table} WHERE 1 = 0')
+            self._columns = [each[0] for each in cursor.description]
+            self._set_query('', [], [])
+
+    @classmethod
+    def accepts(cls, data: Any) -> bool:
+        return isinstance(data, cls)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._columns
+
+    def __len__(self) -> int:
+        return self._count
+
+    def column(self, key: str) -> pd.Series:
+        sql = f'SELECT {self._dialect.quote(key)} FROM {self._table}{self._where}{self._order_by}'
+        with self._lock:
+            values = [each[0] for each in self._execute(sql, self._params).fetchall()]
+        return pd.Series(values, name=key, dtype=object)
+
+    def dtype(self, key: str) -> Any:
+        # Values of each page are kept as python objects, so that pages are converted in same way
+        return np.dtype(object)
+
+    def slice(self, key: str, start: int, stop: int) -> pd.Series:
+        return self._frame(start, stop)[key].reset_index(drop=True)
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return pd.DataFrame(columns=self._columns)
+        start = int(rows.min())
+        frame = self._frame(start, int(rows.max()) + 1).take(rows - start)
+        return frame.reset_index(drop=True).infer_objects()
+
+    def copy(self) -> pd.DataFrame:
+        # Whole table, regardless of filtering / sorting of this query
+        sql = f'SELECT * FROM {self._table} ORDER BY {self._key}'
+        with self._lock:
+            records = self._execute(sql).fetchall()
+        return pd.DataFrame.from_records(records, columns=self._columns)
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        if isinstance(value, np.generic):
+            value = value.item()
+        page, offset = divmod(int(row), self.PageSize)
+        with self._lock:
+            keys, frame = self._page(page)
+            ph = self._dialect.placeholder
+            sql = f'UPDATE {self._table} SET {self._dialect.quote(key)} = {ph} WHERE {self._key} = {ph}'
+            self._execute(sql, [value, keys[offset]])
+            self._connection.commit()
+            frame.iat[offset, self._columns.index(key)] = value
+
+    # ================================ Pushdown ================================
+
+    def query(self, filters: List[Tuple[Any, str]], sort: List[Tuple[str, bool]]) -> 'SqlBackend':
+        """
+        Filter and sort table in database
+
+        Parameters
+        ----------
+        filters: list of (column config, filter value)
+        sort: list of (column key, descending or not) in priority order
+
+        Returns
+        -------
+        New SqlBackend of query result
+        """
+        conditions, params = [], []
+        try:
+            for column, value in filters:
+                if column.key in self._columns:
+                    condition, condition_params = self._dialect.condition(
+                        column, self._dialect.quote(column.key), value)
+                    conditions.append(condition)
+                    params.extend(condition_params)
+        except Exception:
+            self._dialect.release(params)
+            raise
+        where = ' WHERE ' + ' AND '.join(f'({each})' for each in conditions) if conditions else ''
+        order = [(self._dialect.quote(key), descending) for key, descending in sort
+                 if key in self._columns]
+        res = copy.copy(self)
+        # Parameters are released when query result is collected
+        weakref.finalize(res, self._dialect.release, params)
+        with self._lock:
+            res._set_query(where, params, order)
+        return res
+
+    def distinct(self, key: str) -> pd.Series:
+        """Distinct values of column in whole table (at most DistinctLimit values)"""
+        name = self._dialect.quote(key)
+        sql = self._dialect.paginate(
+            f'SELECT DISTINCT {name} FROM {self._table} ORDER BY {name}', self.DistinctLimit)
+        with self._lock:
+            values = [each[0] for each in self._execute(sql).fetchall()]
+        return pd.Series(values, name=key, dtype=object)
+
+    # ================================ Paging ================================
+
+    def _set_query(self, where: str, params: list, order: List[Tuple[str, bool]]) -> NoReturn:
+        # Set conditions / sorting of this query and count its rows
+        # Key column is always the last sorting column, so that order is total (for keyset)
+        self._where, self._params = where, params
+        self._sort = order + [(self._key, False)]
+        self._order_by = ' ORDER BY ' + ', '.join(
+            self._dialect.order(column, descending) for column, descending in self._sort)
+        self._count = self._execute(f'SELECT COUNT(*) FROM {self._table}{where}', params).fetchone()[0]
+        self._pages = collections.OrderedDict()
+        self._bounds = {}  # sorting values of last row of each fetched page
+
+    def _frame(self, start: int, stop: int) -> pd.DataFrame:
+        # Rows from start to stop in query result, combined from pages
+        frames = []
+        with self._lock:
+            for page in range(start // self.PageSize, (max(stop, start + 1) - 1) // self.PageSize + 1):
+                _, frame = self._page(page)
+                frames.append(frame)
+        frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        offset = start - start // self.PageSize * self.PageSize
+        return frame.iloc[offset:offset + stop - start]
+
+    def _page(self, page: int) -> Tuple[list, pd.DataFrame]:
+        # Fetch page of query result (recently used pages are kept)
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+
+        # Start after last row of nearest fetched page before this one, skip pages in between
+        known = [each for each in self._bounds if each < page]
+        previous = max(known) if known else None
+        conditions, params = [], list(self._params)
+        if previous is not None:
+            after, after_params = self._after(self._bounds[previous])
+            conditions.append(after)
+            params.extend(after_params)
+        where = self._where + (' AND ' if self._where else ' WHERE ') + conditions[0] \
+            if conditions else self._where
+        skipped = page if previous is None else page - previous - 1
+        sort_columns = ', '.join(column for column, _ in self._sort)
+        sql = self._dialect.paginate(
+            f'SELECT {sort_columns}, * FROM {self._table}{where}{self._order_by}',
+            self.PageSize, skipped * self.PageSize,
+        )
+        records = self._execute(sql, params).fetchall()
+
+        n = len(self._sort)
+        keys = [each[n - 1] for each in records]
+        frame = pd.DataFrame([each[n:] for each in records], columns=self._columns, dtype=object)
+        if records:
+            self._bounds[page] = list(records[-1][:n])
+        self._pages[page] = (keys, frame)
+        while len(self._pages) > self.PageCacheSize:
+            self._pages.popitem(last=False)
+        return keys, frame
+
+    def _after(self, bound: list) -> Tuple[str, list]:
+        # Condition of rows after given sorting values (null values at the end)
+        terms, params = [], []
+        for i, ((column, descending), value) in enumerate(zip(self._sort, bound)):
+            if value is None:
+                # Nothing is after null value in this column
+                continue
+            term = [self._dialect.equal(each) for each, _ in self._sort[:i]]
+            op = '<' if descending else '>'
+            term.append(f'({column} {op} {self._dialect.placeholder} OR {column} IS NULL)')
+            terms.append('(' + ' AND '.join(term) + ')')
+            params.extend(bound[:i] + [value])
+        return '(' + ' OR '.join(terms) + ')' if terms else '(1 = 0)', params
+
+    def _execute(self, sql: str, params: Optional[list] = None) -> Any:
+        cursor = self._connection.cursor()
+        cursor.execute(sql, params or [])
+        return cursor
+
+
+@ft.lru_cache(maxsize=64)
+def _compile(pattern: str) -> Optional[re.Pattern]:
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        _ = e
+        return None
+
+
+def _regexp(pattern: str, content: Any) -> bool:
+    # REGEXP function of SQLite, searched anywhere in string (invalid pattern matches nothing)
+    compiled = _compile(pattern) if isinstance(pattern, str) else None
+    if compiled is None or content is None:
+        return False
+    return compiled.search(str(content)) is not None
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,687 @@
+# -*- coding: utf-8 -*-
+"""common part of table widgets"""
+
+__all__ = ['TableBase']
+
+import asyncio
+import functools as ft
+import inspect
+import itertools
+import numpy as np
+import pandas as pd
+import time
+
+from . import backend as backend_
+from . import column, delegate, engine, header, utils, worker
+from PyQt5 import QtCore, QtGui, QtWidgets
+from typing import List, Dict, Tuple, Any, AsyncIterable, Iterable, Iterator, Optional, Union, NoReturn
+
+
+class TableBase:
+    """
+    Common part of PyQtTable and PyQtTableView
+    - TableEngine (data, filter values, sorting items and shown rows)
+    - header (filter / sorting) and delegate components
+    - public methods to get / set data
+
+    Subclass should be a QTableWidget / QTableView with errorOccurred / busyChanged /
+        progressChanged / loadingChanged / loadProgress signals,
+        and implement _setup_view / _connect_editing / _display_data
+    """
+
+    # Background color of cells changed by upsert (if flash is set)
+    FlashColor = QtGui.QColor(255, 230, 140)
+
+    # Loaded chunks (see set_data_chunks) are appended when they reach LoadGrowth of loaded rows,
+    #   or LoadInterval ms after first of them arrives, so that data is not copied too many times
+    LoadGrowth = 0.25
+    LoadInterval = 1000
+
+    def __init__(self,
+                 parent: Optional[QtWidgets.QWidget] = None,
+                 column_config: List[Dict[str, Any]] = None,
+                 show_filter: bool = False,
+                 sortable: bool = False,
+                 draggable: bool = False,
+                 checkable: bool = False,
+                 background: bool = False,
+                 live_filter: Optional[int] = None,
+                 filter_executor: Any = None,
+                 max_rows: Optional[int] = None,
+                 max_fps: int = 30,
+                 key_column: Optional[str] = None,
+                 flash: Optional[int] = None,
+                 ):
+        super().__init__(parent)
+        # Column configuration setup
+        self._column_group = column.ColumnGroup(column_config)
+        self._show_filter = show_filter
+        self._sortable = sortable
+        self._draggable = draggable
+        self._checkable = checkable
+        self._background = background
+        self._max_rows = max_rows
+        self._flash = flash
+
+        # Headless core owning data, filter values, sorting items and shown rows
+        self._engine = engine.TableEngine(self._column_group, filter_executor, key_column)
+
+        # Cells changed by upsert and highlighted, (position in table data, column key) - end time
+        self._flash_cells = {}
+        self._flash_timer = QtCore.QTimer(self)
+        self._flash_timer.setSingleShot(True)
+
+        # Setup view (model, columns, etc.) before header is created
+        self._setup_view()
+
+        # Make header/delegate components
+        self._header_manager = header.HeaderManager(self, self._engine,
+                                                    show_filter, sortable, draggable, live_filter)
+        self._delegate_setter = delegate.DelegateSetter(self)
+
+        # Data change lock to distinguish manually change on UI and set_data
+        self._lock = utils.NameLock()
+
+        # Runner of filtering / sorting tasks on worker threads (only used if background),
+        #   and filter values of the latest task (recorded when its result is shown)
+        self._runner = worker.TaskRunner(self)
+        self._task_filter_value = None
+
+        # Runner of chunk loading task, and number of loaded rows / total rows (0 if unknown)
+        self._loader = worker.TaskRunner(self)
+        self._load_progress = (0, 0)
+        self._load_timer = QtCore.QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(self.LoadInterval)
+
+        # Appended / upserted rows are kept pending and applied in one batch per frame
+        self._pending_rows = []  # list of (upsert or not, rows)
+        self._append_timer = QtCore.QTimer(self)
+        self._append_timer.setSingleShot(True)
+        self._append_timer.setInterval(1000 // max_fps)
+
+        # Data source changed in place by others (see Backend.poll) is polled on timer
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.setInterval(1000 // max_fps)
+
+        # Setup UI components
+        self._setup_components()
+
+        # Worker pool of filter executor is released with widget
+        self.destroyed.connect(self._engine.close)
+
+    # ================================ Public Methods ================================
+
+    @utils.widget_error_signal
+    def get_data(self, full: bool = True) -> Any:
+        """
+        Get table data
+
+        Parameters
+        ----------
+        full: if True, all data (including hidden rows) will be returned
+            if False, only currently shown rows will be returned
+
+        Returns
+        -------
+        Full or filtered data (same format as data given to set_data)
+        """
+        return self._engine.get_data(full)
+
+    @utils.widget_error_signal
+    def set_data(self, data: Any, diff_on: Union[str, List[str], None] = None):
+        """
+        Set table data
+
+        Parameters
+        ----------
+        data: pandas DataFrame / pyarrow Table (or RecordBatches) / polars DataFrame / Backend
+            * data is not copied (pyarrow / polars data is accessed through Arrow arrays)
+            * for database table, use backend.SqlBackend (filtering / sorting done by database)
+            * attention: index of DataFrame will be reset
+            * please do not save any information in index
+            * for data changed in place by others (e.g. backend.SharedMemoryBackend),
+                changes are polled (at most max_fps times per second), only changed rows are updated
+        diff_on: key column(s) to align data with current data (e.g. refreshed data)
+            * only new / deleted rows and changed cells are updated (and highlighted if flash is set)
+            * filters, sorting, selection and scroll position are kept
+            * values of key columns should be unique
+        """
+        self._runner.cancel()
+        self._loader.cancel()
+        self._append_timer.stop()
+        self._load_timer.stop()
+        self._pending_rows = []
+        old_rows = self._engine.rows
+        patched = None if diff_on is None else self._engine.patch_data(data, diff_on)
+        if patched is None:
+            self._flash_timer.stop()
+            self._flash_cells.clear()
+            if diff_on is None:
+                self._engine.set_data(data)
+            self._header_manager.update_filter()
+            self._display_data()
+        else:
+            self._display_patched_data(old_rows, *patched)
+        if hasattr(self._engine.backend, 'poll'):
+            self._poll_timer.start()
+        else:
+            self._poll_timer.stop()
+
+    @utils.widget_error_signal
+    def set_data_chunks(self, chunks: Iterable[Any], total: Optional[int] = None):
+        """
+        Set table data from chunks (e.g. pd.read_csv(..., chunksize=...), generator of DB cursor)
+        * first chunk is shown at once, other chunks are read on worker thread and appended
+            (applied filters / sorting are evaluated on new rows only, see append_rows)
+        * loadingChanged / loadProgress signals are emitted, call cancel_loading to stop
+        * chunks are read on worker thread, so DB connection should allow it
+            (e.g. sqlite3.connect(..., check_same_thread=False))
+
+        Parameters
+        ----------
+        chunks: iterable of chunks, each in format of data given to set_data
+        total: total number of rows (for loadProgress) if known
+        """
+        iterator = iter(chunks)
+        first = next(iterator, None)
+        self.set_data(pd.DataFrame() if first is None else first)
+        if self._engine.filter_value or self._engine.sort_value:
+            # Filters / sorting are applied to first chunk, and to other chunks when appended
+            self._engine.refresh()
+            self._display_data()
+        self._load_progress = (len(self._engine.backend), total or 0)
+        self.loadProgress.emit(*self._load_progress)
+        if first is not None:
+            self._loader.submit(ft.partial(_load_chunks, iterator))
+
+    async def set_data_async(self, source: Any, diff_on: Union[str, List[str], None] = None,
+                             executor: Any = None) -> NoReturn:
+        """
+        Set table data in asyncio event loop (e.g. qasync event loop running Qt), without blocking it
+        * source is awaited if it is awaitable (e.g. coroutine fetching data by async DB driver)
+        * async iterable of chunks is loaded by chunks (see set_data_chunks_async)
+        * data is converted (records to DataFrame, Backend of data) in executor
+
+        Parameters
+        ----------
+        source: data (see set_data) or records (list of dicts / dict of lists),
+            awaitable of them, or async iterable of them
+        diff_on: key column(s) to align data with current data (see set_data)
+        executor: executor of conversion (concurrent.futures.Executor),
+            default executor of event loop if None
+        """
+        if hasattr(source, '__aiter__'):
+            await self.set_data_chunks_async(source, executor=executor)
+            return
+        if inspect.isawaitable(source):
+            source = await source
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(executor, _make_backend, source)
+        self.set_data(data, diff_on)
+
+    async def set_data_chunks_async(self, chunks: AsyncIterable[Any], total: Optional[int] = None,
+                                    executor: Any = None) -> NoReturn:
+        """
+        Set table data from async iterable of chunks (e.g. async generator fetching from DB cursor)
+            in asyncio event loop, as set_data_chunks
+        * first chunk is shown at once, other chunks are appended in batches
+        * chunks are converted (also to display strings) and applied filters are evaluated on them
+            in executor, batches are appended to a copy of table data in executor and swapped in,
+            filtering / sorting of first chunk is also done in executor,
+            so that event loop is not blocked, and table is repainted while loading
+        * loadingChanged / loadProgress signals are emitted,
+            call cancel_loading (or cancel awaiting task) to stop, loaded rows are kept
+
+        Parameters
+        ----------
+        chunks: async iterable of chunks, each in format of data given to set_data_async
+        total: total number of rows (for loadProgress) if known
+        executor: executor of conversion / filtering (concurrent.futures.Executor),
+            default executor of event loop if None
+        """
+        loop = asyncio.get_running_loop()
+        iterator = chunks.__aiter__()
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            first = None
+        await self.set_data_async(pd.DataFrame() if first is None else first, executor=executor)
+        if self._engine.filter_value or self._engine.sort_value:
+            await self._refresh_async(executor)
+        self._load_progress = (len(self._engine.backend), total or 0)
+        self.loadProgress.emit(*self._load_progress)
+        if first is None:
+            return
+
+        context = self._loader.start()
+        flushed = loop.time()
+        try:
+            async for chunk in iterator:
+                rows = await loop.run_in_executor(executor, self._engine.prepare, chunk)
+                if context.cancelled:
+                    break
+                # Batch is appended if it is large enough, or chunks arrive slowly
+                if self._add_chunk(rows) >= self.LoadGrowth * len(self._engine.backend) \
+                        or loop.time() - flushed >= self.LoadInterval / 1000:
+                    await self._flush_rows_async(executor)
+                    flushed = loop.time()
+                else:
+                    # Yield to event loop between chunks
+                    await asyncio.sleep(0)
+            if not context.cancelled:
+                await self._flush_rows_async(executor)
+        finally:
+            if not context.cancelled and self._pending_rows:
+                # Loading is stopped by error / cancelling awaiting task, loaded rows are kept
+                self._flush_rows()
+            self._loader.finish(context)
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+
+    def cancel_loading(self) -> NoReturn:
+        """Stop loading chunks (see set_data_chunks / set_data_chunks_async), loaded rows are kept"""
+        self._loader.cancel()
+        self._flush_rows()
+
+    @property
+    def loading(self) -> bool:
+        """Chunks are being loaded or not (see set_data_chunks / set_data_chunks_async)"""
+        return self._loader.busy
+
+    @utils.widget_error_signal
+    def append_rows(self, data: Any):
+        """
+        Append rows to table data (e.g. streaming data)
+        * rows are appended in one batch per frame (at most max_fps times per second)
+        * applied filters are evaluated on new rows only, and new rows are inserted by sorting
+        * if max_rows is set, oldest rows beyond it are dropped
+
+        Parameters
+        ----------
+        data: new rows, in format of data given to set_data,
+            pandas DataFrame or records (list of dicts / dict of lists)
+        """
+        self._pending_rows.append((False, data))
+        if not self._append_timer.isActive():
+            self._append_timer.start()
+
+    @utils.widget_error_signal
+    def upsert(self, data: Any):
+        """
+        Update rows by primary key (key_column is required), rows with new keys are appended
+        * rows are updated in one batch per frame (at most max_fps times per second), as append_rows
+        * only changed cells are repainted (and highlighted for flash ms if flash is set)
+        * shown rows are repositioned only if their sorting values or filter results are changed
+
+        Parameters
+        ----------
+        data: rows, in format of data given to set_data,
+            pandas DataFrame or records (list of dicts / dict of lists)
+        """
+        if self._engine.key_column is None:
+            raise ValueError('key_column is required for upsert')
+        self._pending_rows.append((True, data))
+        if not self._append_timer.isActive():
+            self._append_timer.start()
+
+    @utils.widget_error_signal
+    def set_source(self, path: str):
+        """
+        Set table data from file, data is read lazily
+
+        Parameters
+        ----------
+        path: path of Arrow IPC / Feather file (memory-mapped) or Parquet file
+            * only columns needed for filtering / sorting are read as a whole
+            * for rendering (PyQtTableView), only blocks of shown rows are read
+            * edited cells are kept in memory, file is not changed
+            * get_data returns pyarrow Table
+        """
+        self.set_data(backend_.open_source(path))
+
+    @utils.widget_error_signal
+    def set_sort(self, sort_list: List[Tuple[str, Any]]):
+        """
+        Set sorting columns
+
+        Parameters
+        ----------
+        sort_list: list of (column key, sorting order) in priority order
+            * sorting order should be column.sorter.SortStatus,
+                or string 'ascending' / 'descending' ('asc' / 'desc' for short)
+            * empty list to reset sorting
+        """
+        self._header_manager.set_sort(sort_list)
+
+    @property
+    def engine(self) -> engine.TableEngine:
+        """Headless core of table (data, filter values, sorting items and shown rows)"""
+        return self._engine
+
+    def cancel(self) -> NoReturn:
+        """Cancel running filtering / sorting task (background mode only)"""
+        self._runner.cancel()
+
+    @property
+    def busy(self) -> bool:
+        """Filtering / sorting task is running in background or not"""
+        return self._runner.busy
+
+    def get_filter_data(self) -> Dict[str, str]:
+        """
+        Get table filter data
+
+        Returns
+        -------
+        Dictionary of key - filter string
+        """
+        return self._engine.filter_value \
+            if self._header_manager.show_filter else {}
+
+    # ================================ Private Methods ================================
+
+    def _setup_components(self) -> NoReturn:
+        # Filter actions
+        self._header_manager.filterTriggered.connect(self._filter_action)
+
+        # Sorting actions
+        self._header_manager.sortTriggered.connect(self._sort_action)
+
+        # Chunk loading
+        self._loader.partialResult.connect(self._on_chunk)
+        self._loader.finished.connect(lambda _: self._flush_rows())
+        self._loader.failed.connect(self.errorOccurred)
+        self._loader.busyChanged.connect(self.loadingChanged)
+        self._load_timer.timeout.connect(self._flush_rows)
+
+        # Batched appending / upserting
+        self._append_timer.timeout.connect(self._flush_rows)
+        self._poll_timer.timeout.connect(self._poll_source)
+        self._flash_timer.timeout.connect(self._end_flash)
+
+        # Background task results
+        self._runner.finished.connect(lambda rows: self._set_rows(rows, self._task_filter_value))
+        self._runner.failed.connect(self.errorOccurred)
+        self._runner.busyChanged.connect(self.busyChanged)
+        self._runner.progressChanged.connect(self.progressChanged)
+
+        # Data editing actions
+        self._connect_editing()
+
+        # Customized delegate
+        for j, col in enumerate(self._column_group):
+            item_delegate = self._delegate_setter.get_delegate(col)
+            if item_delegate is not None:
+                self.setItemDelegateForColumn(j, item_delegate)
+
+    def _setup_view(self) -> NoReturn:
+        """Setup view components before header is created"""
+        raise NotImplementedError
+
+    def _connect_editing(self) -> NoReturn:
+        """Connect data editing signal of view to data updating slot"""
+        raise NotImplementedError
+
+    def _display_data(self) -> NoReturn:
+        """Display currently shown data"""
+        raise NotImplementedError
+
+    def _display_appended(self, dropped: int, removed: int, added: int) -> NoReturn:
+        """
+        Display shown data after rows are appended (not sorted)
+            first removed shown rows are gone, and added rows are new ones at the end
+            (if dropped, positions of all rows are shifted)
+        """
+        raise NotImplementedError
+
+    def _display_patched(self, old_rows: np.ndarray, mapping: np.ndarray) -> NoReturn:
+        """
+        Display shown data after data is patched (see set_data with diff_on)
+            old_rows: positions of previously shown rows in old data
+            mapping: position in new data of each row in old data (-1 for deleted rows)
+        Selection and scroll position should be kept
+        """
+        raise NotImplementedError
+
+    def _display_cells(self, cells: Dict[str, np.ndarray]) -> NoReturn:
+        """
+        Display changed cells of shown rows
+            cells: column key - sorted row numbers of changed cells in shown rows
+        """
+        raise NotImplementedError
+
+    @utils.widget_error_signal
+    def _sort_action(self, sort_func: callable):
+        if self._lock.check_lock('display_data'):
+            return
+        if self._engine.pushdown:
+            self._query_action()
+        elif self._background:
+            # Running filter task may be cancelled by this one, so filter again
+            # (filter masks are cached, so it is cheap)
+            filter_func = self._engine.filter_function()
+            self._submit(lambda context: sort_func(filter_func(context), context))
+        else:
+            self._set_rows(sort_func(self._engine.rows))
+
+    @utils.widget_error_signal
+    def _filter_action(self, filter_func: callable):
+        if self._lock.check_lock('display_data'):
+            return
+        if self._engine.pushdown:
+            return self._query_action()
+        sort_func = self._engine.sort_function()
+        if self._background:
+            self._submit(lambda context: sort_func(filter_func(context), context))
+        else:
+            self._set_rows(sort_func(filter_func()), self._engine.filter_value)
+
+    def _query_action(self) -> NoReturn:
+        # Filter / sort in data source, result is shown in order
+        query_func = self._engine.query_function()
+        if self._background:
+            self._submit(query_func)
+        else:
+            self._set_rows(query_func(), self._engine.filter_value)
+
+    def _submit(self, func: callable) -> NoReturn:
+        # Run filtering / sorting task with current filter values in background
+        self._task_filter_value = self._engine.filter_value
+        self._runner.submit(func)
+
+    async def _refresh_async(self, executor: Any) -> NoReturn:
+        # Apply current filter values / sorting items in executor, as a task of runner
+        # (so that appending rows waits for it, and it is cancelled by filtering / sorting on UI)
+        filter_value, sort_value = self._engine.filter_value, self._engine.sort_value
+        if self._engine.pushdown:
+            func = self._engine.query_function()
+        else:
+            filter_func, sort_func = self._engine.filter_function(), self._engine.sort_function()
+
+            def func(task_context: worker.TaskContext) -> np.ndarray:
+                return sort_func(filter_func(task_context), task_context)
+        context = self._runner.start()
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(executor, func, context)
+        except worker.Cancelled:
+            return
+        finally:
+            self._runner.finish(context)
+        # Filter values / sorting items may be applied on UI in the meantime (if not background)
+        if not context.cancelled and self._engine.filter_value == filter_value \
+                and self._engine.sort_value == sort_value:
+            self._set_rows(rows, filter_value)
+
+    @utils.widget_error_signal
+    def _flush_rows(self):
+        # Append / upsert pending rows in one batch
+        # (wait for running filtering / sorting task, whose result is based on current rows)
+        if self._runner.busy:
+            self._append_timer.start()
+            return
+        self._load_timer.stop()
+        pending, self._pending_rows = self._pending_rows, []
+        # Consecutive appended / upserted rows are applied together
+        for upsert, group in itertools.groupby(pending, key=lambda x: x[0]):
+            chunks = [data for _, data in group]
+            if upsert:
+                changed, moved, (dropped, removed, added) = \
+                    self._engine.upsert(chunks, self._max_rows)
+            else:
+                changed, moved = {}, False
+                dropped, removed, added = self._engine.append(chunks, self._max_rows)
+            self._display_changes(changed, moved, dropped, removed, added)
+
+    async def _flush_rows_async(self, executor: Any) -> NoReturn:
+        # Append pending rows to copy of table data in executor (see TableEngine.append_function)
+        # Pending rows are kept until result is applied, if they are flushed / cleared elsewhere
+        #   in the meantime (e.g. cancel_loading / set_data), result is dropped
+        while self._runner.busy:
+            await asyncio.sleep(self._append_timer.interval() / 1000)
+        pending = list(self._pending_rows)
+        if not pending or any(upsert for upsert, _ in pending):
+            self._flush_rows()
+            return
+        func = self._engine.append_function([data for _, data in pending], self._max_rows)
+        result = await asyncio.get_running_loop().run_in_executor(executor, func)
+        current = self._pending_rows[:len(pending)]
+        if len(current) < len(pending) or any(a is not b for a, b in zip(current, pending)):
+            return
+        appended = self._engine.commit_append(result)
+        if appended is None:
+            # Table is changed in the meantime, append pending rows again
+            self._flush_rows()
+            return
+        del self._pending_rows[:len(pending)]
+        self._display_changes({}, False, *appended)
+
+    @utils.widget_error_signal
+    def _on_chunk(self, chunk: Any):
+        # Keep loaded chunk pending, and append pending chunks if they are many enough
+        if self._add_chunk(chunk) >= self.LoadGrowth * len(self._engine.backend):
+            self._flush_rows()
+        elif not self._load_timer.isActive():
+            self._load_timer.start()
+
+    def _add_chunk(self, chunk: Any) -> int:
+        # Keep loaded chunk pending and report progress, return number of pending rows
+        self._pending_rows.append((False, chunk))
+        loaded, total = self._load_progress
+        self._load_progress = (loaded + _row_count(chunk), total)
+        self.loadProgress.emit(*self._load_progress)
+        return sum(_row_count(data) for _, data in self._pending_rows)
+
+    @utils.widget_error_signal
+    def _poll_source(self):
+        # Poll data source changed in place by others, and display changes
+        if self._runner.busy:
+            return
+        result = self._engine.poll()
+        if result is not None:
+            changed, moved, (dropped, removed, added) = result
+            self._display_changes(changed, moved, dropped, removed, added)
+
+    def _display_changes(self, changed: Dict[str, np.ndarray], moved: bool,
+                         dropped: int, removed: int, added: int) -> NoReturn:
+        # Display changed cells / appended rows (all rows are displayed again if rows are moved)
+        if dropped:
+            # Highlighted cells are updated in place (shared with view)
+            flash_cells = {(pos - dropped, key): end
+                           for (pos, key), end in self._flash_cells.items() if pos >= dropped}
+            self._flash_cells.clear()
+            self._flash_cells.update(flash_cells)
+        if self._flash:
+            self._start_flash(changed)
+        if moved or (self._engine.sort_value and (removed or added)):
+            self._display_data()
+        else:
+            if removed or added:
+                self._display_appended(dropped, removed, added)
+            self._update_cells(changed)
+
+    def _display_patched_data(self, old_rows: np.ndarray, mapping: np.ndarray,
+                              changed: Dict[str, np.ndarray]) -> NoReturn:
+        # Display patched data (see set_data with diff_on)
+        # Highlighted cells are moved to new positions (shared with view)
+        flash_cells = {(int(mapping[pos]), key): end
+                       for (pos, key), end in self._flash_cells.items() if mapping[pos] >= 0}
+        self._flash_cells.clear()
+        self._flash_cells.update(flash_cells)
+        if self._flash:
+            self._start_flash(changed)
+        inserted = len(self._engine.backend) > int(np.count_nonzero(mapping >= 0))
+        self._header_manager.update_filter(None if inserted else list(changed))
+        self._display_patched(old_rows, mapping)
+        self._update_cells(changed)
+
+    def _start_flash(self, changed: Dict[str, np.ndarray]) -> NoReturn:
+        # Highlight changed cells until flash time is over
+        end = time.monotonic() + self._flash / 1000
+        for key, positions in changed.items():
+            for pos in positions.tolist():
+                self._flash_cells[(pos, key)] = end
+        if changed and not self._flash_timer.isActive():
+            self._flash_timer.start(self._flash)
+
+    @utils.widget_error_signal
+    def _end_flash(self):
+        # Remove highlight of cells whose flash time is over, and wait for next ones
+        now = time.monotonic()
+        expired = {}
+        for (pos, key), end in list(self._flash_cells.items()):
+            if end <= now:
+                del self._flash_cells[(pos, key)]
+                expired.setdefault(key, []).append(pos)
+        self._update_cells({key: np.array(each) for key, each in expired.items()})
+        if self._flash_cells:
+            wait = min(self._flash_cells.values()) - now
+            self._flash_timer.start(max(int(wait * 1000) + 1, 1))
+
+    def _update_cells(self, changed: Dict[str, np.ndarray]) -> NoReturn:
+        # Repaint changed cells of shown rows
+        cells = {}
+        keys = [col.key for col in self._column_group]
+        for key, positions in changed.items():
+            if key in keys and len(positions):
+                rows = self._engine.row_numbers(positions)
+                cells[key] = np.sort(rows[rows >= 0])
+        if cells:
+            self._display_cells(cells)
+
+    @utils.widget_error_signal
+    def _set_rows(self, rows: Any, filter_value: Optional[Dict[str, str]] = None):
+        # Swap shown rows and display them (always on GUI thread),
+        #   filter values are recorded as applied ones if rows are filtered by them
+        self._engine.set_rows(rows, filter_value)
+        self._display_data()
+
+    def _write_value(self, row: int, column_cfg: column.Column, value: Any) -> NoReturn:
+        # Write edited value of shown row to full data
+        self._engine.set_value(row, column_cfg.key, value)
+
+
+def _load_chunks(iterator: Iterator[Any], context: worker.TaskContext) -> NoReturn:
+    # Read chunks on worker thread, and send them to table
+    for chunk in iterator:
+        context.check()
+        context.send(chunk)
+
+
+def _make_backend(data: Any) -> backend_.Backend:
+    # Make Backend of data, records (list of dicts / dict of lists) are converted to DataFrame
+    if isinstance(data, dict) or \
+            (isinstance(data, list) and all(isinstance(each, dict) for each in data[:1])):
+        data = pd.DataFrame(data)
+    return backend_.make(data)
+
+
+def _row_count(data: Any) -> int:
+    # Number of rows of data (dict of lists is column key - values)
+    if isinstance(data, dict):
+        return len(next(iter(data.values()), []))
+    return len(data)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""cache of data derived from table data"""
+
+__all__ = ['DataCache']
+
+import collections
+import numpy as np
+import pandas as pd
+import threading
+
+from pyqttable import backend as backend_
+from pyqttable.column import ColumnGroup
+from typing import Any, Dict, Optional, NoReturn
+
+
+class DataCache:
+    """
+    Cache of data derived from table data, including:
+    - display strings of each column
+    - ascending order and dense ranks of each column (for sorting)
+    - boolean masks of each column filtered by recently used filter values (LRU)
+
+    Cache is valid for one data version only,
+        version is increased and everything is dropped when data is reset
+        version is also increased when a cell is edited, but only related entries are updated
+    Display strings are shared by rendering, filtering and filter editors
+    For lazy data (e.g. memory-mapped file), strings for rendering are converted block by block (LRU),
+        so that only blocks of shown rows are read until whole column is needed
+
+    Cache can be read from worker threads (background filtering / sorting),
+        entries computed on an outdated data version are not saved
+    """
+
+    # Max number of filter masks kept in cache
+    MaskCacheSize = 32
+    # Number of rows in one block of display strings for lazy data
+    StringBlockSize = 4096
+    # Max number of string blocks kept in cache
+    BlockCacheSize = 256
+
+    def __init__(self, column_group: ColumnGroup):
+        self._columns = {col.key: col for col in column_group}
+        self._backend = backend_.make(pd.DataFrame())
+        self._version = 0
+        self._strings = {}
+        self._orders = {}
+        self._nulls = {}
+        self._ranks = {}
+        self._masks = collections.OrderedDict()
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def backend(self) -> backend_.Backend:
+        """Backend of table data"""
+        return self._backend
+
+    @property
+    def version(self) -> int:
+        """Version of table data"""
+        return self._version
+
+    def reset(self, data: backend_.Backend) -> NoReturn:
+        """Reset table data and drop all cached data"""
+        with self._lock:
+            self._backend = data
+            self._version += 1
+            self._strings.clear()
+            self._orders.clear()
+            self._nulls.clear()
+            self._ranks.clear()
+            self._masks.clear()
+            self._blocks.clear()
+
+    def column(self, key: str, data: Optional[backend_.Backend] = None) -> pd.Series:
+        """
+        Get column data
+
+        Parameters
+        ----------
+        key: column key
+        data: table data to read (current table data if None)
+
+        Returns
+        -------
+        Column of table data (filled with default value if key is missing in data)
+        """
+        data = self._backend if data is None else data
+        if key in data.columns:
+            return data.column(key)
+        return pd.Series([self._columns[key].default] * len(data), dtype=object)
+
+    def strings(self, key: str) -> pd.Series:
+        """
+        Get display strings of column
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        String array of whole column (<NA> for values failed to convert)
+        """
+        res = self._strings.get(key)
+        if res is None:
+            version = self._version
+            strings, _ = self._columns[key].type.to_string_batch(self.column(key))
+            return self._save(self._strings, key, strings, version)
+        return res
+
+    def has_strings(self, key: str) -> bool:
+        """Display strings of whole column are converted already or not"""
+        return key in self._strings
+
+    def value(self, key: str, index: int) -> Any:
+        """
+        Get value of single cell
+
+        Parameters
+        ----------
+        key: column key
+        index: position of row in table data
+
+        Returns
+        -------
+        Value of cell (whole column is not read for lazy data)
+        """
+        if key not in self._backend.columns:
+            return self._columns[key].default
+        if self._backend.lazy:
+            return self._backend.slice(key, index, index + 1).iat[0]
+        return self._backend.column(key).iat[index]
+
+    def text(self, key: str, index: int) -> Any:
+        """
+        Get display string of single cell
+
+        Parameters
+        ----------
+        key: column key
+        index: position of row in table data
+
+        Returns
+        -------
+        Display string of cell (<NA> if failed to convert)
+        """
+        res = self._strings.get(key)
+        if res is not None or not self._backend.lazy or key not in self._backend.columns:
+            return self.strings(key).iat[index]
+        block, offset = divmod(index, self.StringBlockSize)
+        with self._lock:
+            strings = self._blocks.get((key, block))
+            if strings is not None:
+                self._blocks.move_to_end((key, block))
+                return strings.iat[offset]
+        start = block * self.StringBlockSize
+        stop = min(start + self.StringBlockSize, len(self._backend))
+        version = self._version
+        data = self._backend.slice(key, start, stop)
+        strings, _ = self._columns[key].type.to_string_batch(data)
+        with self._lock:
+            if version == self._version:
+                self._blocks[(key, block)] = strings
+                while len(self._blocks) > self.BlockCacheSize:
+                    self._blocks.popitem(last=False)
+        return strings.iat[offset]
+
+    def order(self, key: str) -> np.ndarray:
+        """
+        Get ascending order of column
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        Positions of whole column in ascending order
+        """
+        res = self._orders.get(key)
+        if res is None:
+            version = self._version
+            sorter = self._columns[key].sorter
+            # Use native sorting of backend if column is not sorted in customized way
+            if sorter.sort_lt is None and sorter.sort_key is None \
+                    and key in self._backend.columns:
+                res = self._backend.argsort(key)
+            if res is None:
+                res = sorter.argsort(self.column(key))
+            return self._save(self._orders, key, res, version)
+        return res
+
+    def null_count(self, key: str) -> int:
+        """
+        Get number of null values of column
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        Number of null values at the end of ascending order (see order)
+        """
+        res = self._nulls.get(key)
+        if res is None:
+            version = self._version
+            return self._save(self._nulls, key, self._columns[key].sorter.null_count(self.column(key)),
+                              version)
+        return res
+
+    def ranks(self, key: str) -> np.ndarray:
+        """
+        Get dense ranks of column
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        Dense ranks of whole column (used for multi-column sorting)
+        """
+        res = self._ranks.get(key)
+        if res is None:
+            version = self._version
+            sorter = self._columns[key].sorter
+            return self._save(self._ranks, key, sorter.rank(self.column(key), self.order(key)),
+                              version)
+        return res
+
+    def mask(self, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        """
+        Get cached filter mask of column
+
+        Parameters
+        ----------
+        key: column key
+        filter_value: filter value
+
+        Returns
+        -------
+        Boolean mask of whole column, None if not cached
+        """
+        cache_key = (self._version, key, filter_value)
+        with self._lock:
+            if cache_key in self._masks:
+                self._masks.move_to_end(cache_key)
+                return self._masks[cache_key]
+        return None
+
+    def set_mask(self, key: str, filter_value: Any, mask: np.ndarray,
+                 version: Optional[int] = None) -> NoReturn:
+        """
+        Save filter mask of column to cache (least recently used one is dropped if full)
+
+        Parameters
+        ----------
+        key: column key
+        filter_value: filter value
+        mask: boolean mask of whole column
+        version: data version on which mask is computed (current version by default)
+        """
+        with self._lock:
+            version = self._version if version is None else version
+            if version != self._version:
+                return
+            self._masks[(version, key, filter_value)] = mask
+            self._masks.move_to_end((version, key, filter_value))
+            while len(self._masks) > self.MaskCacheSize:
+                self._masks.popitem(last=False)
+
+    def update(self, index: int, key: str, value: Any) -> NoReturn:
+        """
+        Update cached data for edited cell
+
+        Parameters
+        ----------
+        index: position of row in table data
+        key: column key
+        value: new value of cell
+        """
+        self.update_rows(np.array([index]), key, [value])
+
+    def update_rows(self, rows: np.ndarray, key: str, values: Any) -> NoReturn:
+        """
+        Update cached data for edited cells of one column
+        * display strings are converted for edited cells only
+        * orders / ranks / filter masks of the column are dropped (others are still valid)
+
+        Parameters
+        ----------
+        rows: positions of rows in table data
+        key: column key
+        values: new values of cells (in order of rows)
+        """
+        with self._lock:
+            self._version += 1
+            if key in self._strings or any(each[0] == key for each in self._blocks):
+                strings, _ = self._columns[key].type.to_string_batch(
+                    pd.Series(list(values), dtype=object))
+                strings = strings.to_numpy()
+                if key in self._strings:
+                    self._strings[key].iloc[rows] = strings
+                for index, string in zip(rows, strings):
+                    block = (key, index // self.StringBlockSize)
+                    if block in self._blocks:
+                        self._blocks[block].iat[index % self.StringBlockSize] = string
+            self._orders.pop(key, None)
+            self._nulls.pop(key, None)
+            self._ranks.pop(key, None)
+            # Masks of other columns are not changed, moved to new version
+            self._masks = collections.OrderedDict(
+                ((self._version, each_key, value), mask)
+                for (_, each_key, value), mask in self._masks.items() if each_key != key)
+
+    def append(self, start: int, dropped: int,
+               new_strings: Optional[Dict[str, pd.Series]] = None) -> NoReturn:
+        """
+        Update cached data after rows are appended to table data (and oldest rows are dropped)
+        * display strings are converted for new rows only
+        * orders / ranks / filter masks are dropped (filter masks can be set again)
+
+        Parameters
+        ----------
+        start: position of first new row in table data (after oldest rows are dropped)
+        dropped: number of oldest rows dropped
+        new_strings: display strings of new rows converted already (column key - strings),
+            some first ones may be dropped
+        """
+        with self._lock:
+            strings = self.extended_strings(self._backend, start, dropped, new_strings)
+            self.extend(self._backend, strings)
+
+    def extended_strings(self, data: backend_.Backend, start: int, dropped: int,
+                         new_strings: Optional[Dict[str, pd.Series]] = None) -> Dict[str, pd.Series]:
+        """
+        Get display strings of table data with rows appended, cache is not changed
+            (so that it can be called on worker thread with appended copy of table data)
+
+        Parameters
+        ----------
+        data: table data with rows appended (and oldest rows dropped)
+        start / dropped / new_strings: see append
+
+        Returns
+        -------
+        Display strings of cached columns (column key - strings)
+        """
+        new_strings = new_strings or {}
+        with self._lock:
+            cached = dict(self._strings)
+        count = len(data) - start
+        res = {}
+        for key, strings in cached.items():
+            if key in new_strings and len(new_strings[key]) >= count:
+                new = new_strings[key].iloc[len(new_strings[key]) - count:]
+            else:
+                column = self.column(key, data).iloc[start:].reset_index(drop=True)
+                new, _ = self._columns[key].type.to_string_batch(column)
+            res[key] = pd.concat([strings.iloc[dropped:], new], ignore_index=True)
+        return res
+
+    def extend(self, data: backend_.Backend, strings: Dict[str, pd.Series]) -> NoReturn:
+        """
+        Set table data with rows appended, and its display strings (see extended_strings)
+        * orders / ranks / filter masks are dropped (filter masks can be set again)
+
+        Parameters
+        ----------
+        data: table data with rows appended (and oldest rows dropped)
+        strings: display strings of cached columns
+        """
+        with self._lock:
+            self._backend = data
+            self._version += 1
+            self._strings = dict(strings)
+            self._orders.clear()
+            self._nulls.clear()
+            self._ranks.clear()
+            self._masks.clear()
+            self._blocks.clear()
+
+    def remap(self, data: backend_.Backend, sources: np.ndarray,
+              changed: Dict[str, np.ndarray]) -> NoReturn:
+        """
+        Replace table data with data aligned with current one (e.g. refreshed data)
+        * display strings are moved to new positions, and converted for new / changed cells only
+        * orders / ranks / filter masks are dropped (filter masks can be set again)
+
+        Parameters
+        ----------
+        data: new table data
+        sources: position in current data of each row in new data (-1 for new rows)
+        changed: column key - positions in new data of changed cells
+        """
+        with self._lock:
+            matched = sources >= 0
+            inserted = np.flatnonzero(~matched)
+            strings = {}
+            if len(self._backend) and not self._backend.lazy:
+                for key, old_strings in self._strings.items():
+                    if key not in data.columns:
+                        continue
+                    new_strings = old_strings.take(np.where(matched, sources, 0)).reset_index(drop=True)
+                    rows = np.union1d(inserted, changed.get(key, inserted[:0]))
+                    if len(rows):
+                        values = data.column(key).take(rows).reset_index(drop=True)
+                        converted, _ = self._columns[key].type.to_string_batch(values)
+                        new_strings.iloc[rows] = converted.to_numpy()
+                    strings[key] = new_strings
+            self.reset(data)
+            self._strings.update(strings)
+
+    def _save(self, entries: dict, key: str, value: Any, version: int) -> Any:
+        # Save computed entry only if data is not changed during computation
+        with self._lock:
+            if version == self._version:
+                return entries.setdefault(key, value)
+        return value
+
+
+if __name__ == '__main__':
+    pass
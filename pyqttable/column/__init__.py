@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
 """column configurations"""
 
-__all__ = ['Column', 'ColumnGroup', 'align', 'default', 'sorter', 'type_', 'filter_', 'style']
+__all__ = ['Column', 'ColumnGroup', 'align', 'default', 'expression', 'sorter', 'type_', 'filter_', 'style']
 
 from dataclasses import dataclass
 from typing import Any, Optional, List, Dict
 
-from . import align, default, sorter, type as type_, filter as filter_, style
+from . import align, default, expression, sorter, type as type_, filter as filter_, style
 
 
 @dataclass()
@@ -53,6 +53,7 @@ class Column:
             v_align=self.align.v_align,
             selection=self.selection,
             sort_lt=self.sorter.sort_lt,
+            sort_key=self.sorter.sort_key,
             filter_type=self.filter.type,
             color=self.style.color,
             bg_color=self.style.bg_color,
@@ -76,6 +77,9 @@ class ColumnGroup:
     def __len__(self):
         return len(self._columns)
 
+    def __getitem__(self, index: int) -> Column:
+        return self._columns[index]
+
     def config(self) -> List[Dict[str, Any]]:
         """Create list of config dict from list of Column"""
         return [column.to_cfg() for column in self]
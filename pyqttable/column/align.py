@@ -41,6 +41,11 @@ class Alignment:
             v_align=fetcher.get('v_align'),
         )
 
+    @property
+    def flag(self) -> int:
+        """Alignment flag (used by TextAlignmentRole of item model)"""
+        return int(self._flag)
+
     def apply_to_item(self, item: QtWidgets.QTableWidgetItem):
         """Apply alignment to QTableWidgetItem"""
         item.setTextAlignment(self._flag)
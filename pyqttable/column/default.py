@@ -13,6 +13,7 @@ class _DefaultColumn:
     v_align = 'c'
     selection = None
     sort_lt = None
+    sort_key = None
     filter_type = 'contain'
     color = None
     bg_color = None
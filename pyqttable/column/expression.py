@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""restricted expression for expression filter"""
+
+__all__ = ['Expression']
+
+import ast
+import functools as ft
+import io
+import numpy as np
+import operator
+import pandas as pd
+import tokenize
+
+from typing import Any
+
+
+class Expression:
+    """
+    Filter expression parsed into restricted AST
+
+    Expression is applied on cell value, which can be referred as 'x' explicitly,
+        or omitted at the beginning of each and/or term, e.g.
+    - '> 1' (same as 'x > 1')
+    - '> 1 and < 5'
+    - 'in [1, 2, 3]'
+    - '% 2 == 0'
+    - '.startswith("A") or == "B"'
+
+    Only following syntax is allowed:
+    - comparisons (including in / not in / is None / is not None)
+    - and / or / not
+    - arithmetic on cell value (+ - * / // % **, see MaxExponent)
+    - constants, and list / tuple / set of constants
+    - string methods of cell value (see StringMethods)
+
+    Expression is evaluated on whole column with pandas operations,
+        or with pre-compiled code object on each value if vectorized evaluation fails
+    """
+
+    # Name of cell value in expression
+    ValueName = 'x'
+    # String methods allowed in expression
+    StringMethods = ('startswith', 'endswith', 'lower', 'upper', 'strip')
+    # Max absolute exponent of '**' (exponent should be a number, and powers can not be nested)
+    MaxExponent = 100
+
+    def __init__(self, text: str):
+        self.text = text
+        self.source = _add_value_name(text, self.ValueName)
+        try:
+            self._tree = ast.parse(self.source, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f'invalid expression \'{text}\': {e.msg}')
+        self._check(self._tree)
+        self._code = compile(self._tree, '<expression>', 'eval')
+
+    @classmethod
+    @ft.lru_cache(maxsize=64)
+    def parse(cls, text: str) -> 'Expression':
+        """Parse expression text (parsed expression is cached)"""
+        return cls(text)
+
+    def refines(self, other: 'Expression') -> bool:
+        """
+        Check if this expression is other expression with extra 'and' terms
+            (cells satisfying this expression also satisfy other expression)
+        * parsed trees are compared, so that 'a and b or c' is not regarded as refinement of 'a'
+        """
+        body = self._tree.body
+        if not isinstance(body, ast.BoolOp) or not isinstance(body.op, ast.And):
+            return False
+        terms = {ast.dump(each) for each in body.values}
+        return all(ast.dump(each) in terms for each in _and_terms(other._tree.body))
+
+    # ================================ Evaluation ================================
+
+    def evaluate(self, series: pd.Series) -> np.ndarray:
+        """
+        Evaluate expression on whole column
+
+        Parameters
+        ----------
+        series: cell values
+
+        Returns
+        -------
+        Boolean mask of cells satisfying expression
+        """
+        try:
+            res = self._evaluate(self._tree.body, series.reset_index(drop=True))
+        except Exception as e:
+            _ = e
+            return np.array([self.evaluate_each(each) for each in series.tolist()],
+                            dtype=bool)
+        if isinstance(res, pd.Series):
+            if not pd.api.types.is_bool_dtype(res.dtype):
+                res = res.map(bool, na_action='ignore')
+            return res.to_numpy(dtype=bool, na_value=False)
+        return np.full(len(series), bool(res), dtype=bool)
+
+    def evaluate_each(self, value: Any) -> bool:
+        """Evaluate expression on single cell value with pre-compiled code"""
+        try:
+            res = eval(self._code, {'__builtins__': {}}, {self.ValueName: value})
+        except Exception as e:
+            _ = e
+            return False
+        return bool(res)
+
+    def _evaluate(self, node: ast.AST, series: pd.Series) -> Any:
+        if isinstance(node, ast.Name):
+            return series
+        elif isinstance(node, ast.Constant):
+            return node.value
+        elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return [self._evaluate(each, series) for each in node.elts]
+        elif isinstance(node, ast.BoolOp):
+            values = [self._evaluate(each, series) for each in node.values]
+            op = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+            return ft.reduce(op, [_as_bool(each) for each in values])
+        elif isinstance(node, ast.UnaryOp):
+            operand = self._evaluate(node.operand, series)
+            if isinstance(node.op, ast.Not):
+                return ~_as_bool(operand) if isinstance(operand, pd.Series) else not operand
+            return _unary_op[type(node.op)](operand)
+        elif isinstance(node, ast.BinOp):
+            left = self._evaluate(node.left, series)
+            right = self._evaluate(node.right, series)
+            return _binary_op[type(node.op)](left, right)
+        elif isinstance(node, ast.Compare):
+            left, res = self._evaluate(node.left, series), True
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator, series)
+                res = res & _compare(op, left, right)
+                left = right
+            return res
+        elif isinstance(node, ast.Call):
+            target = self._evaluate(node.func.value, series)
+            args = [self._evaluate(each, series) for each in node.args]
+            return getattr(target.str, node.func.attr)(*args)
+        raise TypeError(f'unsupported node \'{type(node).__name__}\'')
+
+    # ================================ Validation ================================
+
+    def _check(self, tree: ast.AST):
+        # Make sure only allowed syntax is used in expression
+        methods = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                func = node.func
+                if not isinstance(func, ast.Attribute) or func.attr not in self.StringMethods \
+                        or node.keywords:
+                    self._raise('function call is not allowed')
+                methods.add(id(func))
+            elif isinstance(node, ast.Attribute):
+                if id(node) not in methods:
+                    self._raise(f'attribute \'{node.attr}\' is not allowed')
+            elif isinstance(node, ast.Name):
+                if node.id != self.ValueName:
+                    self._raise(f'unknown name \'{node.id}\'')
+            elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+                # Huge powers would never finish evaluating
+                exponent = _number(node.right)
+                if exponent is None or abs(exponent) > self.MaxExponent \
+                        or any(isinstance(each, ast.Pow) for each in ast.walk(node.left)):
+                    self._raise(f'exponent should be a number up to {self.MaxExponent}')
+            elif not isinstance(node, _allowed_nodes):
+                self._raise(f'syntax \'{type(node).__name__}\' is not allowed')
+
+    def _raise(self, msg: str):
+        raise ValueError(f'invalid expression \'{self.text}\': {msg}')
+
+
+def _add_value_name(text: str, name: str) -> str:
+    # Add cell value name to each and/or term starting with operator
+    try:
+        tokens = [tok for tok in tokenize.generate_tokens(io.StringIO(text.strip()).readline)
+                  if tok.type not in _ignored_tokens]
+    except (tokenize.TokenError, IndentationError) as e:
+        raise ValueError(f'invalid expression \'{text}\': {e}')
+
+    terms, depth = [[]], 0
+    for tok in tokens:
+        if tok.string in '([{' and tok.type == tokenize.OP:
+            depth += 1
+        elif tok.string in ')]}' and tok.type == tokenize.OP:
+            depth -= 1
+        if depth == 0 and tok.type == tokenize.NAME and tok.string in ('and', 'or'):
+            terms.append(tok.string)
+            terms.append([])
+        else:
+            terms[-1].append(tok)
+
+    res = []
+    for term in terms:
+        if isinstance(term, str):
+            res.append(term)
+            continue
+        strings = [tok.string for tok in term]
+        if strings and (strings[0] in _implicit_ops or strings[:2] == ['not', 'in']):
+            strings.insert(0, name)
+        res.append(' '.join(strings))
+    return ' '.join(res)
+
+
+def _number(node: ast.AST) -> Any:
+    # Value of number constant (with sign), None if node is not a number
+    sign = 1
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        sign = -1 if isinstance(node.op, ast.USub) else 1
+        node = node.operand
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return sign * node.value
+    return None
+
+
+def _and_terms(node: ast.AST) -> list:
+    # Terms of top-level 'and' (whole expression is the only term otherwise)
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return node.values
+    return [node]
+
+
+def _as_bool(value: Any) -> Any:
+    if isinstance(value, pd.Series):
+        if pd.api.types.is_bool_dtype(value.dtype):
+            return value.fillna(False).astype(bool)
+        return value.map(bool, na_action='ignore').fillna(False).astype(bool)
+    return bool(value)
+
+
+def _compare(op: ast.cmpop, left: Any, right: Any) -> Any:
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if isinstance(left, pd.Series) and isinstance(right, list):
+            res = left.isin(right)
+        elif isinstance(right, pd.Series) and isinstance(left, str):
+            res = right.str.contains(left, regex=False)
+        else:
+            raise TypeError('unsupported membership test')
+        return ~_as_bool(res) if isinstance(op, ast.NotIn) else res
+    elif isinstance(op, (ast.Is, ast.IsNot)):
+        if isinstance(left, pd.Series) and right is None:
+            return left.isna() if isinstance(op, ast.Is) else left.notna()
+        raise TypeError('only \'is None\' / \'is not None\' is supported')
+    return _compare_op[type(op)](left, right)
+
+
+_ignored_tokens = (tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER,
+                   tokenize.INDENT, tokenize.DEDENT, tokenize.COMMENT)
+
+_implicit_ops = ('<', '>', '==', '!=', '<=', '>=', '+', '-', '*', '/', '//', '%', '**',
+                 '.', 'in', 'is')
+
+_allowed_nodes = (
+    ast.Expression, ast.Constant, ast.List, ast.Tuple, ast.Set, ast.Load,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+_unary_op = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_binary_op = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_compare_op = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+if __name__ == '__main__':
+    pass
@@ -5,12 +5,15 @@ __all__ = ['Filter', 'FilterType']
 
 import abc
 import enum
+import functools as ft
+import numpy as np
 import pandas as pd
 import re
 
 from .default import ValueFetcher
+from .expression import Expression
 from .type import basic_column_type
-from pyqttable import const
+from pyqttable import const, utils
 from typing import List, Optional, Any
 
 
@@ -33,6 +36,12 @@ class Filter(metaclass=abc.ABCMeta):
 
     # Placeholder text for filter widget
     PlaceHolderText = ''
+    # Filter can be evaluated on chunks of column in other processes / threads or not
+    # (filter must be picklable, only worthwhile for expensive filters, see FilterExecutor)
+    ParallelSafe = False
+    # Filter reads display strings of column or not
+    # (if not, strings are not passed to filter_mask unless they are converted already)
+    NeedsStrings = True
 
     def __init__(self, filter_type):
         self.type = filter_type
@@ -85,20 +94,112 @@ class Filter(metaclass=abc.ABCMeta):
         -------
         Filtered DataFrame
         """
+        mask = self.filter_mask(df[by], filter_value, to_string, to_value)
+        return df[mask]
+
+    def filter_mask(self, series: pd.Series, filter_value: Any,
+                    to_string: Optional[callable] = None,
+                    to_value: Optional[callable] = None,
+                    strings: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Filter whole column at once
+
+        Parameters
+        ----------
+        series: column data to be filtered
+        filter_value: current value passed by filter widget
+        to_string: function to convert data from original format to string
+        to_value: function to convert data from string to original format
+        strings: display strings of column data (converted by to_string if not given)
+
+        Returns
+        -------
+        Boolean mask of rows remaining in result
+        """
+        return self.common_mask(series, filter_value) | \
+            self.filter_series(series, filter_value, to_string, to_value, strings)
+
+    def common_mask(self, series: pd.Series, filter_value: Any) -> np.ndarray:
+        """Vectorized common_filter"""
+        if type(self).common_filter is not Filter.common_filter:
+            # common_filter is overridden, call it on each value
+            return series.apply(self.common_filter, filter_value=filter_value) \
+                .to_numpy(dtype=bool)
+        if isinstance(filter_value, str):
+            if filter_value == '#blank':
+                return _blank_mask(series)
+            elif filter_value == '#non-blank':
+                return ~_blank_mask(series)
+        return np.zeros(len(series), dtype=bool)
+
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Method to filter whole column
+        * by default, filter_each is called on each value
+        * override it with vectorized operations for better performance
+
+        Parameters
+        ----------
+        series: column data to be filtered
+        filter_value: current value passed by filter widget
+        to_string: function to convert data from original format to string
+        to_value: function to convert data from string to original format
+        strings: display strings of column data (converted by to_string if not given)
+
+        Returns
+        -------
+        Boolean mask of rows remaining in result
+        """
         kwargs = dict(filter_value=filter_value, to_string=to_string, to_value=to_value)
-        return df[df[by].apply(self._filter_apply, **kwargs)].copy()
+        return series.apply(self._filter_apply, **kwargs).to_numpy(dtype=bool)
+
+    def native_mask(self, backend: Any, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        """
+        Filter string column with native kernel of data backend (see pyqttable.backend)
+        * only called when display strings of column are its raw strings
+        * None if not supported, then filter_mask is used instead
+
+        Parameters
+        ----------
+        backend: data backend
+        key: column key
+        filter_value: current value passed by filter widget
+
+        Returns
+        -------
+        Boolean mask of rows remaining in result, or None
+        """
+        return None
 
     def _filter_apply(self, content: Any, filter_value: Any,
                       to_string: Optional[callable],
                       to_value: Optional[callable]) -> bool:
-        if self.common_filter(content, filter_value):
-            return True
         try:
             return self.filter_each(content, filter_value, to_string, to_value)
         except Exception as e:
             _ = e
             return False
 
+    def is_refinement(self, old_value: Any, new_value: Any) -> bool:
+        """
+        Check if new filter value is a refinement of old one
+            (all rows remaining after filtering by new value also remain by old value)
+        If True, only rows remaining last time need to be filtered again
+
+        Parameters
+        ----------
+        old_value: filter value used last time
+        new_value: current filter value
+
+        Returns
+        -------
+        New filter value is a refinement of old one or not
+        """
+        return new_value == old_value
+
     @staticmethod
     def common_filter(content: Any, filter_value: Any) -> bool:
         """Common filter for all kinds of Filters"""
@@ -135,6 +236,18 @@ class ExactFilter(Filter):
 
     PlaceHolderText = 'Exact'
 
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        if isinstance(filter_value, str):
+            return _to_mask(_strings(series, to_string, strings) == filter_value)
+        else:
+            return _to_mask(series == filter_value)
+
+    def native_mask(self, backend: Any, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        return backend.equals(key, filter_value) if _is_plain_text(filter_value) else None
+
     def filter_each(self, content: Any, filter_value: Any,
                     to_string: Optional[callable],
                     to_value: Optional[callable]) -> bool:
@@ -149,6 +262,25 @@ class ContainFilter(Filter):
 
     PlaceHolderText = 'Contain'
 
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        if isinstance(filter_value, str):
+            strings = _strings(series, to_string, strings)
+            return _to_mask(strings.str.contains(filter_value, regex=False))
+        else:
+            return np.zeros(len(series), dtype=bool)
+
+    def native_mask(self, backend: Any, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        return backend.contains(key, filter_value) if _is_plain_text(filter_value) else None
+
+    def is_refinement(self, old_value: Any, new_value: Any) -> bool:
+        # A longer string containing old string
+        if _is_plain_text(old_value) and _is_plain_text(new_value):
+            return old_value in new_value
+        return super().is_refinement(old_value, new_value)
+
     def filter_each(self, content: Any, filter_value: Any,
                     to_string: Optional[callable],
                     to_value: Optional[callable]) -> bool:
@@ -162,38 +294,76 @@ class RegexFilter(Filter):
     """Filtered by regex expression"""
 
     PlaceHolderText = 'Regex'
+    ParallelSafe = True
+
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        pattern = _compile(filter_value) if isinstance(filter_value, str) else None
+        if pattern is None:
+            return np.zeros(len(series), dtype=bool)
+        strings = _strings(series, to_string, strings)
+        return _to_mask(strings.str.contains(pattern))
+
+    def native_mask(self, backend: Any, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        # Invalid pattern is left to filter_mask (no row remains)
+        if _is_plain_text(filter_value) and _compile(filter_value) is not None:
+            return backend.matches(key, filter_value)
+        return None
 
     def filter_each(self, content: Any, filter_value: Any,
                     to_string: Optional[callable],
                     to_value: Optional[callable]) -> bool:
-        if isinstance(filter_value, str):
-            return True if re.findall(filter_value, to_string(content)) else False
+        pattern = _compile(filter_value) if isinstance(filter_value, str) else None
+        if pattern is not None:
+            return pattern.search(to_string(content)) is not None
         else:
             return False
 
 
 class ExpressionFilter(Filter):
-    """Filtered by python expression"""
+    """
+    Filtered by python expression on cell value (see Expression)
+    * original value is used for basic types (int/float/str/bool), otherwise display string
+    """
 
     PlaceHolderText = 'Express'
+    ParallelSafe = True
+    NeedsStrings = False
+
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        if _is_plain_text(filter_value):
+            # Invalid expression raises ValueError here (once for whole column)
+            expression = Expression.parse(filter_value)
+            if pd.api.types.infer_dtype(series, skipna=True) not in _basic_inferred_type:
+                series = _strings(series, to_string, strings)
+            return expression.evaluate(series)
+        else:
+            return np.zeros(len(series), dtype=bool)
 
     def filter_each(self, content: Any, filter_value: Any,
                     to_string: Optional[callable],
                     to_value: Optional[callable]) -> bool:
-        if isinstance(filter_value, str):
+        if _is_plain_text(filter_value):
             if not isinstance(content, tuple(basic_column_type)):
                 content = to_string(content)
-            expression = f'{content!r} {filter_value}'
-            try:
-                res = eval(expression)
-            except Exception as e:
-                _ = e
-                return False
-            else:
-                return False if res is False else True
+            return Expression.parse(filter_value).evaluate_each(content)
         else:
             return False
 
+    def is_refinement(self, old_value: Any, new_value: Any) -> bool:
+        # Old expression with extra 'and' term
+        if _is_plain_text(old_value) and _is_plain_text(new_value):
+            try:
+                return Expression.parse(new_value).refines(Expression.parse(old_value))
+            except ValueError:
+                return False
+        return super().is_refinement(old_value, new_value)
+
 
 class MultipleChoice(Filter):
     """Filter with multiple choices"""
@@ -201,6 +371,27 @@ class MultipleChoice(Filter):
     PlaceHolderText = 'Multi'
     Delimiter = const.DefaultDelimiter
 
+    def filter_series(self, series: pd.Series, filter_value: Any,
+                      to_string: Optional[callable],
+                      to_value: Optional[callable],
+                      strings: Optional[pd.Series] = None) -> np.ndarray:
+        if isinstance(filter_value, str):
+            choices = set(filter_value.split(self.Delimiter))
+            return _to_mask(_strings(series, to_string, strings).isin(choices))
+        else:
+            return np.zeros(len(series), dtype=bool)
+
+    def native_mask(self, backend: Any, key: str, filter_value: Any) -> Optional[np.ndarray]:
+        if _is_plain_text(filter_value):
+            return backend.isin(key, filter_value.split(self.Delimiter))
+        return None
+
+    def is_refinement(self, old_value: Any, new_value: Any) -> bool:
+        # A subset of old choices
+        if _is_plain_text(old_value) and _is_plain_text(new_value):
+            return set(new_value.split(self.Delimiter)) <= set(old_value.split(self.Delimiter))
+        return super().is_refinement(old_value, new_value)
+
     def filter_each(self, content: str, filter_value: str,
                     to_string: Optional[callable],
                     to_value: Optional[callable]) -> bool:
@@ -211,5 +402,46 @@ class MultipleChoice(Filter):
             return False
 
 
+# Inferred types of column regarded as basic types by ExpressionFilter
+_basic_inferred_type = ('string', 'integer', 'floating', 'mixed-integer-float',
+                        'boolean', 'empty')
+
+
+@ft.lru_cache(maxsize=32)
+def _compile(pattern: str) -> Optional[re.Pattern]:
+    # Compile regex pattern only once, None for invalid pattern
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _strings(series: pd.Series, to_string: Optional[callable],
+             strings: Optional[pd.Series]) -> pd.Series:
+    # Use given display strings, or convert column data to strings
+    return strings if strings is not None else utils.to_strings(series, to_string)
+
+
+def _is_plain_text(filter_value: Any) -> bool:
+    # Filter value is string but not special value for common filter
+    return isinstance(filter_value, str) and filter_value not in ('#blank', '#non-blank')
+
+
+def _blank_mask(series: pd.Series) -> np.ndarray:
+    # Vectorized version of `not content` (null values are also regarded as blank)
+    mask = series.isna().to_numpy(dtype=bool)
+    values = series.to_numpy()
+    if values.dtype.kind in 'biufc':
+        return mask | ~values.astype(bool)
+    values = series.to_numpy(dtype=object, copy=True)
+    values[mask] = None
+    return ~values.astype(bool)
+
+
+def _to_mask(result: pd.Series) -> np.ndarray:
+    # Convert (nullable) boolean result to numpy mask, <NA> regarded as False
+    return result.to_numpy(dtype=bool, na_value=False)
+
+
 if __name__ == '__main__':
     pass
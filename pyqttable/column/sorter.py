@@ -4,10 +4,12 @@
 __all__ = ['SortStatus', 'Sorter']
 
 import enum
+import functools as ft
+import numpy as np
 import pandas as pd
 
 from .default import ValueFetcher
-from typing import Optional
+from typing import List, Optional
 
 
 class SortStatus(enum.Enum):
@@ -16,37 +18,112 @@ class SortStatus(enum.Enum):
     Ascending = 1
     Descending = 2
 
+    @classmethod
+    def make(cls, status):
+        """Make SortStatus from SortStatus or string (e.g. 'ascending' / 'asc')"""
+        if isinstance(status, cls):
+            return status
+        if isinstance(status, str):
+            for each in cls:
+                if each.name.lower().startswith(status.lower()):
+                    return each
+        raise ValueError(f'invalid sorting status \'{status}\'')
+
 
-class SortProxy:
+class Sorter:
     """
-    Column sorting proxy to realized custom sorting
-    SortProxy is a wrapper of cell value but use customized sort_lt as __lt__
-    Pandas DataFrame is calling __lt__ for sorting
-    Replacement of __lt__ can lead to customized sorting activities
+    Column sorter to sort data in customized way
+    - sort_key: function taking whole column and returning sorting keys of same shape
+    - sort_lt: DIY __lt__ function taking two values (slower than sort_key)
+    Null values are kept at the end in both ascending and descending order
     """
 
-    def __init__(self, value, lt):
-        self.value = value
-        self._lt = lt
+    # Rank of null values (see rank), after all other ranks in both orders
+    NullRank = np.iinfo(np.int64).max
+
+    def __init__(self, sort_lt: Optional[callable] = None,
+                 sort_key: Optional[callable] = None):
+        self.sort_lt = sort_lt
+        self.sort_key = sort_key
 
     @classmethod
-    def create(cls, value, lt):
-        return cls(value, lt)
+    def make(cls, fetcher: ValueFetcher):
+        """Make Sorter from ValueFetcher"""
+        return cls(
+            sort_lt=fetcher.get('sort_lt'),
+            sort_key=fetcher.get('sort_key'),
+        )
 
-    def __lt__(self, other):
-        return self._lt(self.value, other.value)
+    def argsort(self, series: pd.Series) -> np.ndarray:
+        """
+        Get positions of whole column in ascending order (stable)
 
+        Parameters
+        ----------
+        series: whole column to sort by
 
-class Sorter:
-    """Column sorter to sort data in customized way"""
+        Returns
+        -------
+        Positions of column values in ascending order
+        """
+        if self.sort_lt is not None:
+            values = series.tolist()
+            order = sorted(range(len(values)), key=ft.cmp_to_key(
+                lambda i, j: _compare(self.sort_lt, values[i], values[j])))
+            return np.array(order, dtype=np.intp)
+        if self.sort_key is not None:
+            series = pd.Series(self.sort_key(series))
+        return series.reset_index(drop=True).sort_values(kind='stable').index.to_numpy()
+
+    def null_count(self, series: pd.Series) -> int:
+        """
+        Get number of null values of whole column (at the end of ascending order)
 
-    def __init__(self, sort_lt: Optional[callable]):
-        self.sort_lt = sort_lt
+        Parameters
+        ----------
+        series: whole column to sort by
 
-    @classmethod
-    def make(cls, fetcher: ValueFetcher):
-        """Make Sorter from ValueFetcher"""
-        return cls(fetcher.get('sort_lt'))
+        Returns
+        -------
+        Number of null sorting keys (0 if sorted by sort_lt)
+        """
+        if self.sort_lt is not None:
+            return 0
+        if self.sort_key is not None:
+            series = pd.Series(self.sort_key(series))
+        return int(series.isna().sum())
+
+    def rank(self, series: pd.Series, order: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get dense ranks of whole column (equal values share the same rank)
+
+        Parameters
+        ----------
+        series: whole column to sort by
+        order: positions of column values in ascending order (computed if not given)
+
+        Returns
+        -------
+        Dense ranks of column values, starting from 0 (NullRank for null values)
+        """
+        if order is None:
+            order = self.argsort(series)
+        ranks = np.empty(len(order), dtype=np.int64)
+        if len(order) == 0:
+            return ranks
+        if self.sort_lt is not None:
+            values = series.tolist()
+            steps = [False] + [bool(self.sort_lt(values[i], values[j]))
+                               for i, j in zip(order[:-1], order[1:])]
+            codes = np.cumsum(steps)
+        else:
+            if self.sort_key is not None:
+                series = pd.Series(self.sort_key(series))
+            codes, _ = pd.factorize(series.take(order))
+            # Null values (-1) are put at the end
+            codes[codes < 0] = self.NullRank
+        ranks[order] = codes
+        return ranks
 
     def sort_data(self, df: pd.DataFrame, by: str, status: SortStatus) -> pd.DataFrame:
         """
@@ -62,24 +139,98 @@ class Sorter:
         -------
         Sorted DataFrame
         """
-        df = df.copy()
+        if status == SortStatus.Nothing:
+            return df.sort_index()
+        order = self.argsort(df[by])
+        return df.take(self.sort_rows(order, np.arange(len(df)), status, self.null_count(df[by])))
+
+    @staticmethod
+    def sort_rows(order: np.ndarray, rows: np.ndarray, status: SortStatus,
+                  null_count: int = 0) -> np.ndarray:
+        """
+        Sort rows by ascending order of whole column
 
-        if self.sort_lt is not None:
-            proxy = df[by].apply(SortProxy.create, lt=self.sort_lt)
-            by = f'{by}_sorting_proxy'
-            df[by] = proxy
+        Parameters
+        ----------
+        order: positions of whole column in ascending order (result of argsort)
+        rows: positions of rows to be sorted
+        status: sorting status
+        null_count: number of null values at the end of order (result of null_count)
+
+        Returns
+        -------
+        Sorted positions of rows
+            * descending order is reversed ascending order, except null rows kept at the end
+        """
+        rows = np.asarray(rows)
+        if status == SortStatus.Nothing:
+            return np.sort(rows)
 
+        shown = np.zeros(len(order), dtype=bool)
+        shown[rows] = True
+        res = order[shown[order]]
         if status == SortStatus.Ascending:
-            res = df.sort_values(by=by)
-        elif status == SortStatus.Descending:
-            res = df.sort_values(by=by, ascending=False)
-        else:
-            res = df.sort_index()
+            return res
+        shown_nulls = int(np.count_nonzero(shown[order[len(order) - null_count:]]))
+        return Sorter.reverse(res, shown_nulls)
 
-        if self.sort_lt is not None:
-            res.drop(by, axis=1, inplace=True)
+    @staticmethod
+    def reverse(rows: np.ndarray, null_count: int) -> np.ndarray:
+        """
+        Turn sorted rows into the other order (ascending / descending),
+            null rows at the end are kept in place
+
+        Parameters
+        ----------
+        rows: sorted positions of rows
+        null_count: number of null rows at the end
+
+        Returns
+        -------
+        Positions of rows in the other order
+        """
+        valid = len(rows) - null_count
+        return np.concatenate([rows[:valid][::-1], rows[valid:]])
 
-        return res
+    @staticmethod
+    def lexsort_rows(ranks: List[np.ndarray], status: List[SortStatus],
+                     rows: np.ndarray) -> np.ndarray:
+        """
+        Sort rows by multiple columns
+
+        Parameters
+        ----------
+        ranks: dense ranks of whole columns (result of rank), in priority order
+        status: sorting status of each column
+        rows: positions of rows to be sorted
+
+        Returns
+        -------
+        Sorted positions of rows
+            * rows with same ranks on all columns keep their original order
+        """
+        rows = np.sort(np.asarray(rows))
+        keys = []
+        # numpy.lexsort takes the last key as primary key
+        for rank, each in zip(reversed(ranks), reversed(status)):
+            if each == SortStatus.Ascending:
+                keys.append(rank[rows])
+            elif each == SortStatus.Descending:
+                # Null values are kept at the end
+                rank = rank[rows]
+                keys.append(np.where(rank == Sorter.NullRank, Sorter.NullRank, -rank))
+        if not keys:
+            return rows
+        return rows[np.lexsort(keys)]
+
+
+def _compare(lt: callable, x, y) -> int:
+    # Comparison function made from __lt__
+    if lt(x, y):
+        return -1
+    elif lt(y, x):
+        return 1
+    return 0
 
 
 if __name__ == '__main__':
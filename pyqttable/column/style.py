@@ -4,7 +4,7 @@
 __all__ = ['Style']
 
 from .default import ValueFetcher
-from PyQt5 import QtWidgets, QtGui
+from PyQt5 import QtWidgets, QtGui, QtCore
 from typing import Union, Tuple
 
 
@@ -48,6 +48,14 @@ class Style:
         if self.bg_color:
             item.setBackground(self._bg_color)
 
+    def role_data(self, role: int):
+        """Get style data for ForegroundRole / BackgroundRole of item model"""
+        if role == QtCore.Qt.ForegroundRole and self.color:
+            return self._color
+        if role == QtCore.Qt.BackgroundRole and self.bg_color:
+            return self._bg_color
+        return None
+
     def apply_to_widget(self, widget: QtWidgets.QWidget):
         """Apply style to QWidget"""
         palette = QtGui.QPalette()
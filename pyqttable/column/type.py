@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 """column type"""
 
-__all__ = ['ColumnType', 'DateColumnType', 'TimeColumnType', 'DateTimeColumnType', 'basic_column_type']
+__all__ = ['ColumnType', 'DateColumnType', 'TimeColumnType', 'DateTimeColumnType', 'DtypeColumnType',
+           'basic_column_type']
 
 import abc
 import datetime as dt
+import numpy as np
+import pandas as pd
 
 from .default import ValueFetcher
 
 from pyqttable.editor import *
+from typing import Tuple
 
 basic_column_type = [int, float, str, bool]
 
@@ -17,6 +21,7 @@ class ColumnType(metaclass=abc.ABCMeta):
     """
     Column type
     Methods to convert data between original format and string for display
+        (single value by to_string / to_value, whole column by to_string_batch / to_value_batch)
     Also bind EditorFactory to create data editor in table cell
     """
 
@@ -34,7 +39,7 @@ class ColumnType(metaclass=abc.ABCMeta):
         elif klass in [dt.datetime, dt.date, dt.time]:
             return DateTimeColumnType.from_type(klass)
         else:
-            raise TypeError(f'invalid type \'{klass}\'')
+            return DtypeColumnType.from_type(klass)
 
     def to_string(self, value):
         """try/except wrapper to convert data from original format to string"""
@@ -58,6 +63,48 @@ class ColumnType(metaclass=abc.ABCMeta):
                 f'cannot convert \'{string}\' to value'
             )
 
+    @property
+    def raw_strings(self) -> bool:
+        """
+        Display strings of string column are just its raw strings or not
+            (if True, string column can be filtered by native kernels of data backend)
+        """
+        return False
+
+    def to_string_batch(self, series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        """
+        Convert whole column from original format to string
+        * by default, to_str is called on each value
+        * override it with vectorized operations for better performance
+
+        Parameters
+        ----------
+        series: column data
+
+        Returns
+        -------
+        (string array (<NA> for missing values and values failed to convert),
+            boolean mask of values failed to convert)
+        """
+        return _convert_batch(series, self.to_str, 'string')
+
+    def to_value_batch(self, strings: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        """
+        Convert whole column from string to original format
+        * by default, to_val is called on each string
+        * override it with vectorized operations for better performance
+
+        Parameters
+        ----------
+        strings: column of strings
+
+        Returns
+        -------
+        (values (None for missing strings and strings failed to convert),
+            boolean mask of strings failed to convert)
+        """
+        return _convert_batch(strings, self.to_val, object)
+
     @abc.abstractmethod
     def to_str(self, value):
         """Convert data from original format to string"""
@@ -90,6 +137,41 @@ class BasicColumnType(ColumnType):
     def to_val(self, string):
         return self.cls(string)
 
+    @property
+    def raw_strings(self) -> bool:
+        return self.cls is str and type(self).to_str is BasicColumnType.to_str
+
+    def to_string_batch(self, series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        if type(self).to_str is not BasicColumnType.to_str:
+            # to_str is overridden, call it on each value
+            return super().to_string_batch(series)
+        # Missing values (None / NaN / NaT) are kept missing
+        missing = series.isna().to_numpy(dtype=bool)
+        if _astype_matches_str(series):
+            strings = series.astype('string').mask(missing)
+        else:
+            # astype formats other values differently from str (e.g. datetime64 / bytes / float32)
+            strings = series.map(str, na_action='ignore').astype('string').mask(missing)
+        return strings, np.zeros(len(series), dtype=bool)
+
+    def to_value_batch(self, strings: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        if type(self).to_val is not BasicColumnType.to_val:
+            # to_val is overridden, call it on each string
+            return super().to_value_batch(strings)
+        strings = strings.astype('string')
+        missing = strings.isna().to_numpy(dtype=bool)
+        if self.cls is str:
+            return strings.astype(object).where(~missing, None), np.zeros(len(strings), dtype=bool)
+        elif self.cls is int:
+            valid = strings.str.fullmatch(r'\s*[+-]?\d+\s*').to_numpy(dtype=bool, na_value=False)
+            values = pd.to_numeric(strings.where(valid), errors='coerce').astype('Int64')
+        else:
+            # to_numeric finds valid strings, but may lose precision when parsing them
+            parsed = pd.to_numeric(strings, errors='coerce').notna().to_numpy(dtype=bool)
+            values = strings.where(parsed).astype('Float64')
+            valid = parsed | _nan_mask(strings)
+        return values, ~missing & ~valid
+
 
 class BoolColumnType(BasicColumnType):
     """Special column type for boolean"""
@@ -103,6 +185,23 @@ class BoolColumnType(BasicColumnType):
     def to_val(self, string):
         return string == 'True'
 
+    def to_string_batch(self, series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        if type(self).to_str is not BoolColumnType.to_str:
+            return ColumnType.to_string_batch(self, series)
+        missing = series.isna().to_numpy(dtype=bool)
+        truth = series.to_numpy(dtype=object).astype(bool)
+        strings = np.where(truth, 'True', 'False').astype(object)
+        strings[missing] = None
+        return pd.Series(strings, index=series.index, dtype='string'), \
+            np.zeros(len(series), dtype=bool)
+
+    def to_value_batch(self, strings: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        if type(self).to_val is not BoolColumnType.to_val:
+            return ColumnType.to_value_batch(self, strings)
+        strings = strings.astype('string')
+        values = (strings == 'True').astype(object).where(strings.notna(), None)
+        return values, np.zeros(len(strings), dtype=bool)
+
 
 class DateTimeColumnType(ColumnType):
     """Column type for datetime related variables"""
@@ -129,12 +228,38 @@ class DateTimeColumnType(ColumnType):
             raise TypeError(f'invalid type \'{klass}\'')
 
     def to_str(self, value):
+        # numpy.datetime64 / pandas.Timestamp are also accepted
+        if isinstance(value, np.datetime64):
+            value = pd.Timestamp(value)
+        if self.cls is dt.time and isinstance(value, dt.datetime):
+            value = value.time()
         assert isinstance(value, self.cls), \
             f'invalid {self.cls} given: \'{value}\''
         return value.strftime(self.DtFormat)
 
     def to_val(self, string):
-        return dt.datetime.strptime(self.DtFormat, string)
+        return dt.datetime.strptime(string, self.DtFormat)
+
+    def to_string_batch(self, series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        # Format datetime64 column at once (time is not a datetime64 column)
+        if pd.api.types.is_datetime64_any_dtype(series.dtype) and self.cls is not dt.time \
+                and type(self).to_str is DateTimeColumnType.to_str:
+            strings = series.dt.strftime(self.DtFormat).astype('string')
+            return strings, np.zeros(len(series), dtype=bool)
+        return super().to_string_batch(series)
+
+    def to_value_batch(self, strings: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        if type(self).to_val not in (DateTimeColumnType.to_val, DateColumnType.to_val,
+                                     TimeColumnType.to_val):
+            return super().to_value_batch(strings)
+        strings = strings.astype('string')
+        values = pd.to_datetime(strings, format=self.DtFormat, errors='coerce')
+        error = strings.notna().to_numpy(dtype=bool) & values.isna().to_numpy(dtype=bool)
+        return self._from_datetime(values), error
+
+    def _from_datetime(self, values: pd.Series) -> pd.Series:
+        # Convert datetime64 column to values of column type
+        return values.astype(object).where(values.notna(), None)
 
 
 class DateColumnType(DateTimeColumnType):
@@ -147,6 +272,9 @@ class DateColumnType(DateTimeColumnType):
     def to_val(self, string):
         return super().to_val(string).date()
 
+    def _from_datetime(self, values: pd.Series) -> pd.Series:
+        return values.dt.date.where(values.notna(), None)
+
 
 class TimeColumnType(DateTimeColumnType):
     """Column type for datetime.time"""
@@ -158,6 +286,192 @@ class TimeColumnType(DateTimeColumnType):
     def to_val(self, string):
         return super().to_val(string).time()
 
+    def _from_datetime(self, values: pd.Series) -> pd.Series:
+        return values.dt.time.where(values.notna(), None)
+
+
+class DtypeColumnType(ColumnType):
+    """
+    Column type bound to numpy / pandas dtype of column data
+        e.g. 'int64' / 'Int64' / np.float32 / 'datetime64[ns]' / 'category' / 'string[pyarrow]'
+    Whole column is converted on underlying arrays according to its dtype,
+        (categories of categorical column are converted only once)
+
+    'auto' column type is bound to dtype of column data when data is set
+    """
+
+    # Datetime format to display in table cell
+    DtFormat = DateTimeColumnType.DtFormat
+
+    def __init__(self, dtype=None, auto: bool = False):
+        self.dtype = dtype
+        self.auto = auto or dtype is None
+        if dtype is not None and pd.api.types.is_datetime64_any_dtype(dtype):
+            self.EditorFactory = DateTimeColumnType.EditorFactory
+        elif dtype is not None and pd.api.types.is_bool_dtype(dtype):
+            self.EditorFactory = BoolColumnType.EditorFactory
+
+    @classmethod
+    def from_type(cls, klass):
+        if isinstance(klass, str) and klass == 'auto':
+            return cls()
+        try:
+            return cls(pd.api.types.pandas_dtype(klass))
+        except (TypeError, ImportError) as e:
+            raise TypeError(f'invalid type \'{klass}\': {e}')
+
+    def bind(self, dtype) -> 'DtypeColumnType':
+        """Column type bound to given dtype (for 'auto' column type)"""
+        return type(self)(dtype, auto=self.auto)
+
+    @property
+    def raw_strings(self) -> bool:
+        return self.dtype is None or _is_string_dtype(self.dtype)
+
+    def to_str(self, value):
+        if isinstance(value, (dt.datetime, np.datetime64)):
+            return pd.Timestamp(value).strftime(self.DtFormat)
+        return str(value)
+
+    def to_val(self, string):
+        values, error = self.to_value_batch(pd.Series([string], dtype='string'))
+        if error[0]:
+            raise ValueError(f'invalid {self.dtype} given: \'{string}\'')
+        return values.iat[0]
+
+    def to_string_batch(self, series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Convert categories only, then take them by codes
+            categories, error = self.to_string_batch(pd.Series(dtype.categories))
+            codes = series.cat.codes.to_numpy()
+            strings = categories.to_numpy(dtype=object, na_value=None)[codes]
+            strings[codes < 0] = None
+            return pd.Series(strings, index=series.index, dtype='string'), \
+                np.append(error, False)[codes]
+        elif _is_string_dtype(dtype):
+            return series.astype('string'), np.zeros(len(series), dtype=bool)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            strings = series.dt.strftime(self.DtFormat).astype('string')
+            return strings, np.zeros(len(series), dtype=bool)
+
+        missing = series.isna().to_numpy(dtype=bool)
+        if pd.api.types.is_bool_dtype(dtype):
+            values = series.to_numpy(dtype=bool, na_value=False)
+            strings = np.where(values, 'True', 'False').astype(object)
+        elif dtype.kind in 'iu':
+            values = series.to_numpy(dtype=dtype.numpy_dtype if hasattr(dtype, 'numpy_dtype')
+                                     else dtype, na_value=0)
+            strings = np.array(list(map(str, values.tolist())), dtype=object)
+        elif dtype.kind == 'f' and dtype.itemsize < 8:
+            # Shortest representation of float32 / float16 by numpy
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan) \
+                .astype(getattr(dtype, 'numpy_dtype', dtype))
+            strings = values.astype(str).astype(object)
+        elif dtype.kind == 'f':
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            strings = np.array(list(map(str, values.tolist())), dtype=object)
+        else:
+            return super().to_string_batch(series)
+        strings[missing] = None
+        return pd.Series(strings, index=series.index, dtype='string'), \
+            np.zeros(len(series), dtype=bool)
+
+    def to_value_batch(self, strings: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        strings = strings.astype('string')
+        missing = strings.isna().to_numpy(dtype=bool)
+        dtype = self.dtype
+        if dtype is None or _is_string_dtype(dtype):
+            values = strings if dtype is None else strings.astype(dtype)
+            return values, np.zeros(len(strings), dtype=bool)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            if dtype.categories is None:
+                return strings.astype(str).astype(dtype), np.zeros(len(strings), dtype=bool)
+            # Map strings back to categories by their display strings
+            categories, _ = self.to_string_batch(pd.Series(dtype.categories))
+            codes = pd.Index(categories).get_indexer(strings)
+            values = pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=strings.index)
+            return values, ~missing & (codes < 0)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            values = pd.to_datetime(strings, format=self.DtFormat, errors='coerce')
+            if getattr(dtype, 'tz', None) is not None:
+                values = values.dt.tz_localize(dtype.tz)
+            valid = values.notna().to_numpy(dtype=bool)
+            return values.astype(dtype), ~missing & ~valid
+        elif pd.api.types.is_bool_dtype(dtype):
+            values = strings == 'True'
+            valid = strings.isin(['True', 'False']).to_numpy(dtype=bool, na_value=False)
+        elif dtype.kind in 'iu':
+            valid = strings.str.fullmatch(r'\s*[+-]?\d+\s*').to_numpy(dtype=bool, na_value=False)
+            values = pd.to_numeric(strings.where(valid), errors='coerce')
+        elif dtype.kind == 'f':
+            parsed = pd.to_numeric(strings, errors='coerce').notna().to_numpy(dtype=bool)
+            values = strings.where(parsed).astype('Float64')
+            valid = parsed | _nan_mask(strings)
+        elif dtype.kind == 'm':
+            values = pd.to_timedelta(strings, errors='coerce')
+            valid = values.notna().to_numpy(dtype=bool)
+        else:
+            # Other dtypes (object / period / ...) are converted by pandas directly
+            try:
+                return strings.astype(dtype), np.zeros(len(strings), dtype=bool)
+            except (TypeError, ValueError) as e:
+                _ = e
+                return strings.astype(object).where(~missing, None), ~missing
+
+        error = ~missing & ~valid
+        if (missing | error).any() and not _nullable(dtype):
+            # Missing values cannot be kept in numpy dtype
+            return values.astype(object).where(~(missing | error), None), error
+        return values.astype(dtype), error
+
+
+def _astype_matches_str(series: pd.Series) -> bool:
+    # Values of column are converted by astype('string') same as str or not
+    dtype = series.dtype
+    if dtype == object:
+        return pd.api.types.infer_dtype(series, skipna=True) in ('string', 'integer', 'empty')
+    return _is_string_dtype(dtype) or dtype.kind in 'iub' or dtype == np.float64
+
+
+def _convert_batch(series: pd.Series, func: callable, dtype) -> Tuple[pd.Series, np.ndarray]:
+    # Call conversion function on each non-missing value
+    # Values are converted at once if possible, otherwise one by one to find failed ones
+    missing = series.isna().to_numpy(dtype=bool)
+    values = series.to_numpy(dtype=object)
+    res = np.full(len(values), None, dtype=object)
+    error = np.zeros(len(values), dtype=bool)
+    index = np.flatnonzero(~missing)
+    try:
+        res[index] = np.fromiter(map(func, values[index]), dtype=object, count=len(index))
+    except Exception as e:
+        _ = e
+        for i in index:
+            try:
+                res[i] = func(values[i])
+            except Exception as e:
+                _ = e
+                error[i] = True
+    return pd.Series(res, index=series.index, dtype=dtype), error
+
+
+def _is_string_dtype(dtype) -> bool:
+    # pandas string dtype, or string type of Arrow-backed column
+    if isinstance(dtype, pd.StringDtype):
+        return True
+    return str(getattr(dtype, 'pyarrow_dtype', '')) in ('string', 'large_string')
+
+
+def _nullable(dtype) -> bool:
+    # dtype can hold missing values or not
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype) or dtype.kind in 'fcmMO'
+
+
+def _nan_mask(strings: pd.Series) -> np.ndarray:
+    # Strings representing nan, which are valid float values
+    return strings.str.strip().str.lower().isin(['nan', '+nan', '-nan']) \
+        .to_numpy(dtype=bool, na_value=False)
+
 
 if __name__ == '__main__':
     pass
@@ -23,6 +23,8 @@ class EditorFactory(metaclass=abc.ABCMeta):
     For special usages, following methods can be implemented:
     - reset_editor: reset editor model for some reason
         * update filter model according to table data
+    - change_signal: get signal of editor widget's changing event
+        * used by live filtering (filter while typing)
     """
 
     # editor widget class
@@ -120,6 +122,23 @@ class EditorFactory(metaclass=abc.ABCMeta):
     #     """
     #     ...
 
+    # def change_signal(self, editor: klass) -> QtCore.pyqtSignal:
+    #     """
+    #     Get signal of editor widget's changing event (e.g. each keystroke)
+    #     * Optional method
+    #
+    #     Parameters
+    #     ----------
+    #     editor: editor widget created by this factory
+    #
+    #     Returns
+    #     -------
+    #     editor changing signal:
+    #     - textChanged for QLineEdit
+    #     - ...
+    #     """
+    #     ...
+
 
 if __name__ == '__main__':
     pass
@@ -27,6 +27,9 @@ class LineEditorFactory(EditorFactory):
     def done_signal(self, editor: klass) -> QtCore.pyqtSignal:
         return editor.editingFinished
 
+    def change_signal(self, editor: klass) -> QtCore.pyqtSignal:
+        return editor.textChanged
+
     @staticmethod
     def set_place_holder(editor: klass, text: str) -> NoReturn:
         editor.setPlaceholderText(text)
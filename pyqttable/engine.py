@@ -0,0 +1,1021 @@
+# -*- coding: utf-8 -*-
+"""headless table engine"""
+
+__all__ = ['TableEngine', 'PreparedRows']
+
+import functools as ft
+import numpy as np
+import pandas as pd
+
+from pyqttable import backend as backend_
+from pyqttable.cache import DataCache
+from pyqttable.column import ColumnGroup, Column, filter_, sorter, type_
+from pyqttable.executor import FilterExecutor
+from typing import List, Dict, Tuple, Any, Optional, Union, NoReturn
+
+
+class PreparedRows:
+    """
+    New rows prepared for appending (see TableEngine.prepare)
+    - rows converted to format of table data
+    - display strings of new rows, column key - strings
+    - filter masks of new rows, column key - (filter value, mask)
+    """
+
+    def __init__(self, data: Any, strings: Dict[str, pd.Series],
+                 masks: Dict[str, Tuple[str, np.ndarray]]):
+        self.data = data
+        self.strings = strings
+        self.masks = masks
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class TableEngine:
+    """
+    Headless core of table, without any Qt widget (no QApplication needed), including:
+    - table data (Backend) and column configuration
+    - filter values, sorting items and positions of shown rows
+    - cache of display strings / orders / filter masks
+
+    PyQtTable / PyQtTableView are views over an engine:
+        filter editors and header clicks only set filter values / sorting items to it,
+        and shown rows are read from it
+    Engine can also be used alone, e.g. to compute views of data in server / tests
+
+    Filtering / sorting is not applied when filter values / sorting items are set,
+        call refresh to apply them, or get filter / sorting functions to run elsewhere
+        (e.g. on worker thread) and set their result by set_rows
+    """
+
+    def __init__(self, column_config: Union[List[Dict[str, Any]], ColumnGroup],
+                 filter_executor: Any = None, key_column: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        column_config: list of column config dict (or ColumnGroup)
+        filter_executor: executor to evaluate expensive filters in parallel (see FilterExecutor)
+        key_column: key of column identifying rows (primary key) for upsert
+        """
+        self._column_group = column_config if isinstance(column_config, ColumnGroup) \
+            else ColumnGroup(column_config)
+        self._columns = {col.key: col for col in self._column_group}
+        self._executor = FilterExecutor.make(filter_executor)
+        # Executor made by engine (from 'process' / 'thread') is shut down by close
+        self._own_executor = self._executor is not filter_executor
+
+        # Empty data (shown rows are kept as positions in full data)
+        self._backend = backend_.make(pd.DataFrame())
+        self._rows = np.arange(0)
+
+        # Hash index of primary key - position of row in table data (built when needed)
+        self._key_column = key_column
+        self._index = None
+
+        # Cache of display strings, shared by rendering / filtering / filter editors
+        self._cache = DataCache(self._column_group)
+
+        self._filter_value = {}
+        self._last_filter_value = {}  # filter values of last filtering
+        self._sort_value = []  # sorting items in priority order
+
+    # ================================ Properties ================================
+
+    @property
+    def column_group(self) -> ColumnGroup:
+        return self._column_group
+
+    @property
+    def backend(self) -> backend_.Backend:
+        """Backend of table data"""
+        return self._backend
+
+    @property
+    def key_column(self) -> Optional[str]:
+        """Key of column identifying rows (primary key)"""
+        return self._key_column
+
+    @property
+    def cache(self) -> DataCache:
+        return self._cache
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Positions of shown rows in table data"""
+        return self._rows
+
+    @property
+    def filter_value(self) -> Dict[str, str]:
+        """Current filter values (column key - filter value)"""
+        return dict(self._filter_value)
+
+    @property
+    def sort_value(self) -> List[Tuple[str, sorter.SortStatus]]:
+        """Current sorting items (column key, sorting status) in priority order"""
+        return list(self._sort_value)
+
+    @property
+    def filter_changed(self) -> bool:
+        """Filter values are changed since last filtering or not"""
+        return self._filter_value != self._last_filter_value
+
+    @property
+    def pushdown(self) -> bool:
+        """Filtering / sorting is done by data source itself or not (see Backend.query)"""
+        return hasattr(self._backend, 'query')
+
+    # ================================ Data ================================
+
+    def set_data(self, data: Any) -> NoReturn:
+        """
+        Set table data, all rows are shown (filter values / sorting items are kept but not applied)
+
+        Parameters
+        ----------
+        data: pandas DataFrame / pyarrow Table (or RecordBatches) / polars DataFrame / Backend
+        """
+        self._backend = backend_.make(data)
+        self._rows = np.arange(len(self._backend))
+        self._bind_dtypes()
+        self._cache.reset(self._backend)
+        self._index = None
+        # All rows are shown after data is reset, so next filtering should not be skipped
+        self._last_filter_value = {}
+
+    def patch_data(self, data: Any, keys: Union[str, List[str]]
+                   ) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """
+        Set table data which is aligned with current data by key columns (e.g. refreshed data),
+            only new / deleted rows and changed cells are applied to cache and shown rows
+        * filter values / sorting items are kept and applied
+        * if current data can not be aligned (e.g. no data yet), data is reset as set_data
+
+        Parameters
+        ----------
+        data: pandas DataFrame / pyarrow Table (or RecordBatches) / polars DataFrame / Backend
+        keys: key column(s) identifying rows, values of key columns should be unique
+
+        Returns
+        -------
+        Position in new data of each row in current data (-1 for deleted rows),
+            and changed cells (column key - positions of changed rows in new data),
+            None if data is reset
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        new = backend_.make(data)
+        old = self._backend
+        if self.pushdown or hasattr(new, 'query') \
+                or not all(key in old.columns and key in new.columns for key in keys):
+            self.set_data(new)
+            return None
+
+        # Align rows by keys
+        old_index, new_index = _key_values(old, keys), _key_values(new, keys)
+        if not old_index.is_unique or not new_index.is_unique:
+            raise ValueError(f'values of key columns {keys} are not unique')
+        sources = old_index.get_indexer(new_index)
+        matched = np.flatnonzero(sources >= 0)
+        mapping = np.full(len(old), -1, dtype=np.intp)
+        mapping[sources[matched]] = matched
+
+        # Compare cells of aligned rows (columns not in both data are regarded as changed)
+        changed = {}
+        for key in new.columns:
+            if key in keys:
+                continue
+            if key in old.columns:
+                diff = _changed_mask(old.column(key).take(sources[matched]).reset_index(drop=True),
+                                     new.column(key).take(matched).reset_index(drop=True))
+                if diff.any():
+                    changed[key] = matched[diff]
+            elif len(matched):
+                changed[key] = matched
+        inserted = np.flatnonzero(sources < 0)
+
+        # Keep cached masks of applied filters, moved to new positions
+        masks = {}
+        for key, value in self._last_filter_value.items():
+            mask = self._cache.mask(key, value)
+            if mask is not None and key in new.columns:
+                masks[key] = np.zeros(len(new), dtype=bool)
+                masks[key][matched] = mask[sources[matched]]
+
+        self._backend = new
+        self._index = None
+        self._bind_dtypes()
+        self._cache.remap(new, sources, changed)
+        for key, mask in masks.items():
+            self._cache.set_mask(key, self._last_filter_value[key], mask)
+
+        # Rows still shown are moved to new positions,
+        #   new rows / rows whose filter results or sorting values are changed are inserted again
+        rows = mapping[self._rows]
+        rows = rows[rows >= 0]
+        sort_keys = [key for key, _ in self._sort_value]
+        dirty = set(changed) if not len(inserted) else set(new.columns)
+        candidates = [inserted] + [changed[key] for key in list(self._last_filter_value) + sort_keys
+                                   if key in changed]
+        candidates = np.unique(np.concatenate(candidates))
+        keep = self._filter_rows(candidates, dirty)
+        affected = ~np.isin(candidates, rows) | ~keep | np.isin(candidates, inserted)
+        for key in sort_keys:
+            if key in changed:
+                affected |= np.isin(candidates, changed[key])
+        if self._sort_value and np.any(np.diff(matched[np.argsort(sources[matched])]) < 0):
+            # Order of equal values (by positions in data) may be changed, so sort again
+            self._rows = self._do_sort(self._sort_value,
+                                       np.union1d(rows[~np.isin(rows, candidates)],
+                                                  candidates[keep]))
+        else:
+            self._rows = self._reinsert(rows, candidates[affected], candidates[affected & keep])
+        return mapping, changed
+
+    def get_data(self, full: bool = True) -> Any:
+        """
+        Get table data
+
+        Parameters
+        ----------
+        full: if True, all data (including hidden rows) will be returned
+            if False, only currently shown rows will be returned
+
+        Returns
+        -------
+        Full or filtered data (same format as data given to set_data)
+        """
+        return self._backend.copy() if full else self._backend.take(self._rows)
+
+    def set_rows(self, rows: Any, filter_value: Optional[Dict[str, str]] = None) -> NoReturn:
+        """
+        Set shown rows
+
+        Parameters
+        ----------
+        rows: positions of shown rows in table data (result of filter / sorting function),
+            or Backend (result of query function), all of whose rows are shown in order
+        filter_value: filter values rows are filtered by (filter_value when filter / query function
+            is made), recorded as filter values of last filtering (None if rows are not filtered again)
+        """
+        if filter_value is not None:
+            self._last_filter_value = dict(filter_value)
+        if isinstance(rows, backend_.Backend):
+            self._backend = rows
+            self._cache.reset(rows)
+            self._index = None
+            rows = np.arange(len(rows))
+        self._rows = rows
+
+    def set_value(self, row: int, key: str, value: Any) -> NoReturn:
+        """
+        Set value of cell
+
+        Parameters
+        ----------
+        row: position of row in shown rows
+        key: column key
+        value: new value of cell
+        """
+        ori_index = self._rows[row]
+        self._backend.set_value(ori_index, key, value)
+        self._cache.update(ori_index, key, value)
+        if key == self._key_column:
+            self._index = None
+
+    def append(self, chunks: List[Any], max_rows: Optional[int] = None) -> Tuple[int, int, int]:
+        """
+        Append rows to table data
+        * applied filters are evaluated on new rows only, and new rows are inserted by sorting
+        * filter editors are not reloaded
+
+        Parameters
+        ----------
+        chunks: list of new rows, each in format of original data,
+            pandas DataFrame or records (list of dicts / dict of lists), or PreparedRows (see prepare)
+        max_rows: max number of rows kept in table data, oldest rows are dropped (None means no limit)
+
+        Returns
+        -------
+        Number of oldest rows dropped from table data, shown rows removed and shown rows added
+            * if not sorted, removed shown rows are the first ones, and added rows are the last ones
+        """
+        strings, masks = _merge_prepared(chunks)
+        old_len = len(self._backend)
+        self._backend.append([each.data if isinstance(each, PreparedRows) else each
+                              for each in chunks])
+        total = len(self._backend)
+        dropped = max(total - max_rows, 0) if max_rows is not None else 0
+        if dropped:
+            self._backend.drop(dropped)
+        return self._appended(old_len, total, dropped, strings, masks)
+
+    def prepare(self, data: Any) -> PreparedRows:
+        """
+        Prepare new rows for appending, without changing table data
+        * can be called on worker thread / executor, while table data is used elsewhere
+        * rows are converted to format of table data (see Backend.convert),
+            and values are converted to display strings
+        * applied filters are evaluated on new rows,
+            append evaluates them again only if filter values are changed in the meantime
+
+        Parameters
+        ----------
+        data: new rows, in format of original data,
+            pandas DataFrame or records (list of dicts / dict of lists)
+
+        Returns
+        -------
+        PreparedRows to append
+        """
+        data = self._backend.convert(data)
+        try:
+            rows = backend_.make(data)
+        except TypeError as e:
+            # Rows are not converted by backend (e.g. records), they are converted when appended
+            _ = e
+            return PreparedRows(data, {}, {})
+        series, strings = {}, {}
+        for key, column in self._columns.items():
+            series[key] = rows.column(key) if key in rows.columns \
+                else pd.Series([column.default] * len(rows), dtype=object)
+            strings[key], _ = column.type.to_string_batch(series[key])
+        masks = {key: (value, _new_mask(self._columns[key], series[key], value, strings[key]))
+                 for key, value in self._last_filter_value.items()}
+        return PreparedRows(data, strings, masks)
+
+    def append_function(self, chunks: List[Any], max_rows: Optional[int] = None) -> callable:
+        """
+        Make function appending rows to a copy of table data (see append)
+        Table data, shown rows, filter values and sorting items are captured here,
+            so that append function can be called on worker thread,
+            and its result is applied by commit_append
+
+        Parameters
+        ----------
+        chunks: list of new rows (see append)
+        max_rows: max number of rows kept in table data (see append)
+
+        Returns
+        -------
+        Append function (taking optional TaskContext) which returns result for commit_append
+        """
+        filter_value = dict(self._last_filter_value)
+        masks = {key: self._cache.mask(key, value) for key, value in filter_value.items()}
+        state = (self._backend, self._cache.version, self._rows, filter_value, list(self._sort_value))
+        return ft.partial(self._do_append, state, masks, chunks, max_rows)
+
+    def commit_append(self, result: Tuple) -> Optional[Tuple[int, int, int]]:
+        """
+        Apply result of append function (see append_function)
+
+        Parameters
+        ----------
+        result: result of append function
+
+        Returns
+        -------
+        Number of oldest rows dropped, shown rows removed and shown rows added (see append),
+            None if table data, shown rows, filter values or sorting items are changed
+            since append function is made (result is dropped, rows should be appended again)
+        """
+        state, data, strings, masks, rows, (dropped, removed, added) = result
+        backend, version, old_rows, filter_value, sort_value = state
+        if backend is not self._backend or version != self._cache.version \
+                or old_rows is not self._rows or filter_value != self._last_filter_value \
+                or sort_value != self._sort_value:
+            return None
+        old_len = len(self._backend)
+        self._backend = data
+        self._cache.extend(data, strings)
+        for key, mask in masks.items():
+            self._cache.set_mask(key, filter_value[key], mask)
+        self._rows = rows
+        if self._index is not None:
+            if dropped:
+                self._index = None
+            else:
+                keys = self._backend.slice(self._key_column, old_len, len(data)).tolist()
+                self._index.update(zip(keys, range(old_len, len(data))))
+        return dropped, removed, added
+
+    def poll(self) -> Optional[Tuple[Dict[str, np.ndarray], bool, Tuple[int, int, int]]]:
+        """
+        Poll data source changed in place by others (see Backend.poll, e.g. SharedMemoryBackend),
+            changed rows are updated and new rows are appended
+        * applied filters / sorting are evaluated on changed / new rows only
+        * if row count decreases, all rows are filtered / sorted again
+
+        Returns
+        -------
+        Changed cells (column key - positions of changed rows in table data),
+            shown rows are repositioned or not,
+            and number of rows dropped / shown rows removed / shown rows added (see append),
+            None if nothing is changed
+        """
+        if not hasattr(self._backend, 'poll'):
+            return None
+        old_len = len(self._backend)
+        changed_range = self._backend.poll()
+        if changed_range is None:
+            return None
+        total = len(self._backend)
+        if total < old_len:
+            # Data is reset, filter values / sorting items applied last time are applied again
+            filter_value = self._last_filter_value
+            self.set_data(self._backend)
+            self._last_filter_value = filter_value
+            self._rows = self._do_sort(self._sort_value, self._do_filter(filter_value, {}))
+            return {}, True, (0, 0, 0)
+
+        # Rows changed in place
+        start, stop = changed_range[0], min(changed_range[1], old_len)
+        changed, moved = {}, False
+        if start < stop:
+            rows = np.arange(start, stop)
+            for key in self._backend.columns:
+                values = self._backend.slice(key, start, stop).tolist()
+                self._cache.update_rows(rows, key, values)
+                changed[key] = rows
+            if self._key_column in changed:
+                self._index = None
+            moved = self._reposition(changed)
+        appended = self._appended(old_len, total, 0) if total > old_len else (0, 0, 0)
+        return changed, moved, appended
+
+    def _appended(self, old_len: int, total: int, dropped: int,
+                  strings: Optional[Dict[str, pd.Series]] = None,
+                  prepared: Optional[Dict[str, Tuple[str, np.ndarray]]] = None) -> Tuple[int, int, int]:
+        # Update cache / shown rows after rows are appended to backend (see append)
+        # Display strings / filter masks of new rows prepared already (with current filter values)
+        #   are used as they are
+        # New rows from start (some may be dropped already if too many rows are appended)
+        start = max(old_len - dropped, 0)
+        if self._index is not None:
+            if dropped:
+                self._index = None
+            else:
+                keys = self._backend.slice(self._key_column, start, total).tolist()
+                self._index.update(zip(keys, range(start, total)))
+
+        # Keep filter masks of applied filters, extended by masks of new rows
+        masks = {key: self._cache.mask(key, value) for key, value in self._last_filter_value.items()}
+        self._cache.append(start, dropped, strings)
+        self._rows, masks, removed, added = self._extend_rows(
+            self._backend, self._rows, start, dropped, masks, prepared,
+            self._last_filter_value, self._sort_value,
+        )
+        for key, mask in masks.items():
+            self._cache.set_mask(key, self._last_filter_value[key], mask)
+        return dropped, removed, added
+
+    def _do_append(self, state: Tuple, masks: Dict[str, Optional[np.ndarray]],
+                   chunks: List[Any], max_rows: Optional[int], context: Optional[Any] = None) -> Tuple:
+        # Append rows to copy of captured table data (see append_function)
+        backend, _, rows, filter_value, sort_value = state
+        strings, prepared = _merge_prepared(chunks)
+        data = backend.appended([each.data if isinstance(each, PreparedRows) else each
+                                 for each in chunks])
+        old_len, total = len(backend), len(data)
+        dropped = max(total - max_rows, 0) if max_rows is not None else 0
+        if dropped:
+            data.drop(dropped)
+        if context is not None:
+            context.check()
+        start = max(old_len - dropped, 0)
+        strings = self._cache.extended_strings(data, start, dropped, strings)
+        rows, masks, removed, added = self._extend_rows(data, rows, start, dropped, masks, prepared,
+                                                        filter_value, sort_value)
+        return state, data, strings, masks, rows, (dropped, removed, added)
+
+    def _extend_rows(self, data: backend_.Backend, rows: np.ndarray, start: int, dropped: int,
+                     masks: Dict[str, Optional[np.ndarray]],
+                     prepared: Optional[Dict[str, Tuple[str, np.ndarray]]],
+                     filter_value: Dict[str, str], sort_value: List[Tuple[str, sorter.SortStatus]]
+                     ) -> Tuple[np.ndarray, Dict[str, np.ndarray], int, int]:
+        # Shown rows / filter masks of data with rows appended from start (after dropped rows),
+        #   nothing is changed, so that it can be called on worker thread
+        # Return shown rows, extended filter masks, number of shown rows removed and added
+        mask = np.ones(len(data) - start, dtype=bool)
+        extended = {}
+        for key, value in filter_value.items():
+            if prepared and key in prepared and prepared[key][0] == value:
+                new_mask = prepared[key][1][len(prepared[key][1]) - len(mask):]
+            else:
+                series = self._cache.column(key, data).iloc[start:].reset_index(drop=True)
+                new_mask = _new_mask(self._columns[key], series, value)
+            mask &= new_mask
+            if masks.get(key) is not None:
+                extended[key] = np.concatenate([masks[key][dropped:], new_mask])
+
+        kept = rows[rows >= dropped] - dropped
+        new_rows = start + np.flatnonzero(mask)
+        new = self._insert_sorted(kept, new_rows, sort_value, data) if sort_value \
+            else np.concatenate([kept, new_rows])
+        return new, extended, len(rows) - len(kept), len(new_rows)
+
+    def upsert(self, chunks: List[Any], max_rows: Optional[int] = None
+               ) -> Tuple[Dict[str, np.ndarray], bool, Tuple[int, int, int]]:
+        """
+        Update rows by primary key (key_column), rows with new keys are appended
+        * changed rows are located by hash index, only changed cells are updated
+        * shown rows are repositioned only if sorting values or filter results of rows are changed
+        * if a key is given more than once, the last row is used
+
+        Parameters
+        ----------
+        chunks: list of rows, each in format of original data,
+            pandas DataFrame or records (list of dicts / dict of lists)
+        max_rows: max number of rows kept in table data, oldest rows are dropped (None means no limit)
+
+        Returns
+        -------
+        Changed cells (column key - positions of changed rows in table data),
+            shown rows are repositioned or not,
+            and result of appending rows with new keys (see append)
+        """
+        if self._key_column is None:
+            raise ValueError('key_column is required for upsert')
+        frame = pd.concat([_to_frame(each) for each in chunks], ignore_index=True)
+        if self._key_column not in frame.columns:
+            raise KeyError(f'key column \'{self._key_column}\' is missing in rows')
+        frame = frame.drop_duplicates(self._key_column, keep='last').reset_index(drop=True)
+        index = self._key_index()
+        positions = np.array([index.get(each, -1) for each in frame[self._key_column].tolist()],
+                             dtype=np.intp)
+        exists = positions >= 0
+
+        # Update changed cells of existing rows
+        changed = {}
+        updates, rows = frame[exists].reset_index(drop=True), positions[exists]
+        for key in updates.columns:
+            if key == self._key_column or key not in self._backend.columns:
+                continue
+            old_values = self._backend.column(key).take(rows).reset_index(drop=True)
+            diff = _changed_mask(old_values, updates[key])
+            if diff.any():
+                values = updates[key][diff].tolist()
+                self._backend.set_values(rows[diff], key, values)
+                self._cache.update_rows(rows[diff], key, values)
+                changed[key] = rows[diff]
+        moved = self._reposition(changed)
+
+        # Append rows with new keys
+        appended = (0, 0, 0)
+        if not exists.all():
+            appended = self.append([frame[~exists].reset_index(drop=True)], max_rows)
+            dropped = appended[0]
+            if dropped:
+                changed = {key: each[each >= dropped] - dropped for key, each in changed.items()}
+        return changed, moved, appended
+
+    def row_numbers(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Get row numbers of rows in shown rows
+
+        Parameters
+        ----------
+        positions: positions of rows in table data
+
+        Returns
+        -------
+        Row numbers of rows in shown rows (-1 if not shown)
+        """
+        inverse = np.full(len(self._backend), -1, dtype=np.intp)
+        inverse[self._rows] = np.arange(len(self._rows))
+        return inverse[np.asarray(positions, dtype=np.intp)]
+
+    def choices(self, key: str) -> List[str]:
+        """
+        Get sorted distinct display strings of column (for filter editors)
+
+        Parameters
+        ----------
+        key: column key
+
+        Returns
+        -------
+        List of distinct display strings
+        """
+        column = self._columns[key]
+        if hasattr(self._backend, 'distinct') and key in self._backend.columns:
+            # Data source gives distinct values itself, whole column is not read
+            strings, _ = column.type.to_string_batch(self._backend.distinct(key))
+        else:
+            strings = self._cache.strings(key)
+        return sorted(strings.dropna().unique().tolist())
+
+    # ================================ Filter / Sort ================================
+
+    def set_filter(self, key: str, value: Optional[str]) -> NoReturn:
+        """
+        Set filter value of column
+
+        Parameters
+        ----------
+        key: column key
+        value: filter value, empty string or None to remove filter of column
+        """
+        if key not in self._columns:
+            raise KeyError(f'invalid column key \'{key}\'')
+        if value is None or value == '':
+            self._filter_value.pop(key, None)
+        else:
+            self._filter_value[key] = value
+
+    def set_filters(self, filter_value: Dict[str, str]) -> NoReturn:
+        """
+        Set filter values of all columns (columns not given are not filtered)
+
+        Parameters
+        ----------
+        filter_value: dictionary of column key - filter value
+        """
+        for key in filter_value:
+            if key not in self._columns:
+                raise KeyError(f'invalid column key \'{key}\'')
+        self._filter_value = {key: value for key, value in filter_value.items()
+                              if value is not None and value != ''}
+
+    def set_sort(self, sort_list: List[Tuple[str, Any]]) -> NoReturn:
+        """
+        Set sorting items
+
+        Parameters
+        ----------
+        sort_list: list of (column key, sorting order) in priority order
+            * sorting order should be column.sorter.SortStatus,
+                or string 'ascending' / 'descending' ('asc' / 'desc' for short)
+            * empty list to reset sorting
+        """
+        sort_value = []
+        for key, status in sort_list:
+            if key not in self._columns:
+                raise KeyError(f'invalid column key \'{key}\'')
+            status = sorter.SortStatus.make(status)
+            if status != sorter.SortStatus.Nothing and key not in [k for k, _ in sort_value]:
+                sort_value.append((key, status))
+        self._sort_value = sort_value
+
+    def refresh(self) -> np.ndarray:
+        """
+        Apply current filter values and sorting items
+
+        Returns
+        -------
+        Positions of shown rows in table data
+        """
+        filter_value = self.filter_value
+        if self.pushdown:
+            self.set_rows(self.query_function()(), filter_value)
+        else:
+            sort_func = self.sort_function()
+            self.set_rows(sort_func(self.filter_function()()), filter_value)
+        return self._rows
+
+    def filter_function(self) -> callable:
+        """
+        Make filter function with current filter values
+        Filter values are captured here, so that filter function can be called on worker thread
+        * pass filter_value with result to set_rows, so that filtering is not skipped
+            if it is cancelled or fails (see filter_changed)
+
+        Returns
+        -------
+        Filter function (taking optional TaskContext) which returns positions of filtered rows
+        """
+        return ft.partial(self._do_filter, self.filter_value, self._last_filter_value)
+
+    def sort_function(self) -> callable:
+        """
+        Make sorting function with current sorting items
+        Sorting items are captured here, so that sorting function can be called on worker thread
+
+        Returns
+        -------
+        Sorting function (taking positions of rows and optional TaskContext)
+            which returns sorted positions
+        """
+        return ft.partial(self._do_sort, self.sort_value)
+
+    def query_function(self) -> callable:
+        """
+        Make query function with current filter values and sorting items,
+            for data source which filters / sorts data itself
+        * pass filter_value with result to set_rows (see filter_function)
+
+        Returns
+        -------
+        Query function (taking optional TaskContext) which returns Backend of query result
+        """
+        return ft.partial(self._do_query, self._backend, self.filter_value, self.sort_value)
+
+    def close(self) -> NoReturn:
+        """Release worker pool of filter executor made by engine (engine can still be used)"""
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown()
+
+    # ================================ Private Methods ================================
+
+    def _bind_dtypes(self) -> NoReturn:
+        # Bind 'auto' column types to dtypes of table data
+        for col in self._column_group:
+            if isinstance(col.type, type_.DtypeColumnType) and col.type.auto \
+                    and col.key in self._backend.columns:
+                col.type = col.type.bind(self._backend.dtype(col.key))
+
+    def _key_index(self) -> Dict[Any, int]:
+        # Hash index of primary key, built from key column when needed
+        if self._index is None:
+            if self._key_column not in self._backend.columns:
+                raise KeyError(f'key column \'{self._key_column}\' is missing in data')
+            keys = self._backend.column(self._key_column).tolist()
+            self._index = dict(zip(keys, range(len(keys))))
+        return self._index
+
+    def _reposition(self, changed: Dict[str, np.ndarray]) -> bool:
+        # Update shown rows after cells are changed, return shown rows are repositioned or not
+        # Only rows whose filter results or sorting values are changed are removed / inserted again
+        sort_keys = [key for key, _ in self._sort_value]
+        rows = [changed[key] for key in list(self._last_filter_value) + sort_keys if key in changed]
+        if not rows:
+            return False
+        candidates = np.unique(np.concatenate(rows))
+        shown = np.zeros(len(self._backend), dtype=bool)
+        shown[self._rows] = True
+        keep = self._filter_rows(candidates, set(changed))
+
+        # Rows to remove / insert again
+        affected = keep != shown[candidates]
+        for key in sort_keys:
+            if key in changed:
+                affected |= np.isin(candidates, changed[key])
+        if not affected.any():
+            return False
+        new_rows = self._reinsert(self._rows, candidates[affected], candidates[affected & keep])
+        moved = not np.array_equal(new_rows, self._rows)
+        self._rows = new_rows
+        return moved
+
+    def _filter_rows(self, candidates: np.ndarray, dirty: set) -> np.ndarray:
+        # Evaluate applied filters on candidate rows, return mask of candidates to show
+        # Cached masks of dirty columns (whose values are changed) are updated for candidate rows
+        keep = np.ones(len(candidates), dtype=bool)
+        for key, value in self._last_filter_value.items():
+            mask = self._cache.mask(key, value)
+            if mask is not None and key not in dirty:
+                keep &= mask[candidates]
+                continue
+            column = self._columns[key]
+            series = self._cache.column(key).take(candidates).reset_index(drop=True)
+            sub_mask = column.filter.filter_mask(
+                series=series,
+                filter_value=value,
+                to_string=column.type.to_string,
+                to_value=column.type.to_value,
+                strings=self._cache.strings(key).take(candidates).reset_index(drop=True),
+            )
+            keep &= sub_mask
+            if mask is not None:
+                mask = mask.copy()
+                mask[candidates] = sub_mask
+                self._cache.set_mask(key, value, mask)
+        return keep
+
+    def _reinsert(self, rows: np.ndarray, removed: np.ndarray, inserted: np.ndarray) -> np.ndarray:
+        # Remove rows from shown rows, and insert rows by sorting
+        rows = rows[~np.isin(rows, removed)]
+        if self._sort_value:
+            return self._insert_sorted(rows, inserted, self._sort_value)
+        return np.sort(np.concatenate([rows, inserted]))
+
+    def _do_filter(self, filter_value: Dict[str, str], last_value: Dict[str, str],
+                   context: Optional[Any] = None) -> np.ndarray:
+        # Filter table data, return positions of remaining rows
+        # Remaining rows are AND of filter masks of each column, masks are cached by DataCache
+        mask = None
+        for i, (key, value) in enumerate(filter_value.items()):
+            if context is not None:
+                context.check()
+                context.progress(100 * i // len(filter_value))
+            column_mask = self._filter_mask(self._columns[key], value, last_value.get(key))
+            mask = column_mask.copy() if mask is None else np.logical_and(mask, column_mask, out=mask)
+        if mask is None:
+            return np.arange(len(self._cache.backend))
+        return np.flatnonzero(mask)
+
+    def _filter_mask(self, column: Column, value: str,
+                     last_value: Optional[str] = None) -> np.ndarray:
+        # Get filter mask of column from cache, or compute it
+        # If filter value is a refinement of last one,
+        #   only rows remaining last time (by this column) are filtered again
+        key = column.key
+        version = self._cache.version
+        mask = self._cache.mask(key, value)
+        if mask is not None:
+            return mask
+
+        # Use native kernel of backend if display strings are just raw strings of column
+        if column.type.raw_strings and key in self._cache.backend.columns \
+                and type(column.filter).common_filter is filter_.Filter.common_filter:
+            mask = column.filter.native_mask(self._cache.backend, key, value)
+            if mask is not None:
+                self._cache.set_mask(key, value, mask, version)
+                return mask
+
+        last_mask = None
+        if last_value is not None and column.filter.is_refinement(last_value, value):
+            last_mask = self._cache.mask(key, last_value)
+
+        series = self._cache.column(key)
+        # Display strings are converted only if filter reads them
+        strings = self._cache.strings(key) \
+            if column.filter.NeedsStrings or self._cache.has_strings(key) else None
+        rows = None
+        if last_mask is not None:
+            rows = np.flatnonzero(last_mask)
+            series = series.take(rows)
+            strings = None if strings is None else strings.take(rows)
+        filter_mask = column.filter.filter_mask if self._executor is None \
+            else ft.partial(self._executor.filter_mask, column.filter)
+        mask = filter_mask(
+            series=series,
+            filter_value=value,
+            to_string=column.type.to_string,
+            to_value=column.type.to_value,
+            strings=strings,
+        )
+        if rows is not None:
+            mask, sub_mask = np.zeros(len(last_mask), dtype=bool), mask
+            mask[rows[sub_mask]] = True
+
+        self._cache.set_mask(key, value, mask, version)
+        return mask
+
+    def _do_sort(self, sort_value: List[Tuple[str, sorter.SortStatus]], rows: np.ndarray,
+                 context: Optional[Any] = None) -> np.ndarray:
+        # Sort positions of rows by given sorting items
+        if context is not None:
+            context.check()
+        if not sort_value:
+            return np.sort(rows)
+        elif len(sort_value) == 1:
+            key, status = sort_value[0]
+            return self._columns[key].sorter.sort_rows(
+                order=self._cache.order(key),
+                rows=rows,
+                status=status,
+                null_count=self._cache.null_count(key),
+            )
+        else:
+            ranks = []
+            for key, _ in sort_value:
+                if context is not None:
+                    context.check()
+                ranks.append(self._cache.ranks(key))
+            return sorter.Sorter.lexsort_rows(
+                ranks=ranks,
+                status=[status for _, status in sort_value],
+                rows=rows,
+            )
+
+    def _insert_sorted(self, rows: np.ndarray, new_rows: np.ndarray,
+                       sort_value: List[Tuple[str, sorter.SortStatus]],
+                       data: Optional[backend_.Backend] = None) -> np.ndarray:
+        # Insert new rows into rows sorted by sorting items (of table data, or given data)
+        # For single column sorted in default way, positions of new rows are searched in sorted rows,
+        #   otherwise shown rows are sorted again with new rows (but not whole column)
+        if len(sort_value) == 1:
+            key, status = sort_value[0]
+            column = self._columns[key]
+            if column.sorter.sort_lt is None and column.sorter.sort_key is None:
+                try:
+                    return self._search_sorted(self._cache.column(key, data), rows, new_rows, status)
+                except TypeError as e:
+                    # Values can not be compared by numpy (e.g. mixed types)
+                    _ = e
+        subset = np.sort(np.concatenate([rows, new_rows]))
+        if len(sort_value) == 1:
+            key, status = sort_value[0]
+            column_sorter = self._columns[key].sorter
+            series = self._cache.column(key, data).take(subset).reset_index(drop=True)
+            order = column_sorter.sort_rows(column_sorter.argsort(series), np.arange(len(subset)),
+                                            status, column_sorter.null_count(series))
+            return subset[order]
+        ranks = []
+        for key, _ in sort_value:
+            series = self._cache.column(key, data).take(subset).reset_index(drop=True)
+            ranks.append(self._columns[key].sorter.rank(series))
+        order = sorter.Sorter.lexsort_rows(
+            ranks=ranks,
+            status=[status for _, status in sort_value],
+            rows=np.arange(len(subset)),
+        )
+        return subset[order]
+
+    @staticmethod
+    def _search_sorted(series: pd.Series, rows: np.ndarray, new_rows: np.ndarray,
+                       status: sorter.SortStatus) -> np.ndarray:
+        # Insert new rows by binary search (null values at the end of both orders)
+        # Rows of equal values are ordered by positions in table data, same as stable sorting
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            raise TypeError('categorical values are compared by codes')
+        descending = status == sorter.SortStatus.Descending
+        if descending:
+            rows = sorter.Sorter.reverse(rows, int(series.take(rows).isna().sum()))
+        values = series.take(rows)
+        new_values = series.take(new_rows).reset_index(drop=True).sort_values(kind='stable')
+        new_rows = new_rows[new_values.index.to_numpy()]
+        valid, new_valid = int(values.notna().sum()), new_values.notna().to_numpy()
+        # Range of rows with equal values (null values are equal to each other)
+        lower = np.full(len(new_rows), valid)
+        upper = np.full(len(new_rows), len(rows))
+        existing, inserted = values.iloc[:valid].to_numpy(), new_values[new_valid].to_numpy()
+        lower[new_valid] = np.searchsorted(existing, inserted, side='left')
+        upper[new_valid] = np.searchsorted(existing, inserted, side='right')
+        # Rows of equal values are sorted by positions, so (first row of equal values, position)
+        #   of all rows are in order, and new rows are searched by it in one pass
+        positions = upper.copy()
+        tied = np.flatnonzero(upper > lower)
+        if len(tied):
+            first = np.full(len(rows), valid, dtype=np.int64)
+            if valid:
+                starts = np.ones(valid, dtype=bool)
+                # NaN (not null in Arrow data) is sorted to the end and equal to each other
+                nan = pd.isna(existing)
+                starts[1:] = (existing[1:] != existing[:-1]) & ~(nan[1:] & nan[:-1])
+                first[:valid] = np.maximum.accumulate(np.where(starts, np.arange(valid), 0))
+            scale = int(max(rows.max(initial=0), new_rows.max(initial=0))) + 1
+            positions[tied] = np.searchsorted(first * scale + rows,
+                                              lower[tied] * scale + new_rows[tied])
+        res = np.insert(rows, positions, new_rows)
+        if descending:
+            res = sorter.Sorter.reverse(res, len(rows) - valid + int(np.count_nonzero(~new_valid)))
+        return res
+
+    def _do_query(self, backend: Any, filter_value: Dict[str, str],
+                  sort_value: List[Tuple[str, sorter.SortStatus]],
+                  context: Optional[Any] = None) -> Any:
+        # Push filtering / sorting down to data source
+        if context is not None:
+            context.check()
+        filters = [(self._columns[key], value) for key, value in filter_value.items()]
+        sort = [(key, status == sorter.SortStatus.Descending) for key, status in sort_value]
+        return backend.query(filters, sort)
+
+
+def _to_frame(data: Any) -> pd.DataFrame:
+    # Convert rows (DataFrame / pyarrow Table / polars DataFrame / records) to pandas DataFrame
+    if isinstance(data, pd.DataFrame):
+        return data
+    if hasattr(data, 'to_pandas'):
+        return data.to_pandas()
+    return pd.DataFrame(data)
+
+
+def _new_mask(column: Column, series: pd.Series, value: str,
+              strings: Optional[pd.Series] = None) -> np.ndarray:
+    # Filter mask of new rows
+    if strings is None:
+        strings, _ = column.type.to_string_batch(series)
+    return column.filter.filter_mask(
+        series=series,
+        filter_value=value,
+        to_string=column.type.to_string,
+        to_value=column.type.to_value,
+        strings=strings,
+    )
+
+
+def _merge_prepared(chunks: List[Any]) -> Tuple[Dict[str, pd.Series], Dict[str, Tuple[str, np.ndarray]]]:
+    # Display strings / filter masks (with the same filter value) of new rows prepared for all chunks
+    if not chunks or not all(isinstance(each, PreparedRows) for each in chunks):
+        return {}, {}
+    strings = {key: pd.concat([each.strings[key] for each in chunks], ignore_index=True)
+               for key in chunks[0].strings if all(key in each.strings for each in chunks)}
+    masks = {}
+    for key, (value, _) in chunks[0].masks.items():
+        if all(each.masks.get(key, (None,))[0] == value for each in chunks):
+            masks[key] = (value, np.concatenate([each.masks[key][1] for each in chunks]))
+    return strings, masks
+
+
+def _key_values(data: backend_.Backend, keys: List[str]) -> pd.Index:
+    # Index of key values of rows (MultiIndex for multiple key columns)
+    if len(keys) == 1:
+        return pd.Index(data.column(keys[0]))
+    return pd.MultiIndex.from_arrays([data.column(key) for key in keys])
+
+
+def _changed_mask(old: pd.Series, new: pd.Series) -> np.ndarray:
+    # Mask of values changed (null values are regarded as equal)
+    try:
+        equal = (old == new).fillna(False).to_numpy(dtype=bool)
+    except (TypeError, ValueError) as e:
+        # Values can not be compared by pandas (e.g. different categories)
+        _ = e
+        equal = np.array([a == b for a, b in zip(old.tolist(), new.tolist())], dtype=bool)
+    return ~(equal | (old.isna().to_numpy() & new.isna().to_numpy()))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""chunked parallel executor of column filters"""
+
+__all__ = ['FilterExecutor']
+
+import concurrent.futures as cf
+import numpy as np
+import pandas as pd
+import pickle
+import weakref
+
+from pyqttable.column import filter_
+from typing import Any, Optional, Union, NoReturn
+
+
+class FilterExecutor:
+    """
+    Evaluate expensive column filters on chunks of column in parallel
+
+    Column is split into chunks, each chunk is filtered by Filter.filter_mask in a pool,
+        and masks of chunks are merged in order
+    Only filters declaring ParallelSafe are evaluated in parallel,
+        other filters (or short columns) are evaluated in current thread as usual
+
+    * 'process' pool uses all cores for pure python filters (filter must be picklable)
+    * 'thread' pool is enough for filters releasing GIL
+    """
+
+    # Number of rows in each chunk
+    ChunkSize = 50000
+
+    def __init__(self, pool: Union[str, cf.Executor] = 'process',
+                 max_workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        pool: 'process' / 'thread', or an Executor instance (not shut down by FilterExecutor)
+        max_workers: max number of workers (number of cores by default)
+        chunk_size: number of rows in each chunk
+        """
+        if isinstance(pool, cf.Executor):
+            self._pool, self._own_pool = pool, False
+        elif pool in ('process', 'thread'):
+            self._pool, self._own_pool = None, True
+        else:
+            raise ValueError(f'invalid executor pool \'{pool}\'')
+        self._pool_type = pool
+        self._max_workers = max_workers
+        self.chunk_size = chunk_size or self.ChunkSize
+
+    @classmethod
+    def make(cls, executor: Union[None, str, cf.Executor, 'FilterExecutor']) \
+            -> Optional['FilterExecutor']:
+        """Make FilterExecutor from table option"""
+        if executor is None or isinstance(executor, cls):
+            return executor
+        return cls(executor)
+
+    @property
+    def pool(self) -> cf.Executor:
+        """Executor pool (created when it is used for the first time)"""
+        if self._pool is None:
+            if self._pool_type == 'process':
+                self._pool = cf.ProcessPoolExecutor(self._max_workers)
+            else:
+                self._pool = cf.ThreadPoolExecutor(self._max_workers)
+            # Pool is also shut down when executor is collected (or at exit)
+            weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+        return self._pool
+
+    def filter_mask(self, column_filter: filter_.Filter, series: pd.Series, filter_value: Any,
+                    to_string: Optional[callable] = None,
+                    to_value: Optional[callable] = None,
+                    strings: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        Filter whole column, in chunks if filter is parallel-safe
+
+        Parameters
+        ----------
+        column_filter: filter of column
+        (other parameters are same as Filter.filter_mask)
+
+        Returns
+        -------
+        Boolean mask of rows remaining in result
+        """
+        kwargs = dict(filter_value=filter_value, to_string=to_string, to_value=to_value)
+        if not column_filter.ParallelSafe or len(series) <= self.chunk_size \
+                or not self._can_send(column_filter, to_string, to_value):
+            return column_filter.filter_mask(series, strings=strings, **kwargs)
+
+        futures = []
+        for start in range(0, len(series), self.chunk_size):
+            stop = start + self.chunk_size
+            chunk_strings = None if strings is None else strings.iloc[start:stop]
+            futures.append(self.pool.submit(column_filter.filter_mask, series.iloc[start:stop],
+                                            strings=chunk_strings, **kwargs))
+        try:
+            return np.concatenate([future.result() for future in futures])
+        finally:
+            # Error in one chunk is raised, other chunks are not needed any more
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self) -> NoReturn:
+        """Shutdown executor pool (if created by FilterExecutor)"""
+        if self._own_pool and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _can_send(self, *funcs: Any) -> bool:
+        # Filter (and conversion functions) can be sent to other processes or not
+        if self._pool_type != 'process' and not isinstance(self._pool_type, cf.ProcessPoolExecutor):
+            return True
+        try:
+            pickle.dumps(funcs)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            _ = e
+            return False
+        return True
+
+
+if __name__ == '__main__':
+    pass
@@ -9,8 +9,9 @@ from PyQt5 import QtCore, QtWidgets, QtGui
 from pyqttable.column import *
 from pyqttable.editor import *
 from pyqttable.widget import *
+from pyqttable.engine import TableEngine
 from pyqttable import utils
-from typing import Dict, NoReturn
+from typing import Dict, List, Tuple, Any, Optional, NoReturn
 
 
 class NormalHeaderView(QtWidgets.QHeaderView):
@@ -59,32 +60,45 @@ class HeaderViewItem(QtWidgets.QTableWidgetItem):
     def update_sort_status(self) -> NoReturn:
         self._sort_status = _next_status[self._sort_status]
 
+    def set_sort_status(self, status: sorter.SortStatus) -> NoReturn:
+        self._sort_status = status
+
     def reset_sort_status(self) -> NoReturn:
         self._sort_status = sorter.SortStatus.Nothing
 
-    def sort(self, df: pd.DataFrame) -> pd.DataFrame:
-        return self.column_cfg.sorter.sort_data(
-            df=df,
-            by=self.column_cfg.key,
-            status=self._sort_status,
-        )
+    def sort_label(self, priority: int) -> str:
+        # Header text with sorting direction and priority (for multi-column sorting)
+        return f'{self.column_cfg.name} {_sort_arrow[self._sort_status]}{priority}'
 
 
 class HeaderManager(QtCore.QObject):
     filterTriggered = QtCore.pyqtSignal(object)
     sortTriggered = QtCore.pyqtSignal(object)
 
-    def __init__(self, parent: QtWidgets.QTableWidget, col_group: ColumnGroup,
-                 show_filter: bool = False, sortable: bool = False, draggable: bool = False):
+    # Keyboard modifier to add a column to multi-column sorting when clicking on header
+    MultiSortModifier = QtCore.Qt.ShiftModifier
+
+    def __init__(self, parent: QtWidgets.QTableView, engine: TableEngine,
+                 show_filter: bool = False, sortable: bool = False, draggable: bool = False,
+                 live_filter: Optional[int] = None):
         super().__init__(parent)
         self._parent = parent
-        self._column_group = col_group
+        self._engine = engine
+        self._column_group = engine.column_group
         self._show_filter = show_filter
         self._sortable = sortable
         self._draggable = draggable
+        self._live_filter = live_filter
 
         self._filter_editor = {}
-        self._curr_sorting_on = None
+        self._header_items = []
+        self._sorting_on = []  # sorting items in priority order
+
+        # Debounce timer of live filtering, bursts of changes are coalesced into one filtering
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(live_filter or 0)
+        self._filter_timer.timeout.connect(self._on_filter)
 
         # Data change lock to distinguish manually change on UI and set_data
         self._lock = utils.NameLock()
@@ -105,8 +119,18 @@ class HeaderManager(QtCore.QObject):
     def draggable(self) -> bool:
         return self._draggable
 
+    @property
+    def live_filter(self) -> Optional[int]:
+        return self._live_filter
+
+    @property
+    def sort_value(self) -> List[Tuple[str, sorter.SortStatus]]:
+        return [(item.column_cfg.key, item.sort_status)
+                for item in self._sorting_on]
+
     @property
     def filter_value(self) -> Dict[str, str]:
+        # Filter values shown on editors (set to engine when filtering is triggered)
         filter_dict = {}
         for key, (column, factory, cell) in self._filter_editor.items():
             value = factory.get_data(cell)
@@ -121,14 +145,19 @@ class HeaderManager(QtCore.QObject):
         if self.show_filter:
             header = FilterHeaderView(self._parent)
         else:
-            header = NormalHeaderView(self._parent)
+            header = NormalHeaderView(QtCore.Qt.Horizontal, self._parent)
         self._parent.setHorizontalHeader(header)
 
-        # Set horizontal header items one by one
-        self._parent.setColumnCount(len(self._column_group))
+        # Make horizontal header items one by one
+        # (only QTableWidget takes items, QTableView gets header data from its model)
+        if isinstance(self._parent, QtWidgets.QTableWidget):
+            self._parent.setColumnCount(len(self._column_group))
         filter_widgets = []  # List of filter widgets for FilterHeader
         for j, col in enumerate(self._column_group):
-            self._parent.setHorizontalHeaderItem(j, HeaderViewItem(col))
+            item = HeaderViewItem(col)
+            self._header_items.append(item)
+            if isinstance(self._parent, QtWidgets.QTableWidget):
+                self._parent.setHorizontalHeaderItem(j, item)
             # If show filter, make filter widgets
             if self.show_filter:
                 filter_widgets.append(self._create_filter_editor(col))
@@ -160,87 +189,119 @@ class HeaderManager(QtCore.QObject):
         # Create editor and do basic setup for filter editors
         editor = factory.create(self._parent)
         factory.done_signal(editor).connect(self._on_filter)
+        # For live filtering, filter (after debounce delay) when editor is changed
+        if self.live_filter is not None and hasattr(factory, 'change_signal'):
+            factory.change_signal(editor).connect(self._on_change)
         factory.set_place_holder(editor, column.filter.PlaceHolderText)
         self._filter_editor[column.key] = (column, factory, editor)
         return editor
 
-    def _reload_filter_editor(self, column: Column, df: pd.DataFrame) -> NoReturn:
+    def _reload_filter_editor(self, column: Column) -> NoReturn:
         # Reload filter widgets if they can be updated by table data
         _, factory, editor = self._filter_editor[column.key]
         if hasattr(factory, 'reset_editor'):
-            new_selection = sorted(df[column.key].apply(column.type.to_string).unique().tolist())
-            factory.reset_editor(editor, new_selection)
-
-    def _do_filter(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Filter the DataFrame
-        for key, (column, factory, cell) in self._filter_editor.items():
-            value = factory.get_data(cell)
-            if value:
-                df = column.filter.filter(
-                    df=df, by=key,
-                    filter_value=value,
-                    to_string=column.type.to_string,
-                    to_value=column.type.to_value,
-                )
-        return df
+            factory.reset_editor(editor, self._engine.choices(column.key))
 
     def _on_filter(self) -> NoReturn:
         """
-        When editing of filter widgets is done, emit filterTriggered signal to parent QTableWidget,
-            with filter function which takes an original DataFrame and returns a filtered DataFrame
+        When editing of filter widgets is done, set filter values to engine,
+            and emit filterTriggered signal to parent QTableWidget
+            with filter function which returns positions of filtered rows in table data
         """
+        self._filter_timer.stop()
         if not self._lock.check_lock('update_filter'):
-            self.filterTriggered.emit(self._do_filter)
+            self._engine.set_filters(self.filter_value)
+            # Skip filtering if filter values are not changed since last filtering
+            if self._engine.filter_changed:
+                self.filterTriggered.emit(self._engine.filter_function())
 
-    def update_filter(self, df: pd.DataFrame) -> NoReturn:
+    def _on_change(self) -> NoReturn:
+        """When filter widgets are changed, (re)start debounce timer of live filtering"""
+        if not self._lock.check_lock('update_filter'):
+            self._filter_timer.start()
+
+    def update_filter(self, keys: Optional[List[str]] = None) -> NoReturn:
+        # Reload filter editors after data is reset (only editors of given columns if keys is given)
+        self._filter_timer.stop()
         with self._lock.get_lock('update_filter'):
-            header = self._parent.horizontalHeader()
-            for j in range(header.count()):
-                item = self._parent.horizontalHeaderItem(j)
-                assert isinstance(item, HeaderViewItem), \
-                    'Header item not HeaderViewItem'
-                self._reload_filter_editor(item.column_cfg, df)
+            if self.show_filter:
+                for item in self._header_items:
+                    if keys is None or item.column_cfg.key in keys:
+                        self._reload_filter_editor(item.column_cfg)
 
     # ================================ Sort Part ================================
 
-    def _update_sort_item(self, item: HeaderViewItem) -> NoReturn:
+    def _update_sort_item(self, item: HeaderViewItem, multiple: bool = False) -> NoReturn:
         # Update sorting status of HeaderViewItems
-        if self._curr_sorting_on != item and \
-                self._curr_sorting_on is not None:
-            self._curr_sorting_on.reset_sort_status()
-        self._curr_sorting_on = item
+        # If not multiple, other sorting items are reset
+        if not multiple:
+            for each in self._sorting_on:
+                if each is not item:
+                    each.reset_sort_status()
+            self._sorting_on = [item]
+        elif item not in self._sorting_on:
+            self._sorting_on.append(item)
         item.update_sort_status()
+        self._sorting_on = [each for each in self._sorting_on
+                            if each.sort_status != sorter.SortStatus.Nothing]
 
-    @staticmethod
-    def _update_sort_info(header: QtWidgets.QHeaderView, index: int,
-                          indicator: QtCore.Qt.SortOrder) -> NoReturn:
+    def _update_sort_info(self) -> NoReturn:
         # Update header's sorting indicator according to sorting status
-        if indicator is not None:
-            header.setSortIndicator(index, indicator)
+        # For multi-column sorting, sorting direction and priority are shown in header text
+        multiple = len(self._sorting_on) > 1
+        for j, item in enumerate(self._header_items):
+            if multiple and item in self._sorting_on:
+                text = item.sort_label(self._sorting_on.index(item) + 1)
+            else:
+                text = item.column_cfg.name
+            self._set_header_text(j, text)
+
+        header = self._parent.horizontalHeader()
+        if len(self._sorting_on) == 1:
+            item = self._sorting_on[0]
+            header.setSortIndicator(self._header_items.index(item), item.sort_indicator)
             header.setSortIndicatorShown(True)
         else:
             header.setSortIndicatorShown(False)
 
-    def sort(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Sort DataFrame by current sorting item
-        if self._curr_sorting_on is not None:
-            return self._curr_sorting_on.sort(df)
+    def _set_header_text(self, index: int, text: str) -> NoReturn:
+        if isinstance(self._parent, QtWidgets.QTableWidget):
+            self._header_items[index].setText(text)
         else:
-            return df
+            self._parent.model().setHeaderData(index, QtCore.Qt.Horizontal, text)
+
+    def set_sort(self, sort_list: List[Tuple[str, Any]]) -> NoReturn:
+        """
+        Set sorting items to engine and emit sortTriggered signal to parent QTableWidget
+
+        Parameters
+        ----------
+        sort_list: list of (column key, sorting status) in priority order
+        """
+        self._engine.set_sort(sort_list)
+        items = {item.column_cfg.key: item for item in self._header_items}
+        for item in self._header_items:
+            item.reset_sort_status()
+        self._sorting_on = []
+        for key, status in self._engine.sort_value:
+            items[key].set_sort_status(status)
+            self._sorting_on.append(items[key])
+        self._update_sort_info()
+        self.sortTriggered.emit(self._engine.sort_function())
 
     def _on_sorting(self, index: int) -> NoReturn:
         """
         When sortable header section is clicked, emit sortTriggered signal to parent QTableWidget,
-            with sorting function which takes an original DataFrame and returns a sorted DataFrame
+            with sorting function which takes positions of rows and returns sorted positions
+        * click with MultiSortModifier to add the column to multi-column sorting
         """
         # Update sorting item
-        item = self._parent.horizontalHeaderItem(index)
-        assert isinstance(item, HeaderViewItem), \
-            'Header item not HeaderViewItem'
-        self._update_sort_item(item)
-        self._update_sort_info(self._parent.horizontalHeader(),
-                               index, item.sort_indicator)
-        self.sortTriggered.emit(self.sort)
+        item = self._header_items[index]
+        modifiers = QtWidgets.QApplication.keyboardModifiers()
+        self._update_sort_item(item, multiple=bool(modifiers & self.MultiSortModifier))
+        self._update_sort_info()
+        self._engine.set_sort(self.sort_value)
+        self.sortTriggered.emit(self._engine.sort_function())
 
 
 _next_status = {
@@ -255,6 +316,12 @@ _sort_indicator = {
     sorter.SortStatus.Descending: QtCore.Qt.DescendingOrder,
 }
 
+_sort_arrow = {
+    sorter.SortStatus.Nothing: '',
+    sorter.SortStatus.Ascending: '\u25b2',
+    sorter.SortStatus.Descending: '\u25bc',
+}
+
 
 if __name__ == '__main__':
     pass
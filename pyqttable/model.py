@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""table model for virtual rendering"""
+
+__all__ = ['TableModel']
+
+import numpy as np
+import pandas as pd
+
+from PyQt5 import QtCore
+from pyqttable.cache import DataCache
+from pyqttable.column import ColumnGroup
+from pyqttable import utils
+from typing import Any, Dict, Tuple, Optional, NoReturn
+
+
+class TableModel(QtCore.QAbstractTableModel):
+    """
+    Table model backed directly by DataFrame
+
+    Model only keeps positions of shown rows,
+        cell content is fetched from cached display strings when Qt asks to paint the cell,
+        so that rendering cost depends on viewport size instead of row count
+
+    signals:
+    cellEdited(row, column, string)
+    """
+
+    # when a cell is edited, this signal will be emitted with string from editor
+    # string is not written to data by model, table should do it
+    cellEdited = QtCore.pyqtSignal(int, int, str)
+
+    def __init__(self, column_group: ColumnGroup, cache: DataCache,
+                 parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._columns = list(column_group)
+        self._cache = cache
+        self._rows = np.arange(0)
+        self._header_text = {}
+        # Highlighted cells, (position in table data, column key) - anything
+        self._highlight = {}
+        self._highlight_color = None
+
+    # ================================ Public Methods ================================
+
+    def set_rows(self, rows: np.ndarray) -> NoReturn:
+        """
+        Set shown rows to model
+
+        Parameters
+        ----------
+        rows: positions of shown rows in table data
+        """
+        self.beginResetModel()
+        self._rows = np.asarray(rows)
+        self.endResetModel()
+
+    def append_rows(self, rows: np.ndarray, removed: int, added: int,
+                    shifted: bool = False) -> NoReturn:
+        """
+        Set shown rows after rows are appended, only removed / inserted rows are notified
+
+        Parameters
+        ----------
+        rows: positions of shown rows in table data
+            (old rows without first removed ones, followed by added ones)
+        removed: number of first shown rows removed
+        added: number of shown rows added at the end
+        shifted: positions of rows are shifted (oldest rows are dropped) or not
+        """
+        rows = np.asarray(rows)
+        if removed:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, removed - 1)
+            self._rows = rows[:len(self._rows) - removed]
+            self.endRemoveRows()
+        if added:
+            self.beginInsertRows(QtCore.QModelIndex(), len(self._rows), len(rows) - 1)
+            self._rows = rows
+            self.endInsertRows()
+        self._rows = rows
+        if shifted and len(rows):
+            # Row numbers (positions) in vertical header are changed
+            self.headerDataChanged.emit(QtCore.Qt.Vertical, 0, len(rows) - 1)
+
+    def patch_rows(self, rows: np.ndarray, mapping: np.ndarray) -> NoReturn:
+        """
+        Set shown rows after table data is patched,
+            persistent indexes (selection / current index) are moved with their rows
+
+        Parameters
+        ----------
+        rows: positions of shown rows in new table data
+        mapping: position in new table data of each row in old table data (-1 for deleted rows)
+        """
+        rows = np.asarray(rows)
+        old_rows = self._rows
+        if np.array_equal(mapping[old_rows], rows):
+            # Rows are not moved, only row numbers (positions) in vertical header may be changed
+            self._rows = rows
+            if not np.array_equal(old_rows, rows) and len(rows):
+                self.headerDataChanged.emit(QtCore.Qt.Vertical, 0, len(rows) - 1)
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        self._rows = rows
+        inverse = np.full(int(rows.max()) + 1 if len(rows) else 0, -1)
+        inverse[rows] = np.arange(len(rows))
+        new_indexes = []
+        for index in old_indexes:
+            pos = mapping[old_rows[index.row()]]
+            row = inverse[pos] if 0 <= pos < len(inverse) else -1
+            new_indexes.append(self.index(row, index.column()) if row >= 0 else QtCore.QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def update_cells(self, cells: Dict[int, np.ndarray]) -> NoReturn:
+        """
+        Notify changed cells, dataChanged is emitted for each contiguous range of rows
+
+        Parameters
+        ----------
+        cells: column number - sorted row numbers of changed cells
+        """
+        for column, rows in cells.items():
+            if not len(rows):
+                continue
+            breaks = np.flatnonzero(np.diff(rows) != 1)
+            starts = rows[np.concatenate([[0], breaks + 1])]
+            stops = rows[np.concatenate([breaks, [len(rows) - 1]])]
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                self.dataChanged.emit(self.index(start, column), self.index(stop, column))
+
+    def set_highlight(self, cells: Dict[Tuple[int, str], Any], color: Any) -> NoReturn:
+        """
+        Set highlighted cells (kept by reference, call update_cells when it is changed)
+
+        Parameters
+        ----------
+        cells: dictionary whose keys are (position in table data, column key) of highlighted cells
+        color: background color of highlighted cells
+        """
+        self._highlight = cells
+        self._highlight_color = color
+
+    def value(self, row: int, column: int) -> Any:
+        """Get original value of cell"""
+        return self._cache.value(self._columns[column].key, self._rows[row])
+
+    def text(self, row: int, column: int) -> str:
+        """Get display string of cell"""
+        string = self._cache.text(self._columns[column].key, self._rows[row])
+        return '' if pd.isna(string) else string
+
+    # ================================ Model Methods ================================
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    @utils.error_handler
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        column = self._columns[index.column()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.text(index.row(), index.column())
+        elif role == QtCore.Qt.TextAlignmentRole:
+            return column.align.flag
+        elif role == QtCore.Qt.BackgroundRole \
+                and (self._rows[index.row()], column.key) in self._highlight:
+            return self._highlight_color
+        elif role in (QtCore.Qt.ForegroundRole, QtCore.Qt.BackgroundRole):
+            return column.style.role_data(role)
+        return None
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation,
+                   role: int = QtCore.Qt.DisplayRole) -> Any:
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            if 0 <= section < len(self._columns):
+                return self._header_text.get(section, self._columns[section].name)
+        elif 0 <= section < len(self._rows):
+            return str(self._rows[section] + 1)
+        return None
+
+    def setHeaderData(self, section: int, orientation: QtCore.Qt.Orientation, value: Any,
+                      role: int = QtCore.Qt.EditRole) -> bool:
+        if orientation != QtCore.Qt.Horizontal or not 0 <= section < len(self._columns):
+            return False
+        self._header_text[section] = str(value)
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+        if self._columns[index.column()].editable:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index: QtCore.QModelIndex, value: Any,
+                role: int = QtCore.Qt.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        self.cellEdited.emit(index.row(), index.column(), str(value))
+        self.dataChanged.emit(index, index)
+        return True
+
+
+if __name__ == '__main__':
+    pass
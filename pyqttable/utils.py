@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 """doc string"""
 
-__all__ = ['error_handler', 'widget_error_handler', 'widget_error_signal', 'NameLock']
+__all__ = ['error_handler', 'widget_error_handler', 'widget_error_signal', 'NameLock', 'to_strings']
 
 import contextlib as cl
 import functools as ft
+import pandas as pd
 import traceback as tb
 
 from PyQt5 import QtWidgets, QtCore
@@ -48,7 +49,7 @@ def widget_error_signal(method):
         except Exception as e:
             if hasattr(widget, 'errorOccurred'):
                 signal = widget.errorOccurred
-                if isinstance(signal, QtCore.pyqtSignal):
+                if isinstance(signal, QtCore.pyqtBoundSignal):
                     signal.emit(e, tb.format_exc())
         else:
             return res
@@ -74,5 +75,26 @@ class NameLock:
             raise PermissionError(f'Failed to get lock \'{name}\'')
 
 
+def to_strings(series: pd.Series, to_string: callable = None) -> pd.Series:
+    """Convert whole column to string array, <NA> for values failed to convert"""
+    to_string = to_string or str
+    try:
+        return series.map(to_string).astype('string')
+    except Exception as e:
+        _ = e
+        return series.map(_safe_call(to_string)).astype('string')
+
+
+def _safe_call(func: callable) -> callable:
+    @ft.wraps(func)
+    def wrapped_func(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            _ = e
+            return None
+    return wrapped_func
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""background task runner"""
+
+__all__ = ['Cancelled', 'TaskContext', 'TaskRunner']
+
+import traceback as tb
+
+from PyQt5 import QtCore
+from typing import Any, Tuple, Optional, NoReturn
+
+
+class Cancelled(Exception):
+    """Raised inside a task when it is cancelled"""
+
+
+class TaskContext:
+    """
+    Context passed to task function running in background
+    - check cancellation of task
+    - report progress of task
+    - send partial results of task (e.g. chunks of data)
+    """
+
+    def __init__(self, runner: 'TaskRunner', generation: int, signals: '_TaskSignals'):
+        self._runner = runner
+        self._generation = generation
+        self._signals = signals
+
+    @property
+    def generation(self) -> int:
+        """Generation token of task"""
+        return self._generation
+
+    @property
+    def cancelled(self) -> bool:
+        """Task is cancelled (or outdated by a newer task) or not"""
+        return self._runner.generation != self._generation
+
+    def check(self) -> NoReturn:
+        """Raise Cancelled if task is cancelled"""
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, value: int) -> NoReturn:
+        """Report progress of task (0 - 100)"""
+        self._signals.progress.emit(self._generation, value)
+
+    def send(self, result: Any) -> NoReturn:
+        """Send partial result of task (delivered on thread of runner by partialResult signal)"""
+        self._signals.partial.emit(self._generation, result)
+
+
+class _TaskSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(int, object)
+    failed = QtCore.pyqtSignal(int, object, object)
+    progress = QtCore.pyqtSignal(int, int)
+    partial = QtCore.pyqtSignal(int, object)
+    done = QtCore.pyqtSignal()
+
+
+class _Task(QtCore.QRunnable):
+
+    def __init__(self, func: callable, context: TaskContext, signals: _TaskSignals):
+        super().__init__()
+        self._func = func
+        self._context = context
+        self._signals = signals
+
+    def run(self) -> NoReturn:
+        generation = self._context.generation
+        try:
+            self._context.check()
+            res = self._func(self._context)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self._signals.failed.emit(generation, e, tb.format_exc())
+        else:
+            self._signals.finished.emit(generation, res)
+        finally:
+            self._signals.done.emit()
+
+
+class TaskRunner(QtCore.QObject):
+    """
+    Run task functions on QThreadPool one by one
+    Only result of the latest task is delivered (on thread of runner),
+        results of outdated or cancelled tasks are dropped
+
+    signals:
+    finished(result)
+    failed(Exception, traceback)
+    busyChanged(bool)
+    progressChanged(int)
+    partialResult(result)
+    """
+
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object, object)
+    busyChanged = QtCore.pyqtSignal(bool)
+    progressChanged = QtCore.pyqtSignal(int)
+    partialResult = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None,
+                 pool: Optional[QtCore.QThreadPool] = None):
+        super().__init__(parent)
+        self._pool = pool or QtCore.QThreadPool.globalInstance()
+        self._generation = 0
+        self._busy = False
+        self._signals = set()
+
+    @property
+    def generation(self) -> int:
+        """Generation token of the latest task"""
+        return self._generation
+
+    @property
+    def busy(self) -> bool:
+        """The latest task is running or not"""
+        return self._busy
+
+    def submit(self, func: callable) -> NoReturn:
+        """
+        Run task function in background, previous tasks are cancelled
+
+        Parameters
+        ----------
+        func: task function taking TaskContext as the only argument
+        """
+        context, signals = self._new_task()
+        # Keep signals alive until task is done
+        self._signals.add(signals)
+        signals.done.connect(lambda: self._signals.discard(signals))
+        self._pool.start(_Task(func, context, signals))
+
+    def start(self) -> TaskContext:
+        """
+        Start task run by caller instead of thread pool (e.g. coroutine in asyncio event loop),
+            previous tasks are cancelled, call finish when task is done
+
+        Returns
+        -------
+        TaskContext of task
+        """
+        context, _ = self._new_task()
+        return context
+
+    def finish(self, context: TaskContext) -> NoReturn:
+        """Finish task started by start (runner is not busy if it is the latest task)"""
+        if context.generation == self._generation:
+            self._set_busy(False)
+
+    def cancel(self) -> NoReturn:
+        """Cancel running task"""
+        self._generation += 1
+        self._set_busy(False)
+
+    def _new_task(self) -> Tuple[TaskContext, '_TaskSignals']:
+        # Context / signals of new task, which outdates previous tasks
+        self._generation += 1
+        signals = _TaskSignals()
+        signals.finished.connect(self._on_finished)
+        signals.failed.connect(self._on_failed)
+        signals.progress.connect(self._on_progress)
+        signals.partial.connect(self._on_partial)
+        context = TaskContext(self, self._generation, signals)
+        self._set_busy(True)
+        return context, signals
+
+    def _set_busy(self, busy: bool) -> NoReturn:
+        if busy != self._busy:
+            self._busy = busy
+            self.busyChanged.emit(busy)
+
+    def _on_finished(self, generation: int, result: Any) -> NoReturn:
+        if generation == self._generation:
+            self._set_busy(False)
+            self.progressChanged.emit(100)
+            self.finished.emit(result)
+
+    def _on_failed(self, generation: int, error: Exception, traceback: str) -> NoReturn:
+        if generation == self._generation:
+            self._set_busy(False)
+            self.failed.emit(error, traceback)
+
+    def _on_progress(self, generation: int, value: int) -> NoReturn:
+        if generation == self._generation:
+            self.progressChanged.emit(value)
+
+    def _on_partial(self, generation: int, result: Any) -> NoReturn:
+        if generation == self._generation:
+            self.partialResult.emit(result)
+
+
+if __name__ == '__main__':
+    pass
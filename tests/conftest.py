@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""shared fixtures of tests"""
+
+import os
+import pytest
+
+# Widgets are tested without display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield app
+
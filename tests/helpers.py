@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""helpers of tests"""
+
+import time
+
+
+def wait_until(app, condition: callable, timeout: float = 5) -> bool:
+    """Process Qt events until condition is met (or timeout in seconds)"""
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        app.processEvents()
+        time.sleep(0.001)
+    return True
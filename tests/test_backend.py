@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""tests of data backends (same table behaviour for each data format)"""
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from pyqttable import backend as backend_
+from pyarrow import feather
+from pyqttable.backend.arrow import ArrowBackend, ParquetBackend
+from pyqttable.backend.polars_ import PolarsBackend
+from pyqttable.engine import TableEngine
+
+_Config = [dict(key='sym', filter_type='contain'), dict(key='price', type=float, filter_type='expression'),
+           dict(key='side', filter_type='multiple_choice')]
+
+
+def _frame() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    price = rng.random(300).round(3)
+    price[::13] = np.nan
+    return pd.DataFrame({'sym': rng.choice(['alpha', 'beta', 'gamma', None], 300), 'price': price,
+                         'side': rng.choice(['buy', 'sell'], 300)})
+
+
+def _shown(data, filter_value: dict, sort_value: list) -> list:
+    engine = TableEngine(_Config)
+    engine.set_data(data)
+    engine.set_filters(filter_value)
+    engine.set_sort(sort_value)
+    return engine.refresh().tolist()
+
+
+@pytest.mark.parametrize('convert', [pa.Table.from_pandas, pl.from_pandas])
+@pytest.mark.parametrize('filter_value, sort_value', [
+    ({'sym': 'a'}, [('price', 'desc')]),
+    ({'price': '> 0.5', 'side': 'buy'}, [('sym', 'asc'), ('price', 'asc')]),
+    ({'sym': '#blank'}, [('side', 'desc')]),
+])
+def test_backends_show_same_rows(convert, filter_value, sort_value):
+    data = _frame()
+    expected = _shown(data, filter_value, sort_value)
+    assert _shown(convert(data), filter_value, sort_value) == expected
+
+
+def test_backends_are_made_without_conversion():
+    data = _frame()
+    assert isinstance(backend_.make(pa.Table.from_pandas(data)), ArrowBackend)
+    assert isinstance(backend_.make(pl.from_pandas(data)), PolarsBackend)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    column = backend_.make(table).column('price').array.__arrow_array__()
+    assert column.chunk(0).buffers()[1].address == table['price'].chunk(0).buffers()[1].address
+
+
+@pytest.fixture
+def files(tmp_path):
+    table = pa.Table.from_pandas(_frame(), preserve_index=False)
+    feather.write_feather(table, tmp_path / 'data.arrow', compression='uncompressed')
+    pq.write_table(table, tmp_path / 'data.parquet', row_group_size=64)
+    return tmp_path
+
+
+@pytest.mark.parametrize('name', ['data.arrow', 'data.parquet'])
+def test_file_source_shows_same_rows(files, name):
+    source = backend_.open_source(files / name)
+    assert source.lazy
+    filter_value, sort_value = {'sym': 'a', 'price': '< 0.8'}, [('price', 'desc')]
+    assert _shown(source, filter_value, sort_value) == _shown(_frame(), filter_value, sort_value)
+
+
+def test_parquet_rendering_reads_row_groups_only(files):
+    engine = TableEngine(_Config)
+    engine.set_data(backend_.open_source(files / 'data.parquet'))
+    assert isinstance(engine.backend, ParquetBackend)
+    assert engine.cache.text('price', 200) == str(_frame()['price'][200])
+    assert not engine.backend._loaded
+    engine.set_value(200, 'price', 1.5)
+    assert engine.cache.text('price', 200) == '1.5'
+    assert pq.read_table(files / 'data.parquet')['price'][200].as_py() == _frame()['price'][200]
+
+
+def test_unsupported_file_source(tmp_path):
+    with pytest.raises(ValueError):
+        backend_.open_source(tmp_path / 'data.csv')
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""tests of DataCache"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from pyqttable import backend as backend_
+from pyqttable.backend.arrow import ArrowBackend
+from pyqttable.cache import DataCache
+from pyqttable.column import ColumnGroup
+from pyqttable.engine import TableEngine
+
+
+def _cache(data) -> DataCache:
+    cache = DataCache(ColumnGroup([dict(key='x', type=int), dict(key='y', type=str)]))
+    cache.reset(backend_.make(data))
+    return cache
+
+
+def test_strings_are_cached_per_version():
+    cache = _cache(pd.DataFrame({'x': [3, 1, 2], 'y': ['a', 'b', 'c']}))
+    strings = cache.strings('x')
+    assert strings.tolist() == ['3', '1', '2']
+    assert cache.strings('x') is strings
+    version = cache.version
+    cache.reset(backend_.make(pd.DataFrame({'x': [5], 'y': ['d']})))
+    assert cache.version > version
+    assert not cache.has_strings('x')
+    assert cache.strings('x').tolist() == ['5']
+
+
+def test_edited_cell_updates_related_entries_only():
+    cache = _cache(pd.DataFrame({'x': [3, 1, 2], 'y': ['a', 'b', 'c']}))
+    x_strings, y_strings = cache.strings('x'), cache.strings('y')
+    assert cache.order('x').tolist() == [1, 2, 0]
+    cache.backend.set_value(0, 'x', 0)
+    cache.update(0, 'x', 0)
+    assert cache.strings('x') is x_strings
+    assert x_strings.tolist() == ['0', '1', '2']
+    assert cache.strings('y') is y_strings
+    assert cache.order('x').tolist() == [0, 1, 2]
+
+
+def test_lazy_strings_are_converted_by_blocks():
+    cache = _cache(ArrowBackend(pa.table({'x': np.arange(10000), 'y': ['a'] * 10000}), lazy=True))
+    assert cache.text('x', 5000) == '5000'
+    assert not cache.has_strings('x')
+    assert list(cache._blocks) == [('x', 5000 // DataCache.StringBlockSize)]
+    cache.backend.set_value(5000, 'x', -1)
+    cache.update(5000, 'x', -1)
+    assert cache.text('x', 5000) == '-1'
+
+
+def test_masks_are_least_recently_used():
+    cache = _cache(pd.DataFrame({'x': [1, 2], 'y': ['a', 'b']}))
+    for i in range(DataCache.MaskCacheSize):
+        cache.set_mask('x', str(i), np.array([True, bool(i % 2)]))
+    assert cache.mask('x', '0') is not None
+    cache.set_mask('y', 'a', np.array([True, False]))
+    assert cache.mask('x', '0') is not None
+    assert cache.mask('x', '1') is None
+    assert len(cache._masks) == DataCache.MaskCacheSize
+
+
+def test_edited_column_drops_its_masks_only():
+    cache = _cache(pd.DataFrame({'x': [1, 2], 'y': ['a', 'b']}))
+    cache.set_mask('x', '> 1', np.array([False, True]))
+    cache.set_mask('y', 'a', np.array([True, False]))
+    cache.set_mask('y', 'b', np.array([False, True]), version=cache.version - 1)
+    assert cache.mask('y', 'b') is None
+    cache.backend.set_value(0, 'x', 3)
+    cache.update(0, 'x', 3)
+    assert cache.mask('x', '> 1') is None
+    assert cache.mask('y', 'a').tolist() == [True, False]
+
+
+def test_engine_reuses_masks_of_other_filters():
+    engine = TableEngine([dict(key='x', type=int, filter_type='expression'), dict(key='y')])
+    engine.set_data(pd.DataFrame({'x': [1, 2, 3], 'y': ['a', 'b', 'a']}))
+    engine.set_filters({'x': '> 1', 'y': 'a'})
+    assert engine.refresh().tolist() == [2]
+    mask = engine.cache.mask('x', '> 1')
+    engine.set_filters({'x': '> 1', 'y': 'b'})
+    assert engine.refresh().tolist() == [1]
+    assert engine.cache.mask('x', '> 1') is mask
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""tests of headless TableEngine"""
+
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from pyqttable.engine import TableEngine
+
+
+def _engine(data: pd.DataFrame, **config) -> TableEngine:
+    engine = TableEngine([dict(key=key, **config.get(key, {})) for key in data.columns])
+    engine.set_data(data)
+    return engine
+
+
+@pytest.mark.parametrize('column_type', [float, 'float64'])
+def test_expression_filter_does_not_convert_strings(column_type):
+    engine = _engine(pd.DataFrame({'x': [0.5, 1.5, 2.5]}),
+                     x=dict(type=column_type, filter_type='expression'))
+    engine.set_filter('x', '> 1')
+    assert engine.refresh().tolist() == [1, 2]
+    assert not engine.cache.has_strings('x')
+
+
+def test_string_filter_converts_strings():
+    engine = _engine(pd.DataFrame({'x': [0.5, 1.5, 2.5]}), x=dict(type=float, filter_type='contain'))
+    engine.set_filter('x', '.5')
+    assert engine.refresh().tolist() == [0, 1, 2]
+    assert engine.cache.has_strings('x')
+
+
+def _ticks(count: int, size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        yield pd.DataFrame({'value': rng.random(size), 'count': rng.integers(0, 10, size),
+                            'name': rng.choice(['a', 'b', 'c'], size)})
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_append_with_max_rows_equals_recompute(background):
+    data = next(_ticks(1, 50, seed=1))
+    engine = _engine(data, value=dict(type=float), count=dict(type=int))
+    engine.set_filter('name', 'a')
+    engine.set_sort([('value', 'desc')])
+    engine.refresh()
+    for chunk in _ticks(40, 7):
+        if background:
+            assert engine.commit_append(engine.append_function([chunk], max_rows=120)()) is not None
+        else:
+            engine.append([chunk], max_rows=120)
+        data = pd.concat([data, chunk], ignore_index=True).iloc[-120:].reset_index(drop=True)
+    pd.testing.assert_frame_equal(engine.get_data(), data)
+    expected = _engine(data, value=dict(type=float), count=dict(type=int))
+    expected.set_filter('name', 'a')
+    expected.set_sort([('value', 'desc')])
+    assert engine.rows.tolist() == expected.refresh().tolist()
+    assert engine.cache.strings('value').tolist() == expected.cache.strings('value').tolist()
+
+
+def test_append_after_edit_keeps_edited_values():
+    engine = _engine(pd.DataFrame({'x': [1, 2, 3]}), x=dict(type=int))
+    engine.append([{'x': [4]}])
+    engine.set_value(0, 'x', 10)
+    engine.append([{'x': [5]}], max_rows=4)
+    assert engine.get_data()['x'].tolist() == [2, 3, 4, 5]
+    engine.set_value(0, 'x', 20)
+    engine.append([{'x': [6]}])
+    assert engine.get_data()['x'].tolist() == [20, 3, 4, 5, 6]
+
+
+def test_append_changing_dtype_matches_concat():
+    engine = _engine(pd.DataFrame({'x': [1, 2]}))
+    engine.append([{'x': [3]}])
+    engine.append([{'x': [None]}])
+    engine.append([{'x': [4]}])
+    expected = pd.concat([pd.DataFrame({'x': each}) for each in ([1, 2], [3], [None], [4])], ignore_index=True)
+    pd.testing.assert_frame_equal(engine.get_data(), expected)
+
+
+def test_appended_backend_does_not_change_data():
+    engine = _engine(pd.DataFrame({'x': [1, 2]}))
+    engine.append([{'x': [3]}])
+    first = engine.backend.appended([{'x': [4]}])
+    second = engine.backend.appended([{'x': [5]}])
+    engine.append([{'x': [6]}])
+    assert first.data['x'].tolist() == [1, 2, 3, 4]
+    assert second.data['x'].tolist() == [1, 2, 3, 5]
+    assert engine.get_data()['x'].tolist() == [1, 2, 3, 6]
+
+
+def test_shown_rows_are_positions_in_data():
+    data = pd.DataFrame({'x': [3.0, 1.0, 4.0, 1.5, 9.0]}, index=list('abcde'))
+    engine = _engine(data, x=dict(type=float, filter_type='expression'))
+    assert np.shares_memory(engine.backend.column('x').to_numpy(), data['x'].to_numpy())
+    engine.set_filter('x', '> 1')
+    engine.set_sort([('x', 'desc')])
+    rows = engine.refresh()
+    assert rows.tolist() == [4, 2, 0, 3]
+    assert engine.get_data(full=False)['x'].tolist() == [9.0, 4.0, 3.0, 1.5]
+    engine.set_value(3, 'x', 0.5)
+    assert engine.get_data()['x'].tolist() == [3.0, 1.0, 4.0, 0.5, 9.0]
+    assert data['x'].tolist() == [3.0, 1.0, 4.0, 1.5, 9.0]
+
+
+def test_engine_runs_without_qapplication():
+    script = '\n'.join([
+        'import pandas as pd',
+        'from PyQt5 import QtWidgets',
+        'from pyqttable.engine import TableEngine',
+        'engine = TableEngine([dict(key="x", type=int, filter_type="expression"), dict(key="y")])',
+        'engine.set_data(pd.DataFrame({"x": [3, 1, 2], "y": ["b", "a", "b"]}))',
+        'engine.set_filter("x", "> 1")',
+        'engine.set_sort([("x", "asc")])',
+        'print(engine.refresh().tolist(), engine.choices("y"), engine.row_numbers([0, 1]).tolist(),',
+        '      QtWidgets.QApplication.instance() is None)',
+    ])
+    res = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.dirname(__file__)), timeout=60)
+    assert res.returncode == 0, res.stderr
+    assert res.stdout.strip() == "[2, 0] ['a', 'b'] [1, -1] True"
+
+
+def test_filter_and_sort_functions_run_on_other_thread():
+    engine = _engine(pd.DataFrame({'x': [3, 1, 2, 5]}), x=dict(type=int, filter_type='expression'))
+    engine.set_filter('x', '>= 2')
+    engine.set_sort([('x', 'desc')])
+    filter_func, sort_func = engine.filter_function(), engine.sort_function()
+    engine.set_filter('x', None)
+    with ThreadPoolExecutor(1) as pool:
+        rows = pool.submit(filter_func).result()
+        rows = pool.submit(sort_func, rows).result()
+    assert rows.tolist() == [3, 0, 2]
+    assert engine.rows.tolist() == [0, 1, 2, 3]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""tests of chunked parallel filter executor"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import threading
+
+from pyqttable.column.filter import Filter, FilterType
+from pyqttable.column.default import ValueFetcher
+from pyqttable.engine import TableEngine
+from pyqttable.executor import FilterExecutor
+
+
+class FailingFilter(Filter):
+    """Parallel-safe filter raising TypeError in its own code"""
+
+    ParallelSafe = True
+
+    def __init__(self):
+        super().__init__(FilterType.Exact)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'type': self.type}
+
+    def filter_series(self, series, filter_value, to_string, to_value, strings=None):
+        with self._lock:
+            self.calls += 1
+        raise TypeError('bug in filter')
+
+    def filter_each(self, content, filter_value, to_string, to_value):
+        return False
+
+
+def _regex() -> Filter:
+    return Filter.make(ValueFetcher(dict(filter_type='regex')))
+
+
+@pytest.fixture(params=['process', 'thread'])
+def executor(request):
+    res = FilterExecutor(request.param, max_workers=2, chunk_size=10)
+    yield res
+    res.shutdown()
+
+
+def test_chunks_match_serial(executor):
+    series = pd.Series([f'item {i}' for i in range(95)])
+    column_filter = _regex()
+    expected = column_filter.filter_mask(series, r'[37]$', str)
+    assert np.array_equal(executor.filter_mask(column_filter, series, r'[37]$', str), expected)
+
+
+def test_unpicklable_filter_runs_serially():
+    executor = FilterExecutor('process', max_workers=2, chunk_size=10)
+    series = pd.Series(range(50))
+    column_filter = _regex()
+    mask = executor.filter_mask(column_filter, series, '^1', lambda x: str(x))
+    assert mask.tolist() == [str(x).startswith('1') for x in range(50)]
+    assert executor._pool is None
+    executor.shutdown()
+
+
+def test_error_in_filter_is_raised_once():
+    executor = FilterExecutor('thread', max_workers=2, chunk_size=10)
+    column_filter = FailingFilter()
+    with pytest.raises(TypeError, match='bug in filter'):
+        executor.filter_mask(column_filter, pd.Series(range(50)), 'x', str)
+    # Each chunk is evaluated at most once, and not again in current thread
+    assert column_filter.calls <= 5
+    executor.shutdown()
+
+
+def test_engine_closes_own_executor():
+    engine = TableEngine([dict(key='x', filter_type='regex')], filter_executor='thread')
+    pool = engine._executor.pool
+    engine.close()
+    assert pool._shutdown
+
+
+def test_engine_keeps_given_executor():
+    executor = FilterExecutor('thread')
+    engine = TableEngine([dict(key='x', filter_type='regex')], filter_executor=executor)
+    pool = executor.pool
+    engine.close()
+    assert not pool._shutdown
+    executor.shutdown()
+
+
+def test_widget_destruction_closes_executor(qapp):
+    from PyQt5 import QtCore
+    from pyqttable import PyQtTableView
+    table = PyQtTableView(column_config=[dict(key='x', filter_type='regex')],
+                          filter_executor='thread')
+    pool = table.engine._executor.pool
+    table.deleteLater()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert pool._shutdown
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""tests of column filters"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyqttable.column import ColumnGroup
+from pyqttable.column.expression import Expression
+from pyqttable.column.filter import ContainFilter, FilterType
+from pyqttable.engine import TableEngine
+
+
+def _filtered(values: list, filter_type: str, filter_value: str, **config) -> list:
+    engine = TableEngine([dict(key='x', filter_type=filter_type, **config)])
+    engine.set_data(pd.DataFrame({'x': values}))
+    engine.set_filter('x', filter_value)
+    return engine.refresh().tolist()
+
+
+@pytest.mark.parametrize('filter_type', ['exact', 'contain', 'regex', 'expression',
+                                         'multiple_choice'])
+@pytest.mark.parametrize('filter_value, expected', [
+    ('#blank', [1, 2]),
+    ('#non-blank', [0, 3]),
+])
+def test_blank_keywords(filter_type, filter_value, expected):
+    assert _filtered(['a', '', None, 'b'], filter_type, filter_value, type=str) == expected
+
+
+@pytest.mark.parametrize('filter_value, expected', [
+    ('> 1', [2, 3]),
+    ('> 1 and < 5', [2]),
+    ('x % 2 == 0', [2]),
+    ('in [1, 7]', [0, 3]),
+    ('>= 7 or == 1', [0, 3]),
+])
+def test_expression_on_numbers(filter_value, expected):
+    assert _filtered([1, np.nan, 2, 7], 'expression', filter_value, type=float) == expected
+
+
+def test_expression_bounded_power():
+    assert _filtered([1, 2, 3], 'expression', '** 2 > 3', type=int) == [1, 2]
+    assert _filtered([1, 2, 3], 'expression', '> 2 ** -1', type=float) == [0, 1, 2]
+
+
+def test_expression_string_methods():
+    values = ['Apple', 'banana', 'Avocado', None]
+    assert _filtered(values, 'expression', '.startswith("A")', type=str) == [0, 2]
+    assert _filtered(values, 'expression', '.lower() == "banana"', type=str) == [1]
+
+
+@pytest.mark.parametrize('text', [
+    '__import__("os")', 'x.__class__', 'open("f")', '> 1 +',
+    '> 9**9**9**9', '> (2**99)**99', '> 2**x', '** 1000',
+])
+def test_expression_rejects_unsafe_or_invalid(text):
+    with pytest.raises(ValueError):
+        Expression(text)
+
+
+@pytest.mark.parametrize('new_text, old_text, expected', [
+    ('> 1 and < 5', '> 1', True),
+    ('> 1 and < 5 and != 3', '> 1 and < 5', True),
+    ('< 5 and > 1', '> 1', True),
+    ('> 1', '> 1 and < 5', False),
+    ('== 1 and < 5 or == 7', '== 1', False),
+    ('> 1 and < 5', '> 2', False),
+])
+def test_expression_refinement(new_text, old_text, expected):
+    assert Expression.parse(new_text).refines(Expression.parse(old_text)) == expected
+
+
+def test_refinement_keeps_rows_of_or_term():
+    engine = TableEngine([dict(key='x', type=int, filter_type='expression')])
+    engine.set_data(pd.DataFrame({'x': [1, 3, 7]}))
+    for value in ['== 1', '== 1 and < 5 or == 7']:
+        engine.set_filter('x', value)
+        engine.set_rows(engine.filter_function()(), engine.filter_value)
+    assert engine.rows.tolist() == [0, 2]
+
+
+class _CountingFilter(ContainFilter):
+    """Contain filter recording number of rows filtered"""
+
+    def __init__(self):
+        super().__init__(FilterType.Contain)
+        self.sizes = []
+
+    def filter_series(self, series, filter_value, to_string, to_value, strings=None):
+        self.sizes.append(len(series))
+        return super().filter_series(series, filter_value, to_string, to_value, strings)
+
+
+def test_refined_filter_narrows_last_result():
+    column_filter = _CountingFilter()
+    engine = TableEngine([dict(key='x', type=int, filter_type=column_filter)])
+    engine.set_data(pd.DataFrame({'x': [1, 12, 21, 123, 5, 312]}))
+    for value, expected in [('1', [0, 1, 2, 3, 5]), ('12', [1, 3, 5]), ('123', [3]), ('2', [1, 2, 3, 5])]:
+        engine.set_filter('x', value)
+        rows = engine.filter_function()()
+        engine.set_rows(rows, engine.filter_value)
+        assert rows.tolist() == expected
+    assert column_filter.sizes == [6, 5, 3, 6]
+
+
+@pytest.mark.parametrize('filter_type, old_value, new_value, expected', [
+    ('contain', 'ab', 'abc', True),
+    ('contain', 'abc', 'ab', False),
+    ('multiple_choice', 'a,b,c', 'a,c', True),
+    ('multiple_choice', 'a,c', 'a,b', False),
+    ('expression', '> 1', '> 1 and < 5', True),
+    ('expression', '> 1', '> 2', False),
+    ('exact', 'a', 'a', True),
+    ('regex', 'a', 'ab', False),
+])
+def test_is_refinement(filter_type, old_value, new_value, expected):
+    column_filter = ColumnGroup([dict(key='x', filter_type=filter_type)])[0].filter
+    assert column_filter.is_refinement(old_value, new_value) == expected
+
+
+@pytest.mark.parametrize('filter_type, filter_value, expected', [
+    ('exact', '1', [0]),
+    ('contain', '1', [0, 3]),
+    ('regex', '^[12]$', [0, 1]),
+    ('multiple_choice', '2,11', [1, 3]),
+])
+def test_string_filters_on_display_strings(filter_type, filter_value, expected):
+    assert _filtered([1, 2, 3, 11], filter_type, filter_value, type=int) == expected
+
+
+@pytest.mark.parametrize('filter_type, filter_values', [
+    ('exact', ['a.c', '1.5', '', '#blank']),
+    ('contain', ['a', '.', 'B', '#non-blank']),
+    ('regex', ['^a', 'c$', '[', '#blank']),
+    ('expression', ['.startswith("a")', '!= "abc"', '#non-blank']),
+    ('multiple_choice', ['a.c,abc', 'B', '#blank']),
+])
+def test_vectorized_filter_matches_each_value(filter_type, filter_values):
+    column = ColumnGroup([dict(key='x', filter_type=filter_type)])[0]
+    values = ['a.c', 'abc', 'B', '', None, '1.5', 'xa']
+    to_string, to_value = column.type.to_string, column.type.to_value
+    for filter_value in filter_values:
+        expected = [column.filter.common_filter(each, filter_value)
+                    or column.filter._filter_apply(each, filter_value, to_string, to_value)
+                    for each in values]
+        mask = column.filter.filter_mask(pd.Series(values, dtype=object), filter_value, to_string, to_value)
+        assert mask.tolist() == expected, filter_value
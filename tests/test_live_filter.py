@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""tests of filtering from filter header (skip unchanged filters, cancel, errors)"""
+
+import pandas as pd
+import pytest
+
+from pyqttable import PyQtTableView
+from pyqttable.engine import TableEngine
+from tests.helpers import wait_until
+
+
+def _table(background: bool) -> PyQtTableView:
+    table = PyQtTableView(column_config=[dict(key='x', type=int, filter_type='expression')],
+                          show_filter=True, background=background)
+    table.set_data(pd.DataFrame({'x': range(10)}))
+    table.errors = []
+    table.errorOccurred.connect(lambda e, tb: table.errors.append(e))
+    return table
+
+
+def _enter(table: PyQtTableView, text: str):
+    header = table._header_manager
+    header._filter_editor['x'][2].setText(text)
+    header._on_filter()
+
+
+def test_filter_not_applied_until_rows_are_set():
+    engine = TableEngine([dict(key='x', type=int, filter_type='expression')])
+    engine.set_data(pd.DataFrame({'x': range(10)}))
+    engine.set_filter('x', '> 5')
+    rows = engine.filter_function()()
+    assert engine.filter_changed
+    engine.set_rows(rows, engine.filter_value)
+    assert not engine.filter_changed
+    assert engine.rows.tolist() == [6, 7, 8, 9]
+
+
+def test_unchanged_filter_skipped(qapp):
+    table = _table(background=False)
+    _enter(table, '> 5')
+    assert table.engine.rows.tolist() == [6, 7, 8, 9]
+    table.engine.set_rows(table.engine.rows[:1])
+    _enter(table, '> 5')
+    assert table.engine.rows.tolist() == [6]
+
+
+def test_refilter_after_cancel(qapp):
+    table = _table(background=True)
+    _enter(table, '> 5')
+    table.cancel()
+    assert wait_until(qapp, lambda: not table.busy)
+    assert len(table.engine.rows) == 10
+    _enter(table, '> 5')
+    assert wait_until(qapp, lambda: len(table.engine.rows) == 4)
+    assert table.get_filter_data() == {'x': '> 5'}
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_refilter_after_error(qapp, background):
+    table = _table(background)
+    _enter(table, '> 5 +')
+    assert wait_until(qapp, lambda: len(table.errors) == 1)
+    _enter(table, '> 5 +')
+    assert wait_until(qapp, lambda: len(table.errors) == 2)
+    _enter(table, '> 5')
+    assert wait_until(qapp, lambda: len(table.engine.rows) == 4)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""tests of loading data by chunks"""
+
+import asyncio
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyqttable import PyQtTableView
+from pyqttable.engine import TableEngine
+from tests.helpers import wait_until
+
+_Config = [dict(key='id', type=int), dict(key='sym', filter_type='contain')]
+
+
+def _chunks(count: int, size: int = 100):
+    rng = np.random.default_rng(1)
+    for i in range(count):
+        yield pd.DataFrame({'id': np.arange(i * size, (i + 1) * size),
+                            'sym': rng.choice(['alpha', 'beta', 'gamma'], size)})
+
+
+def _table() -> PyQtTableView:
+    table = PyQtTableView(column_config=_Config, sortable=True)
+    table.progress, table.loading_states = [], []
+    table.loadProgress.connect(lambda loaded, total: table.progress.append((loaded, total)))
+    table.loadingChanged.connect(table.loading_states.append)
+    table.set_sort([('sym', 'asc'), ('id', 'desc')])
+    return table
+
+
+def _expected(data: pd.DataFrame) -> list:
+    engine = TableEngine(_Config)
+    engine.set_data(data)
+    engine.set_sort([('sym', 'asc'), ('id', 'desc')])
+    return engine.refresh().tolist()
+
+
+def test_chunks_are_loaded_and_sorted(qapp):
+    table = _table()
+    table.set_data_chunks(_chunks(20), total=2000)
+    assert len(table.engine.backend) >= 100
+    assert wait_until(qapp, lambda: not table.loading)
+    data = pd.concat(list(_chunks(20)), ignore_index=True)
+    pd.testing.assert_frame_equal(table.get_data(), data)
+    assert table.engine.rows.tolist() == _expected(data)
+    assert table.model().rowCount() == 2000
+    assert table.progress[-1] == (2000, 2000)
+    assert table.loading_states == [True, False]
+
+
+def test_cancel_loading_keeps_loaded_rows(qapp):
+    table = _table()
+    release = threading.Event()
+
+    def chunks():
+        for i, chunk in enumerate(_chunks(10)):
+            if i == 3:
+                release.wait(5)
+            yield chunk
+
+    table.set_data_chunks(chunks())
+    assert wait_until(qapp, lambda: len(table.engine.backend) == 300)
+    table.cancel_loading()
+    release.set()
+    assert not table.loading
+    assert not wait_until(qapp, lambda: len(table.engine.backend) > 300, timeout=0.2)
+    assert table.engine.rows.tolist() == _expected(table.get_data())
+
+
+async def _pump(app, stop: asyncio.Event):
+    # Qt events are processed while asyncio event loop runs (as qasync does)
+    while not stop.is_set():
+        app.processEvents()
+        await asyncio.sleep(0.001)
+
+
+def _run(app, coroutine):
+    async def main():
+        stop = asyncio.Event()
+        pump = asyncio.create_task(_pump(app, stop))
+        try:
+            return await coroutine
+        finally:
+            stop.set()
+            await pump
+    return asyncio.run(main())
+
+
+async def _async_chunks(count: int):
+    for i, chunk in enumerate(_chunks(count)):
+        await asyncio.sleep(0.001)
+        yield chunk.to_dict('records') if i % 3 == 1 else chunk
+
+
+def test_set_data_async_from_awaitable_records(qapp):
+    table = _table()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return [{'id': 1, 'sym': 'beta'}, {'id': 2, 'sym': 'alpha'}]
+
+    _run(qapp, table.set_data_async(fetch()))
+    assert table.get_data()['id'].tolist() == [1, 2]
+    assert table.model().rowCount() == 2
+
+
+def test_set_data_async_from_async_chunks(qapp):
+    table = _table()
+    _run(qapp, table.set_data_async(_async_chunks(12)))
+    assert not table.loading
+    data = pd.concat(list(_chunks(12)), ignore_index=True)
+    pd.testing.assert_frame_equal(table.get_data(), data)
+    assert table.engine.rows.tolist() == _expected(data)
+    assert table.model().rowCount() == 1200
+
+
+def test_cancelled_async_loading_keeps_loaded_rows(qapp):
+    table = _table()
+
+    async def load():
+        task = asyncio.create_task(table.set_data_chunks_async(_async_chunks(1000)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _run(qapp, load())
+    assert not table.loading
+    loaded = len(table.engine.backend)
+    assert 0 < loaded < 100000
+    assert table.engine.rows.tolist() == _expected(table.get_data())
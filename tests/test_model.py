@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""tests of TableModel behind PyQtTableView"""
+
+import pandas as pd
+
+from PyQt5 import QtCore
+from pyqttable import PyQtTableView
+
+
+def _view() -> PyQtTableView:
+    table = PyQtTableView(column_config=[dict(key='name', editable=True, filter_type='contain'),
+                                         dict(key='price', type=float, editable=True)],
+                          show_filter=True, sortable=True)
+    table.set_data(pd.DataFrame({'name': ['apple', 'banana', 'cherry', None], 'price': [1.5, 0.25, 3.0, None]}))
+    return table
+
+
+def _texts(table: PyQtTableView, column: int):
+    model = table.model()
+    return [model.data(model.index(row, column)) for row in range(model.rowCount())]
+
+
+def test_model_shows_display_strings(qapp):
+    table = _view()
+    model = table.model()
+    assert (model.rowCount(), model.columnCount()) == (4, 2)
+    assert _texts(table, 0) == ['apple', 'banana', 'cherry', '']
+    assert _texts(table, 1) == ['1.5', '0.25', '3.0', '']
+    assert model.headerData(0, QtCore.Qt.Horizontal) == 'name'
+    assert model.headerData(3, QtCore.Qt.Vertical) == '4'
+
+
+def test_model_follows_shown_rows(qapp):
+    table = _view()
+    table.set_sort([('price', 'desc')])
+    assert _texts(table, 0) == ['cherry', 'apple', 'banana', '']
+    assert table.model().headerData(0, QtCore.Qt.Vertical) == '3'
+    table.engine.set_filter('name', 'an')
+    table.engine.refresh()
+    table._display_data()
+    assert _texts(table, 0) == ['banana']
+    assert table.model().value(0, 1) == 0.25
+
+
+def test_edited_cell_is_written_to_data(qapp):
+    table = _view()
+    model = table.model()
+    assert model.flags(model.index(0, 1)) & QtCore.Qt.ItemIsEditable
+    assert model.setData(model.index(1, 1), '0.5')
+    assert table.get_data()['price'].tolist()[:3] == [1.5, 0.5, 3.0]
+    assert _texts(table, 1)[1] == '0.5'
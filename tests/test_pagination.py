@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""tests of pagination of PyQtTable"""
+
+import pandas as pd
+import pytest
+
+from pyqttable import PyQtTable
+
+
+def _table(page_size=4) -> PyQtTable:
+    table = PyQtTable(column_config=[dict(key='x', type=int, editable=True)], sortable=True,
+                      page_size=page_size)
+    table.pages = []
+    table.pageChanged.connect(lambda page, count: table.pages.append((page, count)))
+    table.set_data(pd.DataFrame({'x': range(10)}))
+    return table
+
+
+def _texts(table: PyQtTable) -> list:
+    return [table.item(row, 0).text() for row in range(table.rowCount())]
+
+
+def _headers(table: PyQtTable) -> list:
+    return [table.verticalHeaderItem(row).text() for row in range(table.rowCount())]
+
+
+def test_only_items_of_current_page_are_created(qapp):
+    table = _table()
+    assert (table.page, table.page_count) == (0, 3)
+    assert _texts(table) == ['0', '1', '2', '3']
+    table.set_page(-1)
+    assert table.page == 2
+    assert _texts(table) == ['8', '9']
+    assert _headers(table) == ['9', '10']
+    table.set_page(10)
+    assert table.page == 2
+    assert table.pages[-1] == (2, 3)
+
+
+def test_pages_follow_sorting_and_page_size(qapp):
+    table = _table()
+    table.set_sort([('x', 'desc')])
+    table.set_page(1)
+    assert _texts(table) == ['5', '4', '3', '2']
+    assert _headers(table) == ['6', '5', '4', '3']
+    table.set_page_size(3)
+    assert (table.page, table.page_count) == (1, 4)
+    assert _texts(table) == ['6', '5', '4']
+    table.set_page_size(None)
+    assert table.page_count == 1
+    assert table.rowCount() == 10
+    with pytest.raises(ValueError):
+        PyQtTable(column_config=[dict(key='x')], page_size=0)
+
+
+def test_edit_on_page_writes_to_shown_row(qapp):
+    table = _table()
+    table.set_page(1)
+    table.item(1, 0).setText('50')
+    assert table.get_data()['x'].tolist()[4:7] == [4, 50, 6]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""tests of shared memory backend"""
+
+import subprocess
+import sys
+import threading
+import numpy as np
+import pytest
+
+from multiprocessing import resource_tracker
+from pyqttable.backend.shm import SharedMemoryWriter, SharedMemoryBackend, _open
+
+
+@pytest.fixture
+def writer():
+    with SharedMemoryWriter({'id': 'i8', 'price': 'f8', 'sym': 'U4'}, capacity=100) as res:
+        yield res
+
+
+def test_poll_reads_changed_rows(writer):
+    writer.append({'id': [1, 2], 'price': [1.0, 2.0], 'sym': ['a', 'b']})
+    backend = SharedMemoryBackend(writer.name)
+    assert len(backend) == 2
+    assert backend.poll() is None
+    writer.append({'id': [3], 'price': [3.0], 'sym': ['c']})
+    writer.write(0, {'price': [1.5]})
+    assert backend.poll() == (0, 3)
+    assert backend.column('price').tolist() == [1.5, 2.0, 3.0]
+    assert backend.copy()['sym'].tolist() == ['a', 'b', 'c']
+    writer.clear()
+    assert backend.poll() == (0, 0)
+    assert len(backend) == 0
+    with pytest.raises(TypeError):
+        backend.set_value(0, 'price', 1.0)
+
+
+def test_open_does_not_register_block(writer, monkeypatch):
+    registered = []
+    monkeypatch.setattr(resource_tracker, 'register', lambda name, rtype: registered.append((name, rtype)))
+    register = resource_tracker.register
+
+    def attach():
+        shm = _open(writer.name)
+        # Other resources are still registered while blocks are attached
+        resource_tracker.register('other', 'semaphore')
+        shm.close()
+
+    threads = [threading.Thread(target=attach) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert resource_tracker.register is register
+    assert registered == [('other', 'semaphore')] * len(threads)
+
+
+def test_rows_are_copied_when_polled(writer):
+    writer.append({'id': [1, 2], 'price': [1.0, 2.0], 'sym': ['a', 'b']})
+    backend = SharedMemoryBackend(writer.name)
+    price = backend.column('price')
+    writer.write(0, {'price': [9.0]})
+    # Data is not changed until polled
+    assert price.tolist() == [1.0, 2.0]
+    assert backend.column('price').tolist() == [1.0, 2.0]
+    assert backend.poll() == (0, 1)
+    assert backend.column('price').tolist() == [9.0, 2.0]
+    writer.append({'id': np.arange(3, 60), 'price': np.arange(3.0, 60.0), 'sym': ['c'] * 57})
+    assert backend.poll() == (2, 59)
+    assert backend.column('id').tolist() == list(range(1, 60))
+
+
+def test_poll_skips_rows_written_while_copying(writer, monkeypatch):
+    writer.append({'id': [1, 2], 'price': [1.0, 2.0], 'sym': ['a', 'b']})
+    backend = SharedMemoryBackend(writer.name)
+    read = backend._read
+
+    def _read(start, stop):
+        # Writer updates block while reader is copying rows
+        res = read(start, stop)
+        writer.write(0, {'price': [5.0]})
+        return res
+
+    writer.write(0, {'price': [3.0]})
+    monkeypatch.setattr(backend, '_read', _read)
+    assert backend.poll() is None
+    assert backend.column('price').tolist() == [1.0, 2.0]
+    monkeypatch.setattr(backend, '_read', read)
+    assert backend.poll() == (0, 1)
+    assert backend.column('price').tolist() == [5.0, 2.0]
+
+
+def test_close_detaches_from_block(writer):
+    writer.append({'id': [1], 'price': [1.0], 'sym': ['a']})
+    backend = SharedMemoryBackend(writer.name)
+    shm = backend.data
+    backend.close()
+    assert shm.buf is None
+    assert backend.poll() is None
+    assert backend.column('id').tolist() == [1]
+    # Given SharedMemory is not closed by backend
+    shm = _open(writer.name)
+    SharedMemoryBackend(shm).close()
+    assert shm.buf is not None
+    shm.close()
+
+
+def test_backend_package_imports_shm_lazily():
+    code = ('import sys; import pyqttable.backend as b; assert "pyqttable.backend.shm" not in sys.modules; '
+            'assert b.SharedMemoryWriter.__module__ == "pyqttable.backend.shm"')
+    subprocess.run([sys.executable, '-c', code], check=True)
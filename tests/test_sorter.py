@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""tests of column sorter and sorting in TableEngine"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyqttable.column.sorter import Sorter, SortStatus
+from pyqttable.engine import TableEngine
+
+
+def _engine(data: pd.DataFrame) -> TableEngine:
+    engine = TableEngine([dict(key=key, type=float if data[key].dtype == float else str)
+                          for key in data.columns])
+    engine.set_data(data)
+    return engine
+
+
+@pytest.mark.parametrize('status, expected', [
+    ('asc', [0, 3, 2, 1]),
+    ('desc', [2, 3, 0, 1]),
+])
+def test_single_column_nulls_last(status, expected):
+    engine = _engine(pd.DataFrame({'x': [1, np.nan, 3, 2]}))
+    engine.set_sort([('x', status)])
+    assert engine.refresh().tolist() == expected
+
+
+@pytest.mark.parametrize('status, expected', [
+    ('asc', [3, 0, 2, 1, 4]),
+    ('desc', [2, 0, 3, 1, 4]),
+])
+def test_multi_column_nulls_last(status, expected):
+    engine = _engine(pd.DataFrame({'g': ['a', 'a', 'a', 'a', None],
+                                   'x': [2, np.nan, 3, 1, 5]}))
+    engine.set_sort([('g', 'asc'), ('x', status)])
+    assert engine.refresh().tolist() == expected
+
+
+def test_descending_keeps_ties_reversed():
+    order = Sorter().argsort(pd.Series([1, None, 1, 2]))
+    rows = Sorter.sort_rows(order, np.arange(4), SortStatus.Descending, null_count=1)
+    assert rows.tolist() == [3, 2, 0, 1]
+
+
+def test_sort_key_and_sort_lt():
+    series = pd.Series(['b', 'C', 'a'])
+    assert Sorter(sort_key=lambda s: s.str.lower()).argsort(series).tolist() == [2, 0, 1]
+    assert Sorter(sort_lt=lambda x, y: x.lower() < y.lower()).argsort(series).tolist() == [2, 0, 1]
+
+
+@pytest.mark.parametrize('status', ['asc', 'desc'])
+def test_appended_rows_inserted_like_sorting(status):
+    data = pd.DataFrame({'x': [1, np.nan, 3, 2]})
+    engine = _engine(data)
+    engine.set_sort([('x', status)])
+    engine.refresh()
+    engine.append([pd.DataFrame({'x': [np.nan, 2, 0]})])
+    expected = _engine(pd.concat([data, pd.DataFrame({'x': [np.nan, 2, 0]})], ignore_index=True))
+    expected.set_sort([('x', status)])
+    assert engine.rows.tolist() == expected.refresh().tolist()
+
+
+@pytest.mark.parametrize('ascending', [(True, True), (True, False), (False, True), (False, False)])
+def test_multi_column_sort_matches_pandas(ascending):
+    rng = np.random.default_rng(3)
+    x = rng.permutation(200).astype(float)
+    x[::17] = np.nan
+    data = pd.DataFrame({'g': rng.choice(['a', 'b', 'c'], 200), 'x': x})
+    engine = _engine(data)
+    engine.set_sort([('g', 'asc' if ascending[0] else 'desc'), ('x', 'asc' if ascending[1] else 'desc')])
+    expected = data.sort_values(['g', 'x'], ascending=list(ascending), kind='stable', na_position='last')
+    assert engine.refresh().tolist() == expected.index.tolist()
+
+
+def test_ranks_reused_when_sorting_changes():
+    engine = _engine(pd.DataFrame({'g': ['b', 'a', 'b'], 'x': [1.0, 2.0, 3.0]}))
+    engine.set_sort([('g', 'asc'), ('x', 'asc')])
+    assert engine.refresh().tolist() == [1, 0, 2]
+    ranks = engine.cache.ranks('x')
+    engine.set_sort([('g', 'desc'), ('x', 'desc')])
+    assert engine.refresh().tolist() == [2, 0, 1]
+    assert engine.cache.ranks('x') is ranks
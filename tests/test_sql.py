@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""tests of SQL backend (SQLite)"""
+
+import gc
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from pyqttable.backend import SqlBackend
+from pyqttable.engine import TableEngine
+
+
+@pytest.fixture
+def engine():
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    pd.DataFrame({'id': range(20), 'name': [f'n{i % 7}' for i in range(20)],
+                  'value': [None if i % 5 == 0 else i * 1.5 for i in range(20)]}) \
+        .to_sql('items', connection, index=False)
+    res = TableEngine([dict(key='id', type=int, filter_type='exact'),
+                       dict(key='name', type=str, filter_type='contain'),
+                       dict(key='value', type=float, filter_type='expression')])
+    res.set_data(SqlBackend(connection, 'items'))
+    return res
+
+
+def test_pushdown_filter_and_sort(engine):
+    engine.set_filter('name', 'n1')
+    engine.set_sort([('value', 'desc')])
+    engine.refresh()
+    assert engine.get_data(full=False)['id'].tolist() == [8, 1, 15]
+
+
+def test_nulls_last_in_both_orders(engine):
+    for status in ('asc', 'desc'):
+        engine.set_sort([('value', status)])
+        engine.refresh()
+        values = engine.get_data(full=False)['value'].tolist()
+        assert all(pd.isna(each) for each in values[-4:])
+        assert not any(pd.isna(each) for each in values[:-4])
+
+
+def test_custom_filters_released(engine):
+    dialect = engine.backend._dialect
+    for i in range(50):
+        engine.set_filter('value', f'> {i}')
+        engine.refresh()
+    gc.collect()
+    assert len(engine.rows) == len([i for i in range(20) if i % 5 and i * 1.5 > 49])
+    assert len(dialect._filters) == 1
+    engine.set_filter('value', None)
+    engine.refresh()
+    gc.collect()
+    assert not dialect._filters
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""tests of batched conversion of column types"""
+
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyqttable.column.default import ValueFetcher
+from pyqttable.column.type import ColumnType
+from pyqttable.engine import TableEngine
+
+
+def _type(klass) -> ColumnType:
+    return ColumnType.make(ValueFetcher(dict(type=klass)))
+
+
+@pytest.mark.parametrize('klass, values', [
+    (int, [1, -2, 30]),
+    (float, [0.1, 1e20, 1e-07, -0.0, 123456789.123]),
+    (str, ['a', '', 'b c']),
+    (bool, [True, False]),
+])
+def test_to_string_batch_matches_to_string(klass, values):
+    column_type = _type(klass)
+    strings, failed = column_type.to_string_batch(pd.Series(values, dtype=object))
+    assert strings.tolist() == [column_type.to_string(value) for value in values]
+    assert not failed.any()
+
+
+@pytest.mark.parametrize('klass, series', [
+    (float, pd.Series([1.5, np.nan])),
+    (int, pd.Series([1, None], dtype='Int64')),
+    (str, pd.Series(['a', None])),
+    (object, pd.Series([1, None], dtype=object)),
+    (dt.datetime, pd.Series(pd.to_datetime(['2020-01-02 03:04:05', None]))),
+])
+def test_missing_values_stay_missing(klass, series):
+    strings, failed = _type(klass).to_string_batch(series)
+    assert strings.iloc[0] is not pd.NA and pd.isna(strings.iloc[1])
+    assert not failed.any()
+
+
+def test_to_string_batch_keeps_index():
+    series = pd.Series([3, 4], index=[10, 20])
+    strings, _ = _type(int).to_string_batch(series)
+    assert strings.index.tolist() == [10, 20]
+
+
+@pytest.mark.parametrize('klass, strings, values, failed', [
+    (int, ['1', ' -2 ', 'x', None], [1, -2, None, None], [False, False, True, False]),
+    (float, ['1.5', 'nan', 'x'], [1.5, None, None], [False, False, True]),
+    (bool, ['True', 'False'], [True, False], [False, False]),
+])
+def test_to_value_batch(klass, strings, values, failed):
+    res, mask = _type(klass).to_value_batch(pd.Series(strings, dtype=object))
+    assert [None if pd.isna(x) else x for x in res.tolist()] == values
+    assert mask.tolist() == failed
+
+
+@pytest.mark.parametrize('klass, series, expected', [
+    ('int64', pd.Series([1, -2], dtype='int64'), ['1', '-2']),
+    ('Int64', pd.Series([1, None], dtype='Int64'), ['1', None]),
+    (np.float32, pd.Series([0.1, np.nan], dtype=np.float32), ['0.1', None]),
+    ('float64', pd.Series([0.5, 1e20]), ['0.5', '1e+20']),
+    ('boolean', pd.Series([True, None], dtype='boolean'), ['True', None]),
+    ('category', pd.Series(['b', 'a', None], dtype='category'), ['b', 'a', None]),
+    ('string[pyarrow]', pd.Series(['x', None], dtype='string[pyarrow]'), ['x', None]),
+    ('datetime64[ns]', pd.Series(pd.to_datetime(['2020-01-02 03:04:05', None])),
+     ['2020-01-02 03:04:05', None]),
+])
+def test_dtype_to_string_batch(klass, series, expected):
+    strings, failed = _type(klass).to_string_batch(series)
+    assert [None if pd.isna(x) else x for x in strings.tolist()] == expected
+    assert not failed.any()
+
+
+@pytest.mark.parametrize('klass, strings, expected_dtype, values, failed', [
+    ('int64', ['1', 'x'], 'object', [1, None], [False, True]),
+    ('int64', ['1', '2'], 'int64', [1, 2], [False, False]),
+    ('Int64', ['1', None], 'Int64', [1, None], [False, False]),
+    ('float32', ['0.5', 'nan'], 'float32', [0.5, None], [False, False]),
+    (pd.CategoricalDtype(['a', 'b']), ['b', 'c'], 'category', ['b', None], [False, True]),
+])
+def test_dtype_to_value_batch(klass, strings, expected_dtype, values, failed):
+    res, mask = _type(klass).to_value_batch(pd.Series(strings, dtype=object))
+    assert str(res.dtype) == expected_dtype
+    assert [None if pd.isna(x) else x for x in res.tolist()] == values
+    assert mask.tolist() == failed
+
+
+def test_auto_type_is_bound_to_column_dtype():
+    engine = TableEngine([dict(key='x', type='auto'), dict(key='y', type='auto')])
+    engine.set_data(pd.DataFrame({'x': pd.Series([3, 1], dtype='int32'),
+                                  'y': pd.Series(['b', 'a'], dtype='category')}))
+    columns = {column.key: column for column in engine.column_group}
+    assert columns['x'].type.dtype == np.dtype('int32')
+    assert isinstance(columns['y'].type.dtype, pd.CategoricalDtype)
+    engine.set_value(0, 'x', columns['x'].type.to_value('7'))
+    assert engine.get_data()['x'].tolist() == [7, 1]
+    assert engine.get_data()['x'].dtype == np.dtype('int32')
+
+
+@pytest.mark.parametrize('series', [
+    pd.Series(pd.to_datetime(['2020-01-01 00:00:00', '2020-01-02 03:04:05'])),
+    pd.Series(pd.to_datetime(['2020-01-01', '2020-01-02']), dtype='datetime64[s]'),
+    pd.Series([b'ab', b''], dtype=object),
+    pd.Series([0.1, 1 / 3], dtype=np.float32),
+    pd.Series([1.5, 'a', 2], dtype=object),
+    pd.Series(['b', 'a'], dtype='category'),
+])
+def test_basic_type_displays_values_by_str(series):
+    strings, _ = _type(str).to_string_batch(series)
+    assert strings.tolist() == series.map(str).tolist()
+
+
+def test_exact_filter_on_datetime_display_string():
+    engine = TableEngine([dict(key='t', filter_type='exact')])
+    engine.set_data(pd.DataFrame({'t': pd.to_datetime(['2020-01-01', '2020-01-02'])}))
+    engine.set_filter('t', '2020-01-01 00:00:00')
+    assert engine.refresh().tolist() == [0]
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""tests of updating rows in place (upsert by primary key, patching refreshed data)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyqttable.engine import TableEngine
+
+_Config = [dict(key='id', type=int), dict(key='sym', filter_type='contain'),
+           dict(key='price', type=float, filter_type='expression')]
+
+
+def _engine(data: pd.DataFrame, key_column: str = None) -> TableEngine:
+    engine = TableEngine(_Config, key_column=key_column)
+    engine.set_data(data)
+    engine.set_filters({'sym': 'a', 'price': '> 0.3'})
+    engine.set_sort([('price', 'desc'), ('id', 'asc')])
+    engine.refresh()
+    return engine
+
+
+def _frame(ids: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({'id': ids, 'sym': rng.choice(['alpha', 'beta', 'gamma'], len(ids)),
+                         'price': rng.random(len(ids)).round(2)})
+
+
+@pytest.mark.parametrize('max_rows', [None, 150])
+def test_upsert_equals_recompute(max_rows):
+    rng = np.random.default_rng(11)
+    data = _frame(np.arange(100), rng)
+    engine = _engine(data, key_column='id')
+    next_id = 100
+    for _ in range(30):
+        ids = np.concatenate([rng.choice(data['id'].to_numpy(), 8), np.arange(next_id, next_id + 3)])
+        next_id += 3
+        chunk = _frame(ids, rng)
+        old = data.set_index('id')
+        changed, _, _ = engine.upsert([chunk], max_rows=max_rows)
+        update = chunk.drop_duplicates('id', keep='last').set_index('id')
+        data = update.combine_first(old).loc[list(old.index) + [each for each in update.index
+                                                                if each not in old.index]]
+        data = data.reset_index()[['id', 'sym', 'price']]
+        if max_rows is not None:
+            data = data.iloc[-max_rows:].reset_index(drop=True)
+        for key, rows in changed.items():
+            assert set(engine.get_data()['id'].take(rows)) <= set(update.index)
+    pd.testing.assert_frame_equal(engine.get_data(), data, check_dtype=False)
+    assert engine.rows.tolist() == _engine(data).rows.tolist()
+
+
+def test_upsert_reports_changed_cells_only():
+    engine = _engine(pd.DataFrame({'id': [1, 2, 3], 'sym': ['a', 'ab', 'b'], 'price': [0.5, 0.4, 0.9]}),
+                     key_column='id')
+    assert engine.rows.tolist() == [0, 1]
+    changed, moved, appended = engine.upsert([{'id': [2, 3], 'sym': ['ab', 'ba'], 'price': [0.6, 0.9]}])
+    assert {key: rows.tolist() for key, rows in changed.items()} == {'price': [1], 'sym': [2]}
+    assert moved
+    assert appended == (0, 0, 0)
+    assert engine.rows.tolist() == [2, 1, 0]
+
+
+def test_patch_data_equals_recompute():
+    rng = np.random.default_rng(5)
+    data = _frame(np.arange(200), rng)
+    engine = _engine(data)
+    for _ in range(10):
+        new = data.sample(frac=0.9, random_state=int(rng.integers(1000))).reset_index(drop=True)
+        changed_rows = rng.choice(len(new), 20, replace=False)
+        new.loc[changed_rows, 'price'] = rng.random(20).round(2)
+        new = pd.concat([new, _frame(np.arange(1000, 1005) + len(data), rng)], ignore_index=True)
+        mapping, changed = engine.patch_data(new, 'id')
+        old_ids, new_ids = data['id'].to_numpy(), new['id'].to_numpy()
+        assert (new_ids[mapping[mapping >= 0]] == old_ids[mapping >= 0]).all()
+        assert not np.isin(old_ids[mapping < 0], new_ids).any()
+        old_prices = data.set_index('id')['price']
+        for row in changed.get('price', []):
+            assert old_prices[new_ids[row]] != new['price'][row]
+        data = new
+    assert engine.rows.tolist() == _engine(data).rows.tolist()
+
+
+def test_patch_data_without_keys_resets_data():
+    engine = _engine(pd.DataFrame({'id': [1], 'sym': ['a'], 'price': [0.5]}))
+    assert engine.patch_data(pd.DataFrame({'sym': ['ab'], 'price': [0.9]}), 'id') is None
+    assert engine.rows.tolist() == [0]
+    engine.set_data(pd.DataFrame({'id': [1], 'sym': ['a'], 'price': [0.5]}))
+    with pytest.raises(ValueError):
+        engine.patch_data(pd.DataFrame({'id': [1, 1], 'sym': ['a', 'b'], 'price': [0.5, 0.6]}), 'id')
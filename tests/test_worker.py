@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""tests of background TaskRunner"""
+
+import threading
+import pandas as pd
+
+from PyQt5 import QtCore
+from pyqttable import PyQtTableView
+from pyqttable.worker import TaskRunner
+from tests.helpers import wait_until
+
+
+def _runner(pool=None):
+    runner = TaskRunner(pool=pool)
+    runner.results, runner.errors, runner.busy_states = [], [], []
+    runner.finished.connect(runner.results.append)
+    runner.failed.connect(lambda e, tb: runner.errors.append(e))
+    runner.busyChanged.connect(runner.busy_states.append)
+    return runner
+
+
+def test_only_latest_result_is_delivered(qapp):
+    # Own pool, so that new task runs while old one is blocked (global pool may have 1 thread)
+    pool = QtCore.QThreadPool()
+    pool.setMaxThreadCount(2)
+    runner = _runner(pool)
+    release = threading.Event()
+
+    def slow(context):
+        release.wait(5)
+        return 'old'
+
+    runner.submit(slow)
+    runner.submit(lambda context: 'new')
+    assert wait_until(qapp, lambda: runner.results)
+    release.set()
+    assert wait_until(qapp, lambda: not runner._signals)
+    assert runner.results == ['new']
+    assert runner.busy_states == [True, False]
+    pool.waitForDone()
+
+
+def test_cancelled_task_stops_at_check(qapp):
+    runner = _runner()
+    started, checked = threading.Event(), []
+
+    def task(context):
+        started.set()
+        while not context.cancelled:
+            pass
+        checked.append(True)
+        context.check()
+        return 'done'
+
+    runner.submit(task)
+    assert started.wait(5)
+    runner.cancel()
+    assert wait_until(qapp, lambda: not runner._signals)
+    assert checked and not runner.results and not runner.errors
+    assert not runner.busy
+
+
+def test_error_is_delivered(qapp):
+    runner = _runner()
+    runner.submit(lambda context: 1 / 0)
+    assert wait_until(qapp, lambda: runner.errors)
+    assert isinstance(runner.errors[0], ZeroDivisionError)
+    assert not runner.busy
+
+
+def test_background_sort_and_filter_match_foreground(qapp):
+    data = pd.DataFrame({'x': range(1000, 0, -1), 'y': ['a', 'b'] * 500})
+    tables = []
+    for background in (False, True):
+        table = PyQtTableView(column_config=[dict(key='x', type=int), dict(key='y')],
+                              sortable=True, background=background)
+        table.set_data(data)
+        table.set_sort([('y', 'asc'), ('x', 'asc')])
+        tables.append(table)
+    assert wait_until(qapp, lambda: not tables[1].busy)
+    assert tables[1].engine.rows.tolist() == tables[0].engine.rows.tolist()
+    assert tables[1].model().rowCount() == 1000